@@ -0,0 +1,201 @@
+import os
+import socket
+import redis
+from app.core.config import settings
+from app.core.redis_client import redis_client
+
+# Channel / stream names
+LIVE_TICKS = "live_ticks"
+LIVE_SNAPSHOTS = "live_snapshots"
+CANDLE_CLOSED = "candle_closed"
+TRADE_SIGNALS = "trade_signals"
+CHAIN_UPDATES = "chain_updates"
+ORDER_UPDATES = "order_updates"
+PNL_UPDATES = "pnl_updates"
+FEED_CONTROL = "feed_control"
+
+
+class PubSubBus:
+    """
+    Fire-and-forget bus on Redis pub/sub (original behaviour).
+    Messages published while a consumer is down are lost.
+    """
+    backend = "pubsub"
+
+    def __init__(self, client=None):
+        self.redis = client or redis_client
+
+    def publish(self, channel, message):
+        self.redis.publish(channel, message)
+
+    def publish_many(self, channel, messages):
+        """Publishes a batch of messages in a single round trip."""
+        pipe = self.redis.pipeline(transaction=False)
+        for message in messages:
+            pipe.publish(channel, message)
+        pipe.execute()
+
+    def consumer(self, channel, group=None, consumer_name=None):
+        # Groups are meaningless on pub/sub: every subscriber gets every message.
+        return PubSubConsumer(self.redis, channel)
+
+
+class PubSubConsumer:
+    def __init__(self, client, channel):
+        self.channel = channel
+        self.pubsub = client.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.subscribe(channel)
+
+    def read(self, count=None, block_ms=None):
+        """
+        Returns up to `count` messages as (message_id, data) tuples.
+        Waits up to `block_ms` for the first one (0 = don't wait).
+        """
+        count = count or settings.BUS_READ_COUNT
+        block_ms = settings.BUS_BLOCK_MS if block_ms is None else block_ms
+
+        messages = []
+        timeout = block_ms / 1000
+        while len(messages) < count:
+            message = self.pubsub.get_message(timeout=timeout)
+            if message is None:
+                break
+            if message["type"] == "message":
+                messages.append((None, message["data"]))
+            timeout = 0
+        return messages
+
+    def ack(self, message_ids):
+        pass
+
+    def close(self):
+        self.pubsub.close()
+
+
+class StreamBus:
+    """
+    Durable bus on Redis Streams.
+    - XADD with approximate MAXLEN trimming keeps memory bounded.
+    - Consumer groups let several workers share one stream.
+    - Unacknowledged entries are replayed to the same consumer after a restart.
+    """
+    backend = "streams"
+
+    def __init__(self, client=None, maxlen=None):
+        self.redis = client or redis_client
+        self.maxlen = maxlen or settings.BUS_STREAM_MAXLEN
+
+    def publish(self, channel, message):
+        self.redis.xadd(channel, {"data": message}, maxlen=self.maxlen, approximate=True)
+
+    def publish_many(self, channel, messages):
+        """Pipelines one XADD per message into a single round trip."""
+        pipe = self.redis.pipeline(transaction=False)
+        for message in messages:
+            pipe.xadd(channel, {"data": message}, maxlen=self.maxlen, approximate=True)
+        pipe.execute()
+
+    def consumer(self, channel, group=None, consumer_name=None):
+        return StreamConsumer(self.redis, channel, group, consumer_name)
+
+
+class StreamConsumer:
+    def __init__(self, client, stream, group=None, consumer_name=None):
+        self.redis = client
+        self.stream = stream
+        self.group = group
+        self.consumer_name = consumer_name or default_consumer_name(group or "tail")
+
+        if group:
+            try:
+                self.redis.xgroup_create(stream, group, id="$", mkstream=True)
+                print(f"DEBUG: Created consumer group '{group}' on '{stream}'.")
+            except redis.ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+            # Start from our own pending entries list: everything delivered
+            # to this consumer before a restart but never acknowledged.
+            self.last_id = "0"
+            self.claim_stale()
+        else:
+            # Plain tail: only entries added from now on. "$" is resolved to
+            # a concrete id once; re-sent on every XREAD it would skip
+            # entries added between two reads.
+            try:
+                self.last_id = self.redis.xinfo_stream(stream)["last-generated-id"]
+            except redis.ResponseError:
+                self.last_id = "0-0"  # No stream yet: all of it is new
+
+    def claim_stale(self, min_idle_ms=None):
+        """
+        Takes over entries left pending by consumers that died
+        (idle longer than `min_idle_ms`). They are replayed with our own backlog.
+        """
+        min_idle_ms = min_idle_ms or settings.BUS_CLAIM_IDLE_MS
+        try:
+            self.redis.xautoclaim(
+                self.stream, self.group, self.consumer_name,
+                min_idle_time=min_idle_ms, start_id="0-0", justid=True
+            )
+        except redis.ResponseError as e:
+            print(f"WARNING: XAUTOCLAIM failed on '{self.stream}': {e}")
+
+    def read(self, count=None, block_ms=None):
+        """
+        Returns up to `count` entries as (entry_id, data) tuples.
+        Waits up to `block_ms` for new entries (0 = don't wait).
+        """
+        count = count or settings.BUS_READ_COUNT
+        block_ms = settings.BUS_BLOCK_MS if block_ms is None else block_ms
+        block = block_ms or None  # BLOCK 0 would wait forever
+
+        if not self.group:
+            response = self.redis.xread({self.stream: self.last_id}, count=count, block=block)
+            entries = response[0][1] if response else []
+            if entries:
+                self.last_id = entries[-1][0]
+            return [(entry_id, fields.get("data")) for entry_id, fields in entries]
+
+        if self.last_id != ">":
+            # Replay phase: walk the pending list until it is empty.
+            response = self.redis.xreadgroup(
+                self.group, self.consumer_name, {self.stream: self.last_id}, count=count
+            )
+            entries = response[0][1] if response else []
+            if entries:
+                self.last_id = entries[-1][0]
+                print(f"DEBUG: Replaying {len(entries)} unacked entries from '{self.stream}'.")
+                # Trimmed entries come back without fields.
+                return [(entry_id, (fields or {}).get("data")) for entry_id, fields in entries]
+            self.last_id = ">"
+
+        response = self.redis.xreadgroup(
+            self.group, self.consumer_name, {self.stream: ">"}, count=count, block=block
+        )
+        entries = response[0][1] if response else []
+        return [(entry_id, fields.get("data")) for entry_id, fields in entries]
+
+    def ack(self, message_ids):
+        ids = [message_id for message_id in message_ids if message_id]
+        if self.group and ids:
+            self.redis.xack(self.stream, self.group, *ids)
+
+    def close(self):
+        pass
+
+
+def get_bus(client=None):
+    """
+    Returns the bus for the configured backend (BUS_BACKEND).
+    """
+    if settings.BUS_BACKEND == "streams":
+        return StreamBus(client)
+    return PubSubBus(client)
+
+
+def default_consumer_name(role):
+    """Stable per-host consumer name so a restarted worker replays its own backlog."""
+    return settings.BUS_CONSUMER_NAME or f"{role}-{socket.gethostname()}-{os.getenv('WORKER_ID', '0')}"
+
+
+bus = get_bus()
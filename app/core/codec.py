@@ -0,0 +1,93 @@
+import json
+
+# Column order of a closed candle on the 'candle_closed' bus
+CANDLE_FIELDS = (
+    "timestamp",
+    "open", "high", "low", "close", "volume",
+    "open_interest", "total_buy_qty", "total_sell_qty",
+    "iv", "delta", "theta", "gamma", "vega",
+    "best_bid", "best_ask",
+    "max_buy_wall_price", "max_buy_wall_qty",
+    "max_sell_wall_price", "max_sell_wall_qty",
+)
+
+# Order flow of the candle, sent after CANDLE_FIELDS: ticks seen, aggressor
+# buy/sell volume and the volume profile as [[prices], [volumes]]
+FLOW_FIELDS = ("tick_count", "buy_volume", "sell_volume", "profile")
+
+CANDLE_BATCH_VERSION = 1
+
+
+def encode_candle_batch(boundary_ts, candles, timeframe=60, features=None):
+    """
+    Encodes closed candles of one timeframe as one compact message.
+    `candles` is a list of (symbol, candle_dict) with CANDLE_FIELDS keys
+    (FLOW_FIELDS are optional and sent as empty when missing). With
+    `features=(version, names)` each candle's "features" vector is sent too.
+
+    Layout: {"v": 1, "ts": boundary, "tf": 60, "f": [fields...], "r": [[symbol, v1, v2, ...], ...]}
+    plus {"fv": version, "fn": [feature names]} when features are included.
+    Field names are sent once per batch instead of once per candle.
+    """
+    fields = CANDLE_FIELDS + FLOW_FIELDS + (("features",) if features else ())
+    rows = []
+    for symbol, candle in candles:
+        row = [symbol] + [candle.get(field, 0) for field in CANDLE_FIELDS]
+        row += [candle.get("tick_count", 0), candle.get("buy_volume", 0), candle.get("sell_volume", 0),
+                candle.get("profile") or [[], []]]
+        if features:
+            row.append(candle.get("features"))
+        rows.append(row)
+
+    message = {"v": CANDLE_BATCH_VERSION, "ts": boundary_ts, "tf": timeframe, "f": fields, "r": rows}
+    if features:
+        message["fv"], message["fn"] = features
+    return json.dumps(message, separators=(",", ":"))
+
+
+def decode_candle_batch(raw):
+    """
+    Decodes a 'candle_closed' message into a list of (symbol, candle_dict).
+    Each candle carries its "timeframe" in seconds, and its "features" as
+    {name: value} with their "feature_version" when the batch has them.
+    Also accepts the legacy single-candle form {"symbol": ..., "candle": {...}}.
+    """
+    data = json.loads(raw)
+
+    if "r" in data:
+        fields = data["f"]
+        timeframe = data.get("tf", 60)
+        candles = [(row[0], dict(zip(fields, row[1:]), timeframe=timeframe)) for row in data["r"]]
+        names = data.get("fn")
+        if names:
+            for _, candle in candles:
+                if candle.get("features"):
+                    candle["features"] = dict(zip(names, candle["features"]))
+                    candle["feature_version"] = data["fv"]
+        return candles
+
+    symbol = data.get("symbol")
+    candle = data.get("candle")
+    if symbol and candle:
+        return [(symbol, candle)]
+    return []
+
+
+def encode_tick_snapshot(ts_ms, fields, rows):
+    """
+    Encodes the conflated state of the instruments that changed since the
+    last snapshot. `rows` is {symbol: [values in `fields` order]}.
+
+    Layout: {"ts": ms, "f": [fields...], "r": [[symbol, v1, v2, ...], ...]}
+    """
+    return json.dumps(
+        {"ts": ts_ms, "f": fields, "r": [[symbol] + list(values) for symbol, values in rows.items()]},
+        separators=(",", ":")
+    )
+
+
+def decode_tick_snapshot(raw):
+    """Decodes a 'live_snapshots' message into {symbol: {field: value}}."""
+    data = json.loads(raw)
+    fields = data["f"]
+    return {row[0]: dict(zip(fields, row[1:])) for row in data["r"]}
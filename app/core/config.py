@@ -14,6 +14,159 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = "sniper_db"
     POSTGRES_HOST: str = "localhost"
     POSTGRES_PORT: int = 5433
+    CANDLE_COMPRESS_AFTER_DAYS: int = 7  # Native compression for older chunks
+    CANDLE_RETENTION_DAYS: int = 365  # Raw 1m candles
+    CANDLE_AGGREGATE_RETENTION_DAYS: int = 1825  # 5m/15m continuous aggregates
+
+    # Upstox REST Client
+    UPSTOX_POOL_SIZE: int = 10  # Kept-alive connections per client
+    UPSTOX_HTTP2: bool = True  # HTTP/2 for the REST pool (h2 comes with httpx[http2])
+    UPSTOX_TIMEOUT: float = 5.0
+    UPSTOX_RATE_PER_SECOND: int = 50  # Upstox standard API quotas
+    UPSTOX_RATE_PER_MINUTE: int = 500
+    UPSTOX_MAX_RETRIES: int = 3
+    UPSTOX_BACKOFF_SECONDS: float = 0.2  # Doubles per retry; Retry-After wins if longer
+
+    # Startup
+    STARTUP_WARM_TIMEOUT: float = 10.0  # Per warm-up phase; a slow phase is skipped, not awaited forever
+    STARTUP_CONTRACT_UNDERLYINGS: list[str] = ["NSE_INDEX|Nifty 50"]  # Contract cache filled if missing
+    STARTUP_PRELOAD_MODULES: list[str] = [
+        "numpy",
+        "app.services.feed_service",
+        "app.services.morning_setup",
+        "app.services.contract_manager",
+    ]
+    FEED_RESUME_ON_STARTUP: bool = True  # Reconnect the feed with the instruments it had before a restart
+
+    # Morning Setup (ATM grids subscribed at the open)
+    MORNING_UNDERLYINGS: dict[str, dict] = {
+        # underlying key: contract name, strike step, strikes each side of ATM
+        "NSE_INDEX|Nifty 50": {"name": "NIFTY", "step": 50, "width": 2},
+        "NSE_INDEX|Nifty Bank": {"name": "BANKNIFTY", "step": 100, "width": 2},
+        "NSE_INDEX|Nifty Fin Service": {"name": "FINNIFTY", "step": 50, "width": 2},
+        "BSE_INDEX|SENSEX": {"name": "SENSEX", "step": 100, "width": 2},
+        # Stocks, e.g. "NSE_EQ|INE002A01018": {"name": "RELIANCE", "step": 10, "width": 2}
+    }
+    MORNING_SPOT_TIMEOUT: float = 5.0  # Wait for every underlying's spot; late ones are skipped
+
+    # Feed Subscription Modes ("ltpc", "option_greeks", "full", "full_d30")
+    FEED_ADAPTIVE_MODES: bool = True  # False subscribes everything in "full"
+    FEED_NEAR_MODE: str = "full"  # Strikes within FEED_NEAR_STRIKES of spot
+    FEED_FAR_MODE: str = "ltpc"  # Greeks for these come from the local Greeks engine
+    FEED_SIGNAL_MODE: str = "full"  # Instruments with a recent signal ("full_d30" needs Upstox Plus)
+    FEED_INDEX_MODE: str = "ltpc"  # Depth and Greeks don't exist for indices
+    FEED_EQUITY_MODE: str = "full"  # Stock underlyings (NSE_EQ/BSE_EQ) have depth
+    FEED_NEAR_STRIKES: int = 3
+    FEED_SIGNAL_HOLD_SECONDS: int = 900  # Signal-driven promotion lasts this long
+    FEED_MODE_DEMOTE_SECONDS: int = 60  # Wanted a cheaper mode this long before being demoted
+    FEED_MODE_INTERVAL_SECONDS: float = 5.0  # Rebalance and FEED_MODES metrics cadence
+
+    # Market Session (IST; the feed's segment status overrides the calendar)
+    SESSION_SEGMENT: str = "NSE_FO"  # Segment whose MarketInfo status drives the session
+    SESSION_PRE_OPEN: str = "09:00"
+    SESSION_OPEN: str = "09:15"
+    SESSION_CLOSE: str = "15:30"
+    SESSION_CLOSING_END: str = "16:00"  # Closing session end; candles are flushed by then
+    MARKET_HOLIDAYS: list[str] = []  # Exchange holidays as ISO dates; weekends are implied
+    SESSION_CACHE_SECONDS: float = 5.0  # How long a process trusts its last MARKET_STATUS read
+    SESSION_JOBS: bool = True  # Daily jobs on the feed leader (contracts, morning setup, archive)
+    SESSION_CONTRACTS_AT: str = "09:00"
+    SESSION_ARCHIVE_AT: str = "16:05"
+    SESSION_POLL_SECONDS: float = 15.0
+    SESSION_JOB_ATTEMPTS: int = 20  # Per job per day
+
+    # Feed Leadership (one feed across all API workers)
+    LEADER_LEASE_TTL_MS: int = 3000  # Failover bound; the holder renews every third of it
+    LEADER_CONTROL_TIMEOUT: float = 15.0  # Wait for the leader to answer a forwarded control route
+
+    # Snapshots (crash-safe worker state)
+    SNAPSHOT_ENABLED: bool = True
+    SNAPSHOT_DIR: str = "snapshots"
+    SNAPSHOT_INTERVAL_MS: int = 1000  # Delta journal cadence; full snapshots follow each sweep
+    SNAPSHOT_MAX_AGE_SECONDS: int = 900  # Older snapshots (e.g. yesterday's) are not restored
+
+    # Message Bus
+    BUS_BACKEND: str = "pubsub"  # "pubsub" or "streams"
+    BUS_STREAM_MAXLEN: int = 100000  # Approximate cap per stream (MAXLEN ~)
+    BUS_READ_COUNT: int = 500  # Max entries per XREADGROUP / read batch
+    BUS_BLOCK_MS: int = 1000
+    BUS_CLAIM_IDLE_MS: int = 30000  # Pending entries idle this long are taken over
+    BUS_CONSUMER_NAME: str = ""  # Defaults to {role}-{hostname}-{WORKER_ID}
+
+    # Candles
+    CANDLE_TIMEFRAMES: list[int] = [60]  # Seconds; 60 is always built, others roll up from it
+    CANDLE_GRACE_MS: int = 200  # Wait after a bucket boundary before finalizing
+    CANDLE_LTT_MAX_LAG_MS: int = 2000  # Ticks are stamped with the last trade time unless it is older than this
+    CANDLE_CARRY_FORWARD: bool = True  # Emit flat candles for instruments with no trades
+    CANDLE_CARRY_FORWARD_IDLE_MINUTES: int = 30  # Stop carrying an instrument forward after this long without trades
+    CANDLE_PROFILE_BUCKET: float = 0.05  # Price step of the per-candle volume profile (one tick)
+
+    # Tick Conflation (last-value view for slow consumers)
+    CONFLATE_INTERVAL_MS: int = 250  # TICK:* hashes and 'live_snapshots' cadence
+    SPOT_MAX_AGE_SECONDS: float = 5.0  # Older conflated spot is not trusted by MorningSetup
+
+    # Feature Store (versioned per-candle features, see app/core/features.py)
+    FEATURES_ENABLED: bool = True  # Computed by the resampler, stored and sent with 1m candles
+    FEATURE_RING_SIZE: int = 512  # 1m feature vectors kept per symbol in the strategy host
+
+    # Greeks Engine
+    GREEKS_ENGINE: bool = True  # Compute IV/Greeks locally from LTP, spot and expiry
+    GREEKS_RISK_FREE_RATE: float = 0.065
+    GREEKS_OVERRIDE_BROKER: bool = False  # False: only fill when the broker sends none
+    CONTRACT_RETRY_SECONDS: int = 60  # Instruments missing from the contract cache are looked up again after this
+
+    # Option Chain Analytics
+    CHAIN_PUBLISH_INTERVAL_MS: int = 1000  # Throttle for CHAIN:* snapshots and 'chain_updates'
+    CHAIN_SKEW_STEPS: int = 2  # Strikes from ATM used for put-call IV skew
+    CHAIN_TTL_SECONDS: int = 86400  # CHAIN:* snapshots of chains that stopped ticking expire
+
+    # Strategy Host
+    STRATEGY_CONFIG: str = "strategies.json"  # Plugins and thresholds, reloaded on change
+    STRATEGY_RELOAD_SECONDS: int = 2
+    STRATEGY_STATS_SECONDS: int = 30  # CPU accounting published to STRATEGY_STATS
+    STRATEGY_QUEUE_SIZE: int = 1000  # Bound on queued bus batches / isolated inbox
+    STRATEGY_SHM_ROWS: int = 65536  # Shared-memory candle ring for isolated strategies
+
+    # Signal Router
+    SIGNAL_COOLDOWN_SECONDS: int = 60  # Per-symbol quiet period after a signal (upgrades pass)
+    SIGNAL_DEDUP_SECONDS: int = 300  # Same signal for the same symbol is dropped within this window
+    SIGNAL_SINK_QUEUE_SIZE: int = 1000  # Per-sink bound; overflow is dropped and counted
+    SIGNAL_WEBHOOK_URL: str = ""  # Optional extra sink
+    SIGNAL_WEBHOOK_TIMEOUT: float = 2.0
+
+    # Order Gateway
+    ORDER_BROKER: str = "paper"  # "paper", "upstox" or "mock"
+    ORDER_API_URL: str = "https://api-hft.upstox.com"
+    ORDER_MOCK_URL: str = "http://127.0.0.1:8081"  # uvicorn app.services.mock_broker:app --port 8081
+    ORDER_PRODUCT: str = "I"  # Intraday
+    ORDER_LOTS_STRONG_BUY: int = 1
+    ORDER_LOTS_WATCHLIST: int = 0  # 0 = don't trade
+    ORDER_RATE_PER_SECOND: int = 10  # Upstox order API quota
+    ORDER_RATE_PER_MINUTE: int = 250
+    ORDER_POLL_MS: int = 500  # Fill polling for live/mock orders
+    ORDER_LATENCY_SAMPLES: int = 10000
+    ORDER_STATS_SECONDS: int = 10
+
+    # Positions & Risk
+    RISK_MAX_LOSS: float = 5000.0  # New orders blocked once total P&L <= -RISK_MAX_LOSS (0 = off)
+    RISK_MAX_LOTS_PER_UNDERLYING: int = 10  # 0 = off
+    PNL_PUBLISH_INTERVAL_MS: int = 1000  # PNL_SNAPSHOT / 'pnl_updates' throttle
+
+    # WebSocket Streaming
+    WS_MAX_RATE_HZ: float = 4.0  # Upper bound on frames/sec per client (conflated)
+    WS_MAX_INSTRUMENTS: int = 500  # Per client
+    WS_SIGNAL_BACKLOG: int = 100  # Unsent signals kept per client
+
+    # Candle History API
+    CANDLE_CACHE_SIZE: int = 512  # Cached (symbol, timeframe, window) entries
+    CANDLE_CACHE_MAX_ROWS: int = 5000  # Larger windows bypass the cache
+    CANDLE_STREAM_CHUNK_ROWS: int = 5000  # Cursor fetch size when streaming
+
+    # Parquet Archive
+    ARCHIVE_DIR: str = "archive"
+    ARCHIVE_COMPRESSION: str = "zstd"
+    ARCHIVE_FLUSH_ROWS: int = 200000  # Tick rows buffered before a part file is written
+    ARCHIVE_FLUSH_SECONDS: int = 60
 
     class Config:
         env_file = ".env"
@@ -1,73 +1,98 @@
+import asyncio
 import asyncpg
 from app.core.config import settings
+from app.core.migrations import MIGRATIONS
+
+_pool = None
+_pool_lock = asyncio.Lock()
+
+def connection_params():
+    """
+    asyncpg connection arguments from settings.
+    """
+    return {
+        "user": settings.POSTGRES_USER,
+        "password": settings.POSTGRES_PASSWORD,
+        "database": settings.POSTGRES_DB,
+        "host": settings.POSTGRES_HOST,
+        "port": settings.POSTGRES_PORT,
+    }
+
+async def get_pool():
+    """
+    Returns the process-wide asyncpg pool, creating it on first use.
+    """
+    global _pool
+    async with _pool_lock:
+        if _pool is None:
+            _pool = await asyncpg.create_pool(**connection_params())
+            print("DEBUG: Shared DB pool created.")
+    return _pool
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+async def timescale_available(conn):
+    """
+    Enables TimescaleDB if possible and reports whether it is installed.
+    """
+    try:
+        await conn.execute("CREATE EXTENSION IF NOT EXISTS timescaledb;")
+    except Exception as e:
+        print(f"WARNING: Could not enable TimescaleDB extension: {e}")
+    installed = await conn.fetchval("SELECT count(*) FROM pg_extension WHERE extname = 'timescaledb';")
+    return installed > 0
 
 async def init_db():
     """
     Initializes the database schema.
-    Drops and recreates the market_candles table.
+    Applies pending migrations from app/core/migrations.py in order and
+    records them in schema_migrations. Safe to run on every start: existing
+    data is never dropped.
     """
     print("DEBUG: Initializing Database...")
-    
-    conn = await asyncpg.connect(
-        user=settings.POSTGRES_USER,
-        password=settings.POSTGRES_PASSWORD,
-        database=settings.POSTGRES_DB,
-        host=settings.POSTGRES_HOST,
-        port=settings.POSTGRES_PORT
-    )
-    
+
+    conn = await asyncpg.connect(**connection_params())
+
     try:
-        # 1. Drop Table if Exists (Dev Mode)
-        await conn.execute("DROP TABLE IF EXISTS market_candles;")
-        
-        # 2. Create Table
-        # Note: We use double precision for prices and bigint for quantities
-        create_table_query = """
-        CREATE TABLE market_candles (
-            timestamp TIMESTAMPTZ NOT NULL,
-            symbol TEXT NOT NULL,
-            
-            -- OHLCV
-            open DOUBLE PRECISION,
-            high DOUBLE PRECISION,
-            low DOUBLE PRECISION,
-            close DOUBLE PRECISION,
-            volume BIGINT,
-            
-            -- Pressure
-            open_interest BIGINT,
-            total_buy_qty BIGINT,
-            total_sell_qty BIGINT,
-            
-            -- Greeks
-            iv DOUBLE PRECISION,
-            delta DOUBLE PRECISION,
-            theta DOUBLE PRECISION,
-            gamma DOUBLE PRECISION,
-            vega DOUBLE PRECISION,
-            
-            -- Wall Detection (Smart Features)
-            best_bid DOUBLE PRECISION,
-            best_ask DOUBLE PRECISION,
-            max_buy_wall_price DOUBLE PRECISION,
-            max_buy_wall_qty BIGINT,
-            max_sell_wall_price DOUBLE PRECISION,
-            max_sell_wall_qty BIGINT,
-            
-            PRIMARY KEY (timestamp, symbol)
+        await conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
         );
-        """
-        await conn.execute(create_table_query)
-        print("DEBUG: Table 'market_candles' created.")
-        
-        # 3. Create Hypertable
-        # This requires TimescaleDB extension to be enabled
-        try:
-            await conn.execute("SELECT create_hypertable('market_candles', 'timestamp', if_not_exists => TRUE);")
-            print("DEBUG: Hypertable created.")
-        except Exception as e:
-            print(f"WARNING: Failed to create hypertable (TimescaleDB might not be installed/enabled): {e}")
-            
+        """)
+        applied = {row["version"] for row in await conn.fetch("SELECT version FROM schema_migrations;")}
+        has_timescale = await timescale_available(conn)
+
+        for version, name, statements, options in MIGRATIONS:
+            if version in applied:
+                continue
+
+            if options.get("requires_timescale") and not has_timescale:
+                print(f"WARNING: Skipping migration {version} ({name}): TimescaleDB not installed.")
+                continue
+
+            if options.get("transactional", True):
+                async with conn.transaction():
+                    for statement in statements:
+                        await conn.execute(statement)
+                    await conn.execute(
+                        "INSERT INTO schema_migrations (version, name) VALUES ($1, $2);", version, name
+                    )
+            else:
+                # Statements must be idempotent: a failure midway is retried on the next start
+                for statement in statements:
+                    await conn.execute(statement)
+                await conn.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES ($1, $2);", version, name
+                )
+
+            print(f"DEBUG: Applied migration {version} ({name}).")
+
     except Exception as e:
         print(f"ERROR: Database initialization failed: {e}")
         raise e
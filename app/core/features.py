@@ -0,0 +1,137 @@
+from datetime import datetime
+import numpy as np
+from app.core.config import settings
+
+# Bump FEATURE_VERSION whenever a definition below changes or a feature is
+# added; stored rows keep the version they were computed with.
+FEATURE_VERSION = 1
+FEATURE_NAMES = (
+    "oi_delta",  # Change in open interest since the previous candle
+    "oi_delta_pct",
+    "pressure_ratio",  # total_buy_qty / (total_buy_qty + total_sell_qty), 0.5 = balanced
+    "flow_imbalance",  # (buy_volume - sell_volume) / traded volume, from aggressor flow
+    "sell_wall_distance",  # (max_sell_wall_price - close) / close, 0 without a wall
+    "buy_wall_distance",  # (close - max_buy_wall_price) / close, 0 without a wall
+    "wall_break",  # 1 if close is above the sell wall
+    "spread",
+    "spread_pct",
+    "delta_bucket",  # 0 = OTM (|delta| < 0.4), 1 = ATM/near (0.4-0.6), 2 = ITM
+    "vwap_gap",  # close - (high + low + close) / 3
+)
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
+
+def compute_features(candle, prev=None):
+    """
+    Feature vector (FEATURE_NAMES order) of one candle in CANDLE_FIELDS form.
+    `prev` is the symbol's previous candle of the same timeframe, if any.
+    Missing fields count as 0, so partial (intrabar) candles work too.
+    """
+    close = candle.get("close", 0)
+    oi = candle.get("open_interest", 0)
+    prev_oi = prev.get("open_interest", 0) if prev else 0
+    oi_delta = oi - prev_oi if prev else 0
+    buy_qty, sell_qty = candle.get("total_buy_qty", 0), candle.get("total_sell_qty", 0)
+    buy_volume, sell_volume = candle.get("buy_volume", 0), candle.get("sell_volume", 0)
+    sell_wall, buy_wall = candle.get("max_sell_wall_price", 0), candle.get("max_buy_wall_price", 0)
+    bid, ask = candle.get("best_bid", 0), candle.get("best_ask", 0)
+    spread = ask - bid if bid > 0 and ask > 0 else 0
+    delta = abs(candle.get("delta", 0))
+
+    return [
+        float(oi_delta),
+        oi_delta / prev_oi if prev_oi else 0.0,
+        buy_qty / (buy_qty + sell_qty) if buy_qty + sell_qty else 0.5,
+        (buy_volume - sell_volume) / (buy_volume + sell_volume) if buy_volume + sell_volume else 0.0,
+        (sell_wall - close) / close if sell_wall > 0 and close else 0.0,
+        (close - buy_wall) / close if buy_wall > 0 and close else 0.0,
+        1.0 if 0 < sell_wall < close else 0.0,
+        float(spread),
+        spread / close if close else 0.0,
+        2.0 if delta > 0.6 else 1.0 if delta >= 0.4 else 0.0,
+        close - (candle.get("high", close) + candle.get("low", close) + close) / 3,
+    ]
+
+
+def feature_dict(values):
+    return dict(zip(FEATURE_NAMES, values))
+
+
+class FeatureRing:
+    """
+    Last `size` feature vectors per symbol, in preallocated numpy rings, for
+    strategies that look back over several candles without a DB round trip.
+    """
+
+    def __init__(self, size=None):
+        self.size = size or settings.FEATURE_RING_SIZE
+        self.rings = {}  # {symbol: [timestamps, values, rows written]}
+
+    def push(self, symbol, timestamp, values):
+        ring = self.rings.get(symbol)
+        if ring is None:
+            ring = self.rings[symbol] = [
+                np.zeros(self.size, dtype=np.int64), np.zeros((self.size, len(FEATURE_NAMES))), 0
+            ]
+        slot = ring[2] % self.size
+        ring[0][slot] = timestamp
+        ring[1][slot] = values
+        ring[2] += 1
+
+    def window(self, symbol, count=None):
+        """(timestamps, [rows, features]) of the last `count` candles, oldest first."""
+        ring = self.rings.get(symbol)
+        if ring is None:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, len(FEATURE_NAMES)))
+        available = min(ring[2], self.size)
+        count = available if count is None else min(count, available)
+        positions = np.arange(ring[2] - count, ring[2]) % self.size
+        return ring[0][positions], ring[1][positions]
+
+    def latest(self, symbol):
+        timestamps, values = self.window(symbol, 1)
+        return feature_dict(values[0].tolist()) if len(timestamps) else None
+
+
+FEATURE_QUERY = f"""
+INSERT INTO market_candle_features (timestamp, symbol, version, {", ".join(FEATURE_NAMES)})
+VALUES ($1, $2, $3, {", ".join(f"${i + 4}" for i in range(len(FEATURE_NAMES)))})
+ON CONFLICT (timestamp, symbol, version) DO NOTHING;
+"""
+
+
+def feature_rows(records):
+    """market_candle_features rows for candle records [(symbol, record)] that carry features."""
+    return [
+        (datetime.fromtimestamp(r["timestamp"]), symbol, FEATURE_VERSION, *r["features"])
+        for symbol, r in records if r.get("features")
+    ]
+
+
+async def load_features(symbols, start, end=None, version=FEATURE_VERSION):
+    """
+    Stored feature vectors for backtests, exactly as live strategies saw them.
+    Returns {symbol: (timestamps, [rows, features])}; start/end are epoch seconds.
+    """
+    from app.core.database import get_pool
+
+    query = f"""
+    SELECT symbol, extract(epoch FROM timestamp)::bigint AS timestamp, {", ".join(FEATURE_NAMES)}
+    FROM market_candle_features
+    WHERE symbol = ANY($1) AND version = $2 AND timestamp >= $3 AND ($4::timestamptz IS NULL OR timestamp < $4)
+    ORDER BY symbol, timestamp
+    """
+    pool = await get_pool()
+    records = await pool.fetch(
+        query, list(symbols), version,
+        datetime.fromtimestamp(start), datetime.fromtimestamp(end) if end is not None else None
+    )
+
+    grouped = {}
+    for record in records:
+        grouped.setdefault(record["symbol"], []).append(tuple(record)[1:])
+    result = {}
+    for symbol, rows in grouped.items():
+        block = np.array(rows, dtype=np.float64)
+        result[symbol] = (block[:, 0].astype(np.int64), block[:, 1:])
+    return result
@@ -0,0 +1,124 @@
+import numpy as np
+
+# Black-Scholes pricing, implied volatility and Greeks, vectorized over arrays
+# of options. Conventions match the broker feed: IV in percent, theta per
+# calendar day, vega per 1 vol point.
+
+SECONDS_PER_YEAR = 365.0 * 86400
+IV_MIN = 1e-4
+IV_MAX = 5.0
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * x * x) / np.sqrt(2 * np.pi)
+
+
+def norm_cdf(x):
+    """
+    Standard normal CDF from a Chebyshev erfc approximation (Numerical
+    Recipes erfcc). Its error is relative (< 1.2e-7), so far tails, and with
+    them cheap OTM premiums, stay accurate. Avoids a SciPy dependency.
+    """
+    z = np.abs(x) / np.sqrt(2)
+    t = 1.0 / (1.0 + 0.5 * z)
+    erfc = t * np.exp(
+        -z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (-0.18628806
+        + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (-0.82215223 + t * 0.17087277))))))))
+    )
+    # erfc(z) is the tail beyond |x|
+    return np.where(x >= 0, 1.0 - 0.5 * erfc, 0.5 * erfc)
+
+
+def _d1_d2(spot, strike, t, rate, sigma):
+    sqrt_t = np.sqrt(t)
+    d1 = (np.log(spot / strike) + (rate + 0.5 * sigma * sigma) * t) / (sigma * sqrt_t)
+    return d1, d1 - sigma * sqrt_t
+
+
+def bs_price(spot, strike, t, rate, sigma, is_call):
+    d1, d2 = _d1_d2(spot, strike, t, rate, sigma)
+    discount = np.exp(-rate * t)
+    call = spot * norm_cdf(d1) - strike * discount * norm_cdf(d2)
+    put = strike * discount * norm_cdf(-d2) - spot * norm_cdf(-d1)
+    return np.where(is_call, call, put)
+
+
+def bs_vega_raw(spot, strike, t, rate, sigma):
+    """dPrice/dSigma (per 1.0 of volatility)."""
+    d1, _ = _d1_d2(spot, strike, t, rate, sigma)
+    return spot * norm_pdf(d1) * np.sqrt(t)
+
+
+def implied_vol(price, spot, strike, t, rate, is_call, tol=1e-6, max_iter=50):
+    """
+    Vectorized IV solver: Newton steps safeguarded by a shrinking bisection
+    bracket, so every lane converges even where vega is tiny (deep ITM/OTM).
+    ITM options are solved as their OTM counterpart via put-call parity, where
+    the premium is pure time value.
+    Returns sigma as a fraction; NaN where no solution exists (price outside
+    no-arbitrage bounds, expired, non-positive inputs).
+    """
+    price, spot, strike, t = np.broadcast_arrays(
+        np.asarray(price, dtype=float), np.asarray(spot, dtype=float),
+        np.asarray(strike, dtype=float), np.asarray(t, dtype=float)
+    )
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), price.shape)
+
+    discount = np.exp(-rate * np.maximum(t, 0))
+    intrinsic = np.where(is_call, np.maximum(spot - strike * discount, 0), np.maximum(strike * discount - spot, 0))
+    upper_bound = np.where(is_call, spot, strike * discount)
+    valid = (price > 0) & (spot > 0) & (strike > 0) & (t > 0) & (price > intrinsic) & (price < upper_bound)
+
+    # Put-call parity: C - P = S - K*e^(-rT)
+    forward_gap = spot - strike * discount
+    itm = np.where(is_call, forward_gap > 0, forward_gap < 0)
+    price = np.where(itm, np.where(is_call, price - forward_gap, price + forward_gap), price)
+    is_call = np.where(itm, ~is_call, is_call)
+
+    # Inactive lanes get harmless inputs and are masked out at the end
+    safe_t = np.where(valid, t, 1.0)
+    low = np.full(price.shape, IV_MIN)
+    high = np.full(price.shape, IV_MAX)
+    # Brenner-Subrahmanyam starting guess
+    sigma = np.clip(np.sqrt(2 * np.pi / safe_t) * price / np.where(spot > 0, spot, 1.0), 0.05, 2.0)
+    active = valid.copy()
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        diff = bs_price(spot, strike, safe_t, rate, sigma, is_call) - price
+        vega = bs_vega_raw(spot, strike, safe_t, rate, sigma)
+
+        # Price is increasing in sigma: shrink the bracket around the root
+        high = np.where(active & (diff > 0), sigma, high)
+        low = np.where(active & (diff <= 0), sigma, low)
+
+        newton = sigma - diff / np.where(vega > 1e-12, vega, np.nan)
+        use_newton = np.isfinite(newton) & (newton > low) & (newton < high)
+        next_sigma = np.where(use_newton, newton, 0.5 * (low + high))
+
+        converged = active & ((np.abs(diff) < tol) | (np.abs(next_sigma - sigma) < tol * 1e-2))
+        sigma = np.where(active & ~converged, next_sigma, sigma)
+        active &= ~converged
+
+    return np.where(valid, sigma, np.nan)
+
+
+def bs_greeks(spot, strike, t, rate, sigma, is_call):
+    """
+    Returns (delta, gamma, theta_per_day, vega_per_vol_point).
+    """
+    d1, d2 = _d1_d2(spot, strike, t, rate, sigma)
+    sqrt_t = np.sqrt(t)
+    pdf_d1 = norm_pdf(d1)
+    discount = np.exp(-rate * t)
+
+    delta = np.where(is_call, norm_cdf(d1), norm_cdf(d1) - 1.0)
+    gamma = pdf_d1 / (spot * sigma * sqrt_t)
+    decay = -spot * pdf_d1 * sigma / (2 * sqrt_t)
+    theta_call = decay - rate * strike * discount * norm_cdf(d2)
+    theta_put = decay + rate * strike * discount * norm_cdf(-d2)
+    theta = np.where(is_call, theta_call, theta_put) / 365.0
+    vega = spot * pdf_d1 * sqrt_t / 100.0
+
+    return delta, gamma, theta, vega
@@ -0,0 +1,161 @@
+import asyncio
+import importlib.util
+import random
+import time
+from collections import deque
+import httpx
+from app.core.config import settings
+
+UPSTOX_API_URL = "https://api.upstox.com"
+
+# Safe to resend after any failure; other methods only when the request never left
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "DELETE"}
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class RateLimiter:
+    """
+    Sliding-window limiter for Upstox's per-second and per-minute quotas.
+    Callers wait (asynchronously) for a free slot instead of getting 429s.
+    """
+
+    def __init__(self, per_second, per_minute, clock=time.monotonic):
+        self.windows = [(1.0, per_second, deque()), (60.0, per_minute, deque())]
+        self.clock = clock
+        self.lock = asyncio.Lock()
+        self.waited = 0.0
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = self.clock()
+                delay = 0.0
+                for span, limit, stamps in self.windows:
+                    while stamps and stamps[0] <= now - span:
+                        stamps.popleft()
+                    if limit and len(stamps) >= limit:
+                        delay = max(delay, stamps[0] + span - now)
+                if delay <= 0:
+                    for _, _, stamps in self.windows:
+                        stamps.append(now)
+                    return
+                self.waited += delay
+                await asyncio.sleep(delay)
+
+
+class UpstoxClient:
+    """
+    Process-wide Upstox REST client: one keep-alive connection pool (HTTP/2
+    through httpx[http2], unless UPSTOX_HTTP2 is off), client-side rate limiting,
+    retries with exponential backoff and per-endpoint timing metrics.
+    """
+
+    def __init__(self, base_url=None, per_second=None, per_minute=None, transport=None):
+        self.base_url = base_url or UPSTOX_API_URL
+        self.limiter = RateLimiter(
+            settings.UPSTOX_RATE_PER_SECOND if per_second is None else per_second,
+            settings.UPSTOX_RATE_PER_MINUTE if per_minute is None else per_minute,
+        )
+        self.transport = transport
+        self.client = None
+        self.loop = None
+        self.metrics = {}  # {"METHOD /path": {...}}
+
+    async def start(self):
+        """Creates the pool (again, if the event loop changed)."""
+        loop = asyncio.get_running_loop()
+        if self.client and self.loop is loop:
+            return
+        if self.client:
+            # Pool of a previous event loop: release its connections first
+            try:
+                await self.client.aclose()
+            except Exception as e:
+                print(f"DEBUG: Closing the previous HTTP pool failed: {e}")
+        http2 = settings.UPSTOX_HTTP2 and importlib.util.find_spec("h2") is not None
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=http2,
+            headers={"Accept": "application/json"},
+            limits=httpx.Limits(
+                max_connections=settings.UPSTOX_POOL_SIZE,
+                max_keepalive_connections=settings.UPSTOX_POOL_SIZE,
+                keepalive_expiry=300,
+            ),
+            timeout=settings.UPSTOX_TIMEOUT,
+            transport=self.transport,
+        )
+        self.limiter.lock = asyncio.Lock()
+        self.loop = loop
+
+    async def close(self):
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    async def request(self, method, path, token=None, headers=None, **kwargs):
+        """
+        Sends one request with rate limiting and retries (429, 5xx and
+        connection failures). Non-idempotent requests are only retried when
+        they provably never reached the server, or on 429.
+        """
+        await self.start()
+        method = method.upper()
+        headers = dict(headers or {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+
+        metric = self.metrics.setdefault(f"{method} {path}", {
+            "count": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0,
+        })
+        retries = settings.UPSTOX_MAX_RETRIES
+        for attempt in range(retries + 1):
+            await self.limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = await self.client.request(method, path, headers=headers, **kwargs)
+                error = None
+            except httpx.TransportError as e:
+                response, error = None, e
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            metric["count"] += 1
+            metric["total_ms"] += elapsed_ms
+            metric["max_ms"] = max(metric["max_ms"], elapsed_ms)
+
+            if error is not None:
+                retryable = method in IDEMPOTENT_METHODS or isinstance(error, NOT_SENT_ERRORS)
+            else:
+                status = response.status_code
+                retryable = status == 429 or (status >= 500 and method in IDEMPOTENT_METHODS)
+                if not retryable:
+                    return response
+
+            metric["errors"] += 1
+            if not retryable or attempt == retries:
+                if error is not None:
+                    raise error
+                return response
+
+            metric["retries"] += 1
+            delay = settings.UPSTOX_BACKOFF_SECONDS * (2 ** attempt) * (1 + random.random() * 0.2)
+            if response is not None and response.headers.get("Retry-After", "").isdigit():
+                delay = max(delay, float(response.headers["Retry-After"]))
+            await asyncio.sleep(delay)
+
+    async def get(self, path, **kwargs):
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path, **kwargs):
+        return await self.request("POST", path, **kwargs)
+
+    def stats(self):
+        return {
+            "rate_limit_wait_seconds": self.limiter.waited,
+            "endpoints": {
+                name: dict(metric, avg_ms=metric["total_ms"] / metric["count"] if metric["count"] else 0.0)
+                for name, metric in self.metrics.items()
+            },
+        }
+
+
+upstox_client = UpstoxClient()
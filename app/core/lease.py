@@ -0,0 +1,86 @@
+import os
+import socket
+import time
+import uuid
+import redis
+from app.core.config import settings
+from app.core.redis_client import redis_client
+
+
+class RedisLease:
+    """
+    Single-owner lease on a Redis key (SET NX PX), for leader election.
+
+    The holder renews well inside the TTL; if it dies the key expires and
+    the next contender's acquire() wins, so failover takes at most one TTL.
+    Renew and release only touch the key while it still holds our owner id
+    (WATCH/MULTI), so a holder that stalled past its TTL can never extend
+    or delete a lease that has since moved to another process. Each
+    acquisition increments `{key}:epoch`, a fencing token for the new term.
+
+    Leader-only writes are fenced two ways: low-rate ones go through
+    if_owner(), which also checks the epoch; per-message ones check valid(),
+    a local deadline one TTL after the last successful acquire or renew
+    (no other process can hold the lease before it expires).
+    """
+
+    def __init__(self, name, ttl_ms=None, owner=None, client=None):
+        self.redis = client or redis_client
+        self.key = f"LEASE:{name}"
+        self.ttl_ms = ttl_ms or settings.LEADER_LEASE_TTL_MS
+        self.owner = owner or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.held = False
+        self.epoch = None
+        self.valid_until = 0.0  # Monotonic deadline of the current term
+
+    def acquire(self):
+        started = time.monotonic()
+        if self.redis.set(self.key, self.owner, nx=True, px=self.ttl_ms):
+            self.held = True
+            self.epoch = self.redis.incr(f"{self.key}:epoch")
+            self.valid_until = started + self.ttl_ms / 1000
+        return self.held
+
+    def valid(self):
+        """Whether we still hold the lease, without a round trip."""
+        return self.held and time.monotonic() < self.valid_until
+
+    def if_owner(self, action):
+        """
+        Runs action(pipe) in a transaction only while we still own the key
+        in the epoch we acquired it with.
+        """
+        epoch_key = f"{self.key}:epoch"
+        with self.redis.pipeline() as pipe:
+            try:
+                pipe.watch(self.key, epoch_key)
+                owner, epoch = pipe.mget([self.key, epoch_key])
+                if owner != self.owner or epoch is None or int(epoch) != self.epoch:
+                    pipe.unwatch()
+                    return False
+                pipe.multi()
+                action(pipe)
+                pipe.execute()
+                return True
+            except redis.WatchError:
+                return False
+
+    def renew(self):
+        started = time.monotonic()
+        self.held = self.if_owner(lambda pipe: pipe.pexpire(self.key, self.ttl_ms))
+        if self.held:
+            self.valid_until = started + self.ttl_ms / 1000
+        return self.held
+
+    def release(self):
+        if self.held:
+            self.if_owner(lambda pipe: pipe.delete(self.key))
+        self.held = False
+        self.valid_until = 0.0
+
+    def keep(self):
+        """Renews if held, otherwise tries to take over. Returns whether we hold it."""
+        return self.renew() if self.held else self.acquire()
+
+    def holder(self):
+        return self.redis.get(self.key)
@@ -0,0 +1,203 @@
+from app.core.config import settings
+
+# Ordered schema migrations, applied once each by init_db and recorded in
+# schema_migrations. Never edit an applied migration; append a new one.
+#
+# Each entry: (version, name, statements, options)
+#   transactional:     run all statements in one transaction (default True).
+#                      Continuous aggregates cannot be created inside one.
+#   requires_timescale: skipped (and retried next start) without TimescaleDB.
+
+CONTINUOUS_AGGREGATES = {
+    # view name: time_bucket arguments
+    "market_candles_5m": "INTERVAL '5 minutes', timestamp",
+    "market_candles_15m": "INTERVAL '15 minutes', timestamp",
+    # Daily bars start at IST midnight, not UTC midnight
+    "market_candles_1d": "INTERVAL '1 day', timestamp, 'Asia/Kolkata'",
+}
+
+
+def continuous_aggregate_sql(view, bucket_args):
+    # OHLC from first/last, VTT is cumulative so the bucket volume is its max,
+    # and snapshot fields (OI, depth, Greeks) take the last value in the bucket.
+    return f"""
+    CREATE MATERIALIZED VIEW IF NOT EXISTS {view}
+    WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+    SELECT
+        time_bucket({bucket_args}) AS timestamp,
+        symbol,
+        first(open, timestamp) AS open,
+        max(high) AS high,
+        min(low) AS low,
+        last(close, timestamp) AS close,
+        max(volume) AS volume,
+        last(open_interest, timestamp) AS open_interest,
+        last(total_buy_qty, timestamp) AS total_buy_qty,
+        last(total_sell_qty, timestamp) AS total_sell_qty,
+        last(iv, timestamp) AS iv,
+        last(delta, timestamp) AS delta,
+        last(theta, timestamp) AS theta,
+        last(gamma, timestamp) AS gamma,
+        last(vega, timestamp) AS vega,
+        last(best_bid, timestamp) AS best_bid,
+        last(best_ask, timestamp) AS best_ask,
+        last(max_buy_wall_price, timestamp) AS max_buy_wall_price,
+        last(max_buy_wall_qty, timestamp) AS max_buy_wall_qty,
+        last(max_sell_wall_price, timestamp) AS max_sell_wall_price,
+        last(max_sell_wall_qty, timestamp) AS max_sell_wall_qty
+    FROM market_candles
+    GROUP BY time_bucket({bucket_args}), symbol
+    WITH NO DATA;
+    """
+
+
+MIGRATIONS = [
+    (1, "create_market_candles", [
+        """
+        CREATE TABLE IF NOT EXISTS market_candles (
+            timestamp TIMESTAMPTZ NOT NULL,
+            symbol TEXT NOT NULL,
+            
+            -- OHLCV
+            open DOUBLE PRECISION,
+            high DOUBLE PRECISION,
+            low DOUBLE PRECISION,
+            close DOUBLE PRECISION,
+            volume BIGINT,
+            
+            -- Pressure
+            open_interest BIGINT,
+            total_buy_qty BIGINT,
+            total_sell_qty BIGINT,
+            
+            -- Greeks
+            iv DOUBLE PRECISION,
+            delta DOUBLE PRECISION,
+            theta DOUBLE PRECISION,
+            gamma DOUBLE PRECISION,
+            vega DOUBLE PRECISION,
+            
+            -- Wall Detection (Smart Features)
+            best_bid DOUBLE PRECISION,
+            best_ask DOUBLE PRECISION,
+            max_buy_wall_price DOUBLE PRECISION,
+            max_buy_wall_qty BIGINT,
+            max_sell_wall_price DOUBLE PRECISION,
+            max_sell_wall_qty BIGINT,
+            
+            PRIMARY KEY (timestamp, symbol)
+        );
+        """
+    ], {}),
+
+    (2, "market_candles_hypertable", [
+        "SELECT create_hypertable('market_candles', 'timestamp', if_not_exists => TRUE, migrate_data => TRUE);"
+    ], {"requires_timescale": True}),
+
+    (3, "market_candles_symbol_time_index", [
+        # Per-symbol range scans (charts, backtests) without touching other symbols
+        "CREATE INDEX IF NOT EXISTS market_candles_symbol_ts_idx ON market_candles (symbol, timestamp DESC);"
+    ], {}),
+
+    (4, "market_candles_continuous_aggregates", [
+        continuous_aggregate_sql(view, bucket_args) for view, bucket_args in CONTINUOUS_AGGREGATES.items()
+    ] + [
+        f"""
+        SELECT add_continuous_aggregate_policy('{view}',
+            start_offset => INTERVAL '3 days',
+            end_offset => INTERVAL '1 minute',
+            schedule_interval => INTERVAL '{interval}',
+            if_not_exists => TRUE);
+        """
+        for view, interval in (
+            ("market_candles_5m", "1 minute"),
+            ("market_candles_15m", "5 minutes"),
+            ("market_candles_1d", "1 hour"),
+        )
+    ], {"transactional": False, "requires_timescale": True}),
+
+    (5, "market_candles_compression", [
+        """
+        ALTER TABLE market_candles SET (
+            timescaledb.compress,
+            timescaledb.compress_segmentby = 'symbol',
+            timescaledb.compress_orderby = 'timestamp DESC'
+        );
+        """,
+        f"SELECT add_compression_policy('market_candles', INTERVAL '{settings.CANDLE_COMPRESS_AFTER_DAYS} days', if_not_exists => TRUE);"
+    ], {"requires_timescale": True}),
+
+    (6, "market_candles_retention", [
+        f"SELECT add_retention_policy('market_candles', INTERVAL '{settings.CANDLE_RETENTION_DAYS} days', if_not_exists => TRUE);",
+        f"SELECT add_retention_policy('market_candles_5m', INTERVAL '{settings.CANDLE_AGGREGATE_RETENTION_DAYS} days', if_not_exists => TRUE);",
+        f"SELECT add_retention_policy('market_candles_15m', INTERVAL '{settings.CANDLE_AGGREGATE_RETENTION_DAYS} days', if_not_exists => TRUE);",
+        # Daily bars are kept forever
+    ], {"requires_timescale": True}),
+
+    (7, "create_market_candle_flow", [
+        # Order flow per 1m candle, kept apart so market_candles and its
+        # aggregates stay narrow; prices/volumes is the volume profile
+        """
+        CREATE TABLE IF NOT EXISTS market_candle_flow (
+            timestamp TIMESTAMPTZ NOT NULL,
+            symbol TEXT NOT NULL,
+            tick_count INTEGER,
+            buy_volume BIGINT,
+            sell_volume BIGINT,
+            prices DOUBLE PRECISION[],
+            volumes BIGINT[],
+            PRIMARY KEY (timestamp, symbol)
+        );
+        """
+    ], {}),
+
+    (8, "market_candle_flow_hypertable", [
+        "SELECT create_hypertable('market_candle_flow', 'timestamp', if_not_exists => TRUE, migrate_data => TRUE);",
+        """
+        ALTER TABLE market_candle_flow SET (
+            timescaledb.compress,
+            timescaledb.compress_segmentby = 'symbol',
+            timescaledb.compress_orderby = 'timestamp DESC'
+        );
+        """,
+        f"SELECT add_compression_policy('market_candle_flow', INTERVAL '{settings.CANDLE_COMPRESS_AFTER_DAYS} days', if_not_exists => TRUE);",
+        f"SELECT add_retention_policy('market_candle_flow', INTERVAL '{settings.CANDLE_RETENTION_DAYS} days', if_not_exists => TRUE);",
+    ], {"requires_timescale": True}),
+
+    (9, "create_market_candle_features", [
+        # One row per 1m candle and feature version (app/core/features.py);
+        # a new version is written next to the old one, never over it
+        """
+        CREATE TABLE IF NOT EXISTS market_candle_features (
+            timestamp TIMESTAMPTZ NOT NULL,
+            symbol TEXT NOT NULL,
+            version SMALLINT NOT NULL,
+            oi_delta DOUBLE PRECISION,
+            oi_delta_pct DOUBLE PRECISION,
+            pressure_ratio DOUBLE PRECISION,
+            flow_imbalance DOUBLE PRECISION,
+            sell_wall_distance DOUBLE PRECISION,
+            buy_wall_distance DOUBLE PRECISION,
+            wall_break DOUBLE PRECISION,
+            spread DOUBLE PRECISION,
+            spread_pct DOUBLE PRECISION,
+            delta_bucket DOUBLE PRECISION,
+            vwap_gap DOUBLE PRECISION,
+            PRIMARY KEY (timestamp, symbol, version)
+        );
+        """
+    ], {}),
+
+    (10, "market_candle_features_hypertable", [
+        "SELECT create_hypertable('market_candle_features', 'timestamp', if_not_exists => TRUE, migrate_data => TRUE);",
+        """
+        ALTER TABLE market_candle_features SET (
+            timescaledb.compress,
+            timescaledb.compress_segmentby = 'symbol, version',
+            timescaledb.compress_orderby = 'timestamp DESC'
+        );
+        """,
+        f"SELECT add_compression_policy('market_candle_features', INTERVAL '{settings.CANDLE_COMPRESS_AFTER_DAYS} days', if_not_exists => TRUE);",
+        f"SELECT add_retention_policy('market_candle_features', INTERVAL '{settings.CANDLE_RETENTION_DAYS} days', if_not_exists => TRUE);",
+    ], {"requires_timescale": True}),
+]
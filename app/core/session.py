@@ -0,0 +1,135 @@
+import json
+import time
+from datetime import datetime
+import pytz
+from app.core.config import settings
+from app.core.redis_client import redis_client
+
+IST = pytz.timezone("Asia/Kolkata")
+
+# Session phases
+PRE_OPEN = "PRE_OPEN"
+OPEN = "OPEN"
+CLOSING = "CLOSING"  # After the normal close: closing session, last candles
+CLOSED = "CLOSED"  # Outside market hours, weekends and holidays
+
+ACTIVE_PHASES = (PRE_OPEN, OPEN, CLOSING)
+
+# MarketInfo.segmentStatus (Upstox v3) -> phase
+FEED_STATUS_PHASES = {
+    "PRE_OPEN_START": PRE_OPEN,
+    "PRE_OPEN_END": PRE_OPEN,
+    "NORMAL_OPEN": OPEN,
+    "NORMAL_CLOSE": CLOSING,
+    "CLOSING_START": CLOSING,
+    "CLOSING_END": CLOSED,
+}
+
+MARKET_STATUS_KEY = "MARKET_STATUS"
+
+
+def session_time(value):
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def is_trading_day(day):
+    return day.weekday() < 5 and day.isoformat() not in settings.MARKET_HOLIDAYS
+
+
+def calendar_phase(now=None):
+    """Phase from the local exchange calendar (IST session times, weekends, MARKET_HOLIDAYS)."""
+    local = datetime.fromtimestamp(now if now is not None else time.time(), IST)
+    if not is_trading_day(local.date()):
+        return CLOSED
+    minute = local.hour * 60 + local.minute
+    if minute < session_time(settings.SESSION_PRE_OPEN):
+        return CLOSED
+    if minute < session_time(settings.SESSION_OPEN):
+        return PRE_OPEN
+    if minute < session_time(settings.SESSION_CLOSE):
+        return OPEN
+    if minute < session_time(settings.SESSION_CLOSING_END):
+        return CLOSING
+    return CLOSED
+
+
+def closing_end_ms(now):
+    local = datetime.fromtimestamp(now, IST)
+    minutes = session_time(settings.SESSION_CLOSING_END)
+    end = local.replace(hour=minutes // 60, minute=minutes % 60, second=0, microsecond=0)
+    return int(end.timestamp() * 1000)
+
+
+def trading_day(now=None):
+    return datetime.fromtimestamp(now if now is not None else time.time(), IST).date()
+
+
+class MarketSession:
+    """
+    Where the market is in its day, shared by every process.
+
+    The feed's MarketInfo.segmentStatus is authoritative: the feed leader
+    records it in MARKET_STATUS and every process reads it from there (cached
+    for SESSION_CACHE_SECONDS). Without a status from today's feed (feed not
+    running, message not yet received) the local calendar decides; an
+    active status that predates the calendar's closing end (the feed
+    dropped mid-session) is ignored once the calendar says CLOSED.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.cached = None
+        self.cached_at = 0.0
+
+    def record_feed_status(self, segments):
+        """Stores {segment: MarketStatus name} from a FeedResponse.marketInfo."""
+        redis_client.set(MARKET_STATUS_KEY, json.dumps({
+            "day": trading_day(self.clock()).isoformat(),
+            "ts": int(self.clock() * 1000),
+            "segments": segments,
+        }))
+        self.cached_at = 0.0
+        print(f"DEBUG: Market status from feed: {segments}")
+
+    def feed_status(self):
+        now = self.clock()
+        if self.cached_at and now - self.cached_at < settings.SESSION_CACHE_SECONDS:
+            return self.cached
+        try:
+            raw = redis_client.get(MARKET_STATUS_KEY)
+            status = json.loads(raw) if raw else None
+        except Exception as e:
+            print(f"WARNING: Market status unavailable, using the calendar: {e}")
+            status = None
+        if status and status["day"] != trading_day(now).isoformat():
+            status = None
+        self.cached, self.cached_at = status, now
+        return status
+
+    def phase(self):
+        now = self.clock()
+        calendar = calendar_phase(now)
+        status = self.feed_status()
+        feed_phase = FEED_STATUS_PHASES.get(status["segments"].get(settings.SESSION_SEGMENT)) if status else None
+        if feed_phase in ACTIVE_PHASES and calendar == CLOSED and status["ts"] < closing_end_ms(now):
+            # Feed went away mid-session: an "open" status from before the
+            # closing end must not keep the session open overnight
+            return calendar
+        return feed_phase or calendar
+
+    def is_active(self):
+        return self.phase() in ACTIVE_PHASES
+
+    def info(self):
+        now = self.clock()
+        status = self.feed_status()
+        return {
+            "phase": self.phase(),
+            "calendar_phase": calendar_phase(now),
+            "trading_day": is_trading_day(trading_day(now)),
+            "feed_status": status,
+        }
+
+
+market_session = MarketSession()
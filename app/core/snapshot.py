@@ -0,0 +1,153 @@
+import os
+import pickle
+import struct
+import time
+import zlib
+from app.core.config import settings
+
+MAGIC = b"SBSNAP1\n"
+RECORD = struct.Struct("<III")  # payload length, crc32, generation
+
+
+class SnapshotStore:
+    """
+    Crash-safe process state on local disk.
+
+    State is a dict of sections, each a dict of {key: value}. A full
+    snapshot is written to `{name}.snap` atomically (temp file, fsync,
+    rename). Between full snapshots only changed keys are appended to
+    `{name}.journal` (None deletes a key). Records are length-prefixed and
+    checksummed, so a record torn by a crash is simply not replayed.
+
+    Each full snapshot starts a new generation and journal records carry
+    theirs: a journal left over from before the last full snapshot is
+    ignored instead of being replayed on top of newer state. The next
+    generation follows the one on disk, so a store that loaded nothing
+    (missing, stale or unreadable base) never reuses it.
+    """
+
+    def __init__(self, name, directory=None):
+        directory = directory or settings.SNAPSHOT_DIR
+        os.makedirs(directory, exist_ok=True)
+        self.base_path = os.path.join(directory, f"{name}.snap")
+        self.journal_path = os.path.join(directory, f"{name}.journal")
+        self.generation = 0
+        self.journal = None
+        self.stats = {"full": 0, "deltas": 0, "bytes": 0, "last_ms": 0.0}
+
+    def record(self, payload):
+        data = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        return RECORD.pack(len(data), zlib.crc32(data), self.generation) + data
+
+    def disk_generation(self):
+        """Generation of the base snapshot on disk, 0 if there is none."""
+        try:
+            with open(self.base_path, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    return 0
+                header = f.read(RECORD.size)
+        except OSError:
+            return 0
+        return RECORD.unpack(header)[2] if len(header) == RECORD.size else 0
+
+    def count(self, kind, size, started):
+        self.stats[kind] += 1
+        self.stats["bytes"] += size
+        self.stats["last_ms"] = (time.perf_counter() - started) * 1000
+
+    # --- Writing ---
+
+    def save(self, state):
+        """Writes a full snapshot and starts a new, empty journal."""
+        started = time.perf_counter()
+        self.generation = (max(self.generation, self.disk_generation()) + 1) & 0xFFFFFFFF
+        data = MAGIC + self.record({"saved_at": time.time(), "state": state})
+
+        tmp_path = self.base_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.base_path)
+
+        if self.journal:
+            self.journal.close()
+        self.journal = open(self.journal_path, "wb")
+        self.count("full", len(data), started)
+
+    def append(self, delta):
+        """
+        Journals changed keys {section: {key: value or None}}. Needs a base:
+        a save() or a successful load() since this store was opened.
+        """
+        if self.journal is None or not any(delta.values()):
+            return
+        started = time.perf_counter()
+        data = self.record({"saved_at": time.time(), "delta": delta})
+        # Flushed to the OS: survives a process crash; fsync is left to full snapshots
+        self.journal.write(data)
+        self.journal.flush()
+        self.count("deltas", len(data), started)
+
+    def close(self):
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+
+    # --- Reading ---
+
+    @staticmethod
+    def read_records(f):
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            length, crc, generation = RECORD.unpack(header)
+            data = f.read(length)
+            if len(data) < length or zlib.crc32(data) != crc:
+                return
+            yield generation, pickle.loads(zlib.decompress(data))
+
+    def load(self, max_age=None):
+        """
+        Returns (state, saved_at) from the last full snapshot plus its journal,
+        or (None, None) if there is none, it is unreadable or older than
+        `max_age` seconds.
+        """
+        max_age = settings.SNAPSHOT_MAX_AGE_SECONDS if max_age is None else max_age
+        try:
+            with open(self.base_path, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    return None, None
+                generation, base = next(self.read_records(f))
+        except (OSError, StopIteration, pickle.UnpicklingError, zlib.error) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"WARNING: Unreadable snapshot {self.base_path}: {e}")
+            return None, None
+
+        state, saved_at = base["state"], base["saved_at"]
+        valid_end = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "rb") as f:
+                for record_generation, entry in self.read_records(f):
+                    if record_generation != generation:
+                        break
+                    valid_end = f.tell()
+                    for section, changes in entry["delta"].items():
+                        target = state.setdefault(section, {})
+                        for key, value in changes.items():
+                            if value is None:
+                                target.pop(key, None)
+                            else:
+                                target[key] = value
+                    saved_at = entry["saved_at"]
+
+        if max_age and time.time() - saved_at > max_age:
+            print(f"DEBUG: Ignoring snapshot {self.base_path} ({time.time() - saved_at:.0f}s old).")
+            return None, None
+        # Continue the same generation; a torn or stale tail is cut off so
+        # new records directly follow the last replayed one
+        self.generation = generation
+        self.journal = open(self.journal_path, "ab")
+        self.journal.truncate(valid_end)
+        return state, saved_at
@@ -0,0 +1,121 @@
+import asyncio
+import importlib
+import json
+import time
+from app.core.config import settings
+from app.core.redis_client import redis_client
+
+FEED_INSTRUMENTS_KEY = "FEED_INSTRUMENTS"  # Written by MarketFeed, read back after a restart
+
+
+class Startup:
+    """
+    API process startup, run from the FastAPI lifespan.
+
+    The access token is read from Redis first, then heavy imports, the DB
+    pool, the Upstox HTTP pool and the contract cache are warmed
+    concurrently, and the process joins the feed leader election; the
+    winner resumes the feed with the instruments it had before the restart.
+    Every phase is timed; a failing phase is reported and skipped, it never
+    blocks the API from coming up.
+    """
+
+    def __init__(self):
+        self.timings = {}  # {phase: ms}
+        self.errors = {}  # {phase: message}
+        self.access_token = None
+        self.report = None
+
+    async def timed(self, name, coro):
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(coro, settings.STARTUP_WARM_TIMEOUT)
+        except Exception as e:
+            self.errors[name] = str(e) or type(e).__name__
+            print(f"WARNING: Startup phase '{name}' failed: {self.errors[name]}")
+        finally:
+            self.timings[name] = (time.perf_counter() - started) * 1000
+
+    # --- Phases ---
+
+    def read_redis(self):
+        self.access_token = redis_client.get("access_token")
+
+    async def preload_modules(self):
+        # Imported in a worker thread so the event loop keeps serving meanwhile
+        for module in settings.STARTUP_PRELOAD_MODULES:
+            await asyncio.to_thread(importlib.import_module, module)
+
+    async def warm_db(self):
+        from app.core.database import get_pool
+
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            await conn.fetchval("SELECT 1")
+
+    async def warm_http(self):
+        from app.core.http_client import upstox_client
+
+        await upstox_client.start()
+        if self.access_token:
+            # Opens the keep-alive connection (TCP + TLS) before the first real call
+            await upstox_client.get("/v2/user/profile", token=self.access_token)
+
+    async def warm_contracts(self):
+        from app.services.contract_manager import fetch_and_store_contracts, contract_underlyings, underlying_name
+
+        underlyings = contract_underlyings()
+        pipe = redis_client.pipeline(transaction=False)
+        for key in underlyings:
+            pipe.exists(f"CONTRACT_GRID:{underlying_name(key)}")
+        cached = await asyncio.to_thread(pipe.execute)
+        missing = [key for key, exists in zip(underlyings, cached) if not exists]
+        if missing and self.access_token:
+            await asyncio.gather(*(fetch_and_store_contracts(key) for key in missing))
+
+    # --- Lifecycle ---
+
+    async def run(self, import_ms=None):
+        started = time.perf_counter()
+        if import_ms is not None:
+            self.timings["import"] = import_ms
+
+        await self.timed("redis", asyncio.to_thread(self.read_redis))
+        await asyncio.gather(
+            self.timed("modules", self.preload_modules()),
+            self.timed("db_pool", self.warm_db()),
+            self.timed("http_pool", self.warm_http()),
+            self.timed("contracts", self.warm_contracts()),
+        )
+
+        from app.services.feed_leader import feed_leader
+
+        await self.timed("feed_leader", feed_leader.start())
+
+        self.timings["total"] = (time.perf_counter() - started) * 1000
+        self.report = {
+            "ts": time.time(),
+            "timings_ms": {name: round(ms, 2) for name, ms in self.timings.items()},
+            "errors": self.errors,
+            "authenticated": self.access_token is not None,
+            "feed_leader": feed_leader.lease.held,
+            "feed_resumed": feed_leader.market_feed is not None,
+        }
+        print(f"DEBUG: Startup finished in {self.timings['total']:.1f} ms: {self.report['timings_ms']}")
+        try:
+            redis_client.set("STARTUP_REPORT", json.dumps(self.report))
+        except Exception as e:
+            print(f"WARNING: Could not store startup report: {e}")
+        return self.report
+
+    async def shutdown(self):
+        from app.core.database import close_pool
+        from app.core.http_client import upstox_client
+        from app.services.feed_leader import feed_leader
+
+        await feed_leader.stop()
+        await upstox_client.close()
+        await close_pool()
+
+
+startup = Startup()
@@ -0,0 +1,25 @@
+import time
+from app.core.redis_client import redis_client
+
+# Conflated last-value ticks, written by the conflator (app/worker/conflator.py)
+
+
+def tick_key(symbol):
+    return f"TICK:{symbol}"
+
+
+def get_latest_ticks(symbols, max_age=None):
+    """
+    Latest conflated state per instrument: {symbol: {field: float}}.
+    Instruments never seen, or not updated within `max_age` seconds, are left out.
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    for symbol in symbols:
+        pipe.hgetall(tick_key(symbol))
+    cutoff = (time.time() - max_age) * 1000 if max_age else 0
+
+    ticks = {}
+    for symbol, values in zip(symbols, pipe.execute()):
+        if values and float(values.get("updated_ms", 0)) >= cutoff:
+            ticks[symbol] = {field: float(value) for field, value in values.items()}
+    return ticks
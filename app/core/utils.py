@@ -13,3 +13,25 @@ def convert_unix_to_ist(unix_timestamp: int) -> str:
     ist_timezone = pytz.timezone('Asia/Kolkata')
     ist_time = utc_time.astimezone(ist_timezone)
     return ist_time.strftime('%Y-%m-%d %H:%M:%S %Z')
+
+# Exchange time (IST) offset from UTC, in seconds
+EXCHANGE_UTC_OFFSET = 5 * 3600 + 30 * 60
+
+def bucket_start(unix_timestamp, seconds: int) -> int:
+    """
+    Start of the `seconds`-long bucket containing `unix_timestamp`,
+    aligned to exchange (IST) time so 1h/1d buckets start on IST boundaries.
+    """
+    return ((int(unix_timestamp) + EXCHANGE_UTC_OFFSET) // seconds) * seconds - EXCHANGE_UTC_OFFSET
+
+def require_pyarrow():
+    """
+    Imports the optional 'pyarrow' dependency (Arrow IPC, Parquet archive).
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise RuntimeError("This feature requires the optional 'pyarrow' package (install the 'arrow' extra).")
+    return pyarrow
@@ -1,26 +1,47 @@
-from fastapi import FastAPI, Request, BackgroundTasks
-from fastapi.responses import RedirectResponse
-from app.core.utils import convert_unix_to_ist
-from app.core.config import settings
-from app.services.feed_service import MarketFeed
+import json
 import time
-import httpx
+IMPORT_STARTED = time.perf_counter()
 
-app = FastAPI(title="SniperBot", version="1.0.0")
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, WebSocket
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+from app.core.utils import convert_unix_to_ist
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.core.startup import startup
 
 # Global variable to store access token (Temporary)
-from app.core.redis_client import redis_client
-ACCESS_TOKEN = redis_client.get("access_token")
-MARKET_FEED = None
+# Filled in by the startup lifespan. The feed itself is owned by whichever
+# worker holds the feed lease (app/services/feed_leader.py).
+ACCESS_TOKEN = None
+
+@asynccontextmanager
+async def lifespan(app):
+    global ACCESS_TOKEN
+    await startup.run(import_ms=(time.perf_counter() - IMPORT_STARTED) * 1000)
+    ACCESS_TOKEN = startup.access_token
+    yield
+    await startup.shutdown()
+
+app = FastAPI(title="SniperBot", version="1.0.0", lifespan=lifespan)
+
+def current_token():
+    """
+    This worker's token, or the one stored by whichever worker handled /callback.
+    """
+    global ACCESS_TOKEN
+    ACCESS_TOKEN = ACCESS_TOKEN or redis_client.get("access_token")
+    return ACCESS_TOKEN
 
 @app.get("/")
 def read_root():
     current_time = int(time.time())
+    status = redis_client.get("FEED_STATUS")
     return {
         "message": "Welcome to SniperBot",
         "server_time_ist": convert_unix_to_ist(current_time),
-        "authenticated": ACCESS_TOKEN is not None,
-        "feed_active": MARKET_FEED is not None
+        "authenticated": current_token() is not None,
+        "feed_active": bool(status and json.loads(status)["feed_active"])
     }
 
 @app.get("/login")
@@ -45,9 +66,9 @@ async def callback(code: str):
     """
     global ACCESS_TOKEN
     
-    url = "https://api.upstox.com/v2/login/authorization/token"
+    from app.core.http_client import upstox_client
+
     headers = {
-        "accept": "application/json",
         "Content-Type": "application/x-www-form-urlencoded"
     }
     data = {
@@ -58,11 +79,8 @@ async def callback(code: str):
         "grant_type": "authorization_code"
     }
 
-    from app.core.redis_client import redis_client
-    
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, headers=headers, data=data)
-        
+    response = await upstox_client.post("/v2/login/authorization/token", headers=headers, data=data)
+
     if response.status_code == 200:
         token_data = response.json()
         ACCESS_TOKEN = token_data.get("access_token")
@@ -82,46 +100,68 @@ async def callback(code: str):
         }
 
 @app.get("/start-feed")
-def start_feed(background_tasks: BackgroundTasks, symbols: str):
+async def start_feed(symbols: str):
     """
     Starts the WebSocket feed for the given symbols.
     Symbols should be comma-separated, e.g., "NSE_INDEX|Nifty 50,NSE_INDEX|Nifty Bank"
+    With several API workers the request is forwarded to the feed leader.
     """
-    global ACCESS_TOKEN, MARKET_FEED
-    
-    if not ACCESS_TOKEN:
+    if not current_token():
         return {"error": "Authentication required. Please login first."}
-    
+
+    from app.services.feed_leader import feed_leader
+
     instrument_keys = symbols.split(",")
-    feed = MarketFeed(ACCESS_TOKEN, instrument_keys)
-    MARKET_FEED = feed
-    
-    # Run the streamer in the background
-    background_tasks.add_task(feed.start_stream)
-    
-    return {
-        "message": "Feed started in background",
-        "instruments": instrument_keys
-    }
+    return await feed_leader.request("start_feed", symbols=instrument_keys)
 
 @app.post("/run-morning-setup")
 async def run_morning_setup():
     """
-    Triggers the morning setup logic:
-    1. Get Spot Price
-    2. Calculate ATM
-    3. Generate Grid
-    4. Subscribe to Options
+    Triggers the morning setup logic on the feed leader, for every
+    underlying in MORNING_UNDERLYINGS:
+    1. Get Spot Prices
+    2. Calculate ATM per underlying
+    3. Generate Grids
+    4. Subscribe to Options (one request for all)
     """
-    global MARKET_FEED
-    
-    if not MARKET_FEED:
-        return {"error": "Market Feed is not active. Please start the feed first."}
-        
-    from app.services.morning_setup import MorningSetup
-    setup = MorningSetup(MARKET_FEED)
-    result = await setup.setup_morning_strikes()
-    return result
+    from app.services.feed_leader import feed_leader
+
+    return await feed_leader.request("morning_setup")
+
+@app.get("/feed/leader")
+def get_feed_leader():
+    """
+    Which worker owns the feed, its lease epoch and this worker's view.
+    """
+    from app.services.feed_leader import feed_leader
+
+    status = redis_client.get("FEED_STATUS")
+    return {
+        "leader": json.loads(status) if status else None,
+        "this_worker": feed_leader.lease.owner,
+        "is_leader": feed_leader.lease.held,
+        "stats": feed_leader.stats,
+    }
+
+@app.get("/feed/modes")
+def get_feed_modes():
+    """
+    Instruments per subscription mode, bytes/sec per mode and the estimated
+    bandwidth saved against subscribing everything in 'full'.
+    """
+    stats = redis_client.get("FEED_MODES")
+    return json.loads(stats) if stats else {"error": "No mode metrics yet. Is the feed running?"}
+
+@app.get("/market/session")
+def get_market_session():
+    """
+    Current session phase (feed status, else the local calendar) and the
+    lifecycle jobs completed today.
+    """
+    from app.core.session import market_session
+    from app.services.feed_leader import feed_leader
+
+    return {**market_session.info(), "jobs": feed_leader.session.status()}
 
 @app.get("/refresh-contracts")
 async def refresh_contracts(instrument: str = "NSE_INDEX|Nifty 50"):
@@ -143,3 +183,174 @@ async def refresh_contracts(instrument: str = "NSE_INDEX|Nifty 50"):
             "message": "Failed to refresh contracts",
             "error": str(e)
         }
+
+@app.get("/candles")
+async def get_candles(
+    symbols: str,
+    timeframe: str = "1m",
+    start: int | None = None,
+    end: int | None = None,
+    format: str = "json"
+):
+    """
+    Candle history for one or many symbols (comma-separated).
+    start/end are epoch seconds; default is the last 24 hours, open-ended.
+    timeframe: 1m, 5m, 15m or 1d.
+    format: json (columnar), numpy (.npz) or arrow (IPC stream).
+    Large ranges are streamed from a DB cursor (NDJSON lines for json).
+    """
+    from app.services.candle_history import (
+        candle_history, TIMEFRAME_SOURCES, require_pyarrow,
+        encode_json, encode_numpy, encode_arrow, stream_ndjson, stream_arrow
+    )
+
+    if timeframe not in TIMEFRAME_SOURCES:
+        return {"error": f"Unsupported timeframe. Use one of {list(TIMEFRAME_SOURCES)}"}
+    if format not in ("json", "numpy", "arrow"):
+        return {"error": "Unsupported format. Use json, numpy or arrow"}
+
+    symbol_list = [symbol for symbol in symbols.split(",") if symbol]
+    start = start if start is not None else int(time.time()) - 86400
+    candle_history.start_listener()
+
+    try:
+        if format == "arrow":
+            require_pyarrow()
+
+        _, seconds = TIMEFRAME_SOURCES[timeframe]
+        span = (end if end is not None else time.time()) - start
+        if span / seconds * len(symbol_list) > settings.CANDLE_CACHE_MAX_ROWS:
+            if format == "json":
+                return StreamingResponse(
+                    stream_ndjson(candle_history, symbol_list, timeframe, start, end),
+                    media_type="application/x-ndjson"
+                )
+            if format == "arrow":
+                return StreamingResponse(
+                    stream_arrow(candle_history, symbol_list, timeframe, start, end),
+                    media_type="application/vnd.apache.arrow.stream"
+                )
+
+        result = await candle_history.fetch_many(symbol_list, timeframe, start, end)
+        if format == "numpy":
+            return Response(encode_numpy(result), media_type="application/octet-stream")
+        if format == "arrow":
+            return Response(encode_arrow(result), media_type="application/vnd.apache.arrow.stream")
+        return encode_json(result, timeframe)
+
+    except RuntimeError as e:
+        return {"error": str(e)}
+
+@app.get("/features")
+async def get_features(symbols: str, start: int | None = None, end: int | None = None, version: int | None = None):
+    """
+    Stored 1m candle feature vectors (columnar, per symbol), the same values
+    live strategies were given. start/end are epoch seconds; default is the
+    last 24 hours and the current FEATURE_VERSION.
+    """
+    from app.core.features import FEATURE_VERSION, FEATURE_NAMES, load_features
+
+    symbol_list = [symbol for symbol in symbols.split(",") if symbol]
+    start = start if start is not None else int(time.time()) - 86400
+    version = version if version is not None else FEATURE_VERSION
+    try:
+        result = await load_features(symbol_list, start, end, version)
+    except Exception as e:
+        return {"error": str(e)}
+    return {
+        "version": version,
+        "features": list(FEATURE_NAMES),
+        "symbols": {
+            symbol: {"timestamps": timestamps.tolist(), "values": values.tolist()}
+            for symbol, (timestamps, values) in result.items()
+        },
+    }
+
+@app.get("/option-chain/{underlying}")
+def get_option_chain(underlying: str, expiry: str | None = None):
+    """
+    Live option-chain analytics: PCR (OI and volume), max pain, IV skew and
+    per-strike OI build-up. Example: /option-chain/NIFTY
+    """
+    from app.services.option_chain import get_chain_snapshot
+
+    snapshot = get_chain_snapshot(underlying.upper(), expiry)
+    if not snapshot:
+        return {"error": f"No live chain for {underlying}. Is the resampler running?"}
+    return snapshot
+
+@app.get("/ticks")
+def get_ticks(symbols: str):
+    """
+    Latest conflated tick per instrument (comma-separated keys), refreshed by
+    the conflator every CONFLATE_INTERVAL_MS.
+    """
+    from app.core.ticks import get_latest_ticks
+
+    return get_latest_ticks([symbol.strip() for symbol in symbols.split(",") if symbol.strip()])
+
+@app.get("/strategies")
+def get_strategies():
+    """
+    Per-strategy CPU accounting and signal router counters (routed,
+    suppressed, per-sink drops) published by the strategy host.
+    """
+    stats = redis_client.hgetall("STRATEGY_STATS")
+    router = redis_client.get("SIGNAL_ROUTER_STATS")
+    return {
+        "strategies": {name: json.loads(entry) for name, entry in stats.items()},
+        "signal_router": json.loads(router) if router else None,
+    }
+
+@app.websocket("/ws")
+async def stream(websocket: WebSocket):
+    """
+    Live ticks, candles and signals for dashboards.
+    Send {"action": "subscribe", "channels": ["ticks", "candles", "signals"],
+    "instruments": ["NSE_FO|..."], "max_rate": 4} to start receiving frames.
+    """
+    from app.services.stream_hub import stream_hub
+
+    await websocket.accept()
+    await stream_hub.serve(websocket)
+
+@app.get("/ws/stats")
+def get_stream_stats():
+    from app.services.stream_hub import stream_hub
+
+    return stream_hub.stats()
+
+@app.get("/orders")
+def get_orders():
+    """
+    Orders placed by the order gateway and its signal-to-order latency stats.
+    """
+    orders = [json.loads(order) for order in redis_client.hvals("ORDERS")]
+    orders.sort(key=lambda order: order["received_at"], reverse=True)
+    stats = redis_client.get("ORDER_STATS")
+    return {"stats": json.loads(stats) if stats else None, "orders": orders}
+
+@app.get("/pnl")
+def get_pnl():
+    """
+    Latest positions and mark-to-market P&L from the order gateway.
+    """
+    snapshot = redis_client.get("PNL_SNAPSHOT")
+    return json.loads(snapshot) if snapshot else {"error": "No P&L yet. Is the order gateway running?"}
+
+@app.get("/http-metrics")
+def get_http_metrics():
+    """
+    Upstox REST timings, retries and rate-limit waits for this process.
+    """
+    from app.core.http_client import upstox_client
+
+    return upstox_client.stats()
+
+@app.get("/startup")
+def get_startup_report():
+    """
+    Timing breakdown of the last startup (imports, Redis, DB/HTTP pools,
+    contract cache, feed resume) and any phase that failed.
+    """
+    return startup.report
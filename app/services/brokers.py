@@ -0,0 +1,165 @@
+import itertools
+import time
+import httpx
+from app.core.config import settings
+from app.core.http_client import UpstoxClient
+
+# Order lifecycle
+PENDING = "PENDING"  # Created, not yet sent
+OPEN = "OPEN"  # Accepted, waiting for (more) fills
+FILLED = "FILLED"
+REJECTED = "REJECTED"
+CANCELLED = "CANCELLED"  # Cancelled, or closed by the broker with part of it unfilled
+
+
+class PaperBroker:
+    """
+    Simulated exchange for paper trading. Market orders fill against the
+    latest top of book (BUY at best_ask, SELL at best_bid), limited to the
+    quantity shown there; the rest stays OPEN and fills on later quotes.
+    """
+
+    name = "paper"
+
+    def __init__(self):
+        self.quotes = {}  # {symbol: (best_bid, bid_qty, best_ask, ask_qty)}
+        self.ids = itertools.count(1)
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def update_quote(self, symbol, best_bid, bid_qty, best_ask, ask_qty):
+        self.quotes[symbol] = (best_bid, bid_qty, best_ask, ask_qty)
+
+    async def place(self, order):
+        order["broker_order_id"] = f"PAPER-{next(self.ids)}"
+        order["status"] = OPEN
+        self.match(order)
+
+    def match(self, order):
+        """Fills what the current quote allows. Returns True if anything filled."""
+        quote = self.quotes.get(order["symbol"])
+        if not quote or order["status"] != OPEN:
+            return False
+        best_bid, bid_qty, best_ask, ask_qty = quote
+        price, available = (best_ask, ask_qty) if order["side"] == "BUY" else (best_bid, bid_qty)
+        if price <= 0:
+            return False
+
+        remaining = order["quantity"] - order["filled_qty"]
+        # Feeds without depth quantity (qty 0) are assumed to absorb the order
+        qty = min(remaining, available) if available > 0 else remaining
+        if qty <= 0:
+            return False
+        apply_fill(order, qty, price)
+        return True
+
+    async def refresh(self, order):
+        return self.match(order)
+
+
+class HttpBroker:
+    """
+    Upstox order API (or the local mock) through a pre-warmed UpstoxClient,
+    so placing an order never pays TCP/TLS setup.
+    """
+
+    name = "upstox"
+
+    def __init__(self, base_url=None, access_token=None, transport=None):
+        self.access_token = access_token
+        # Order endpoints have their own host and quota
+        self.client = UpstoxClient(
+            base_url or settings.ORDER_API_URL,
+            per_second=settings.ORDER_RATE_PER_SECOND,
+            per_minute=settings.ORDER_RATE_PER_MINUTE,
+            transport=transport,
+        )
+
+    async def start(self):
+        await self.client.start()
+        # Pre-warm: open the pooled connection before the first order needs it
+        try:
+            await self.client.get("/v2/user/profile", token=self.access_token)
+        except httpx.HTTPError as e:
+            print(f"DEBUG: Broker warm-up request failed: {e}")
+
+    async def close(self):
+        await self.client.close()
+
+    async def place(self, order):
+        body = {
+            "quantity": order["quantity"],
+            "product": settings.ORDER_PRODUCT,
+            "validity": "DAY",
+            "price": 0,
+            "tag": order["order_id"],
+            "instrument_token": order["symbol"],
+            "order_type": "MARKET",
+            "transaction_type": order["side"],
+            "disclosed_quantity": 0,
+            "trigger_price": 0,
+            "is_amo": False,
+        }
+        order["sent_at"] = time.time()
+        response = await self.client.post("/v2/order/place", json=body, token=self.access_token)
+        data = response.json()
+        if response.status_code != 200 or data.get("status") != "success":
+            order["status"] = REJECTED
+            order["reason"] = str(data.get("errors") or data)
+            return
+        order["broker_order_id"] = data["data"]["order_id"]
+        order["status"] = OPEN
+
+    async def refresh(self, order):
+        """
+        Polls the broker for fills of an OPEN order. Rejected, cancelled and
+        completed-but-short orders end the order with what was filled.
+        """
+        response = await self.client.get(
+            "/v2/order/details", params={"order_id": order["broker_order_id"]}, token=self.access_token
+        )
+        data = response.json().get("data") or {}
+        filled = int(data.get("filled_quantity", 0))
+        changed = False
+        if filled > order["filled_qty"]:
+            apply_fill(order, filled - order["filled_qty"], float(data.get("average_price", 0)))
+            changed = True
+        if order["status"] != OPEN:
+            return changed
+
+        status = data.get("status")
+        if status == "rejected":
+            order["status"] = REJECTED
+            order["reason"] = data.get("status_message", "rejected")
+        elif status == "cancelled":
+            order["status"] = CANCELLED
+            order["reason"] = data.get("status_message", "cancelled")
+        elif status == "complete":
+            # Complete but short of the quantity: the rest will never fill
+            order["status"] = CANCELLED
+            order["reason"] = f"Completed with {order['filled_qty']}/{order['quantity']} filled"
+        else:
+            return changed
+        return True
+
+
+def apply_fill(order, qty, price):
+    filled = order["filled_qty"] + qty
+    order["avg_price"] = (order["avg_price"] * order["filled_qty"] + price * qty) / filled
+    order["filled_qty"] = filled
+    order["last_fill"] = {"qty": qty, "price": price, "at": time.time()}
+    if filled >= order["quantity"]:
+        order["status"] = FILLED
+
+
+def get_broker(name=None, access_token=None):
+    name = name or settings.ORDER_BROKER
+    if name == "paper":
+        return PaperBroker()
+    if name == "mock":
+        return HttpBroker(settings.ORDER_MOCK_URL, access_token or "mock")
+    return HttpBroker(access_token=access_token)
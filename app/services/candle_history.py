@@ -0,0 +1,259 @@
+import io
+import json
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from app.core.config import settings
+from app.core.database import get_pool
+from app.core.bus import bus, CANDLE_CLOSED
+from app.core.codec import CANDLE_FIELDS, decode_candle_batch
+from app.core.utils import require_pyarrow
+
+# Timeframe -> (table or continuous aggregate, bucket seconds)
+TIMEFRAME_SOURCES = {
+    "1m": ("market_candles", 60),
+    "5m": ("market_candles_5m", 300),
+    "15m": ("market_candles_15m", 900),
+    "1d": ("market_candles_1d", 86400),
+}
+
+INT_FIELDS = {
+    "timestamp", "volume", "open_interest", "total_buy_qty", "total_sell_qty",
+    "max_buy_wall_qty", "max_sell_wall_qty",
+}
+COLUMN_DTYPES = {field: np.int64 if field in INT_FIELDS else np.float64 for field in CANDLE_FIELDS}
+
+# Timestamps leave the database as epoch seconds
+SELECT_COLUMNS = ", ".join(
+    ["extract(epoch FROM timestamp)::bigint AS timestamp"] + [f for f in CANDLE_FIELDS if f != "timestamp"]
+)
+
+
+def records_to_columns(records):
+    """
+    Converts asyncpg records (CANDLE_FIELDS order) into {field: ndarray}.
+    NULLs become 0, as everywhere else in the candle pipeline.
+    """
+    count = len(records)
+    return {
+        field: np.fromiter((r[i] or 0 for r in records), dtype=COLUMN_DTYPES[field], count=count)
+        for i, field in enumerate(CANDLE_FIELDS)
+    }
+
+
+def concat_columns(chunks):
+    if not chunks:
+        return records_to_columns([])
+    if len(chunks) == 1:
+        return chunks[0]
+    return {field: np.concatenate([chunk[field] for chunk in chunks]) for field in CANDLE_FIELDS}
+
+
+class CandleHistory:
+    """
+    Read path for market_candles and its continuous aggregates.
+    Recent windows are kept in an in-process LRU cache that is invalidated
+    whenever a newer candle for the symbol appears on 'candle_closed'.
+    """
+
+    def __init__(self, cache_size=None):
+        self.cache_size = cache_size or settings.CANDLE_CACHE_SIZE
+        self.cache = OrderedDict()  # {(symbol, timeframe, start, end): columns}
+        self.lock = threading.Lock()  # Cache is shared with the listener thread
+        self.listener = None
+        self.hits = 0
+        self.misses = 0
+
+    # --- Cache ---
+
+    def cache_get(self, key):
+        with self.lock:
+            columns = self.cache.get(key)
+            if columns is None:
+                self.misses += 1
+                return None
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return columns
+
+    def cache_put(self, key, columns):
+        with self.lock:
+            self.cache[key] = columns
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def invalidate(self, symbol, timestamp):
+        """
+        Drops cached windows of `symbol` that a candle at `timestamp` falls into.
+        Open-ended windows (end=None) always qualify.
+        """
+        with self.lock:
+            for key in [k for k in self.cache if k[0] == symbol and (k[3] is None or k[3] >= timestamp)]:
+                del self.cache[key]
+
+    def start_listener(self):
+        """
+        Starts (once) a daemon thread that invalidates the cache from 'candle_closed'.
+        """
+        if self.listener:
+            return
+        self.listener = threading.Thread(target=self._listen, name="candle-cache-invalidator", daemon=True)
+        self.listener.start()
+
+    def _listen(self):
+        consumer = bus.consumer(CANDLE_CLOSED)
+        while True:
+            try:
+                for _, raw in consumer.read():
+                    for symbol, candle in decode_candle_batch(raw):
+                        self.invalidate(symbol, candle["timestamp"])
+            except Exception as e:
+                print(f"Error in candle cache listener: {e}")
+                time.sleep(1)
+
+    # --- Database ---
+
+    def build_query(self, timeframe):
+        table, _ = TIMEFRAME_SOURCES[timeframe]
+        return (
+            f"SELECT {SELECT_COLUMNS} FROM {table} "
+            f"WHERE symbol = $1 AND timestamp >= to_timestamp($2) AND timestamp < to_timestamp($3) "
+            f"ORDER BY timestamp"
+        )
+
+    def is_cacheable(self, timeframe, start, end):
+        _, seconds = TIMEFRAME_SOURCES[timeframe]
+        span = (end if end is not None else time.time()) - start
+        return span / seconds <= settings.CANDLE_CACHE_MAX_ROWS
+
+    async def iter_chunks(self, symbol, timeframe, start, end=None, chunk_rows=None):
+        """
+        Streams one symbol's candles from a server-side cursor as column chunks.
+        """
+        chunk_rows = chunk_rows or settings.CANDLE_STREAM_CHUNK_ROWS
+        query = self.build_query(timeframe)
+        upper = end if end is not None else time.time() + 86400
+
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            # Cursors only live inside a transaction
+            async with conn.transaction():
+                cursor = await conn.cursor(query, symbol, start, upper)
+                while True:
+                    records = await cursor.fetch(chunk_rows)
+                    if not records:
+                        break
+                    yield records_to_columns(records)
+
+    async def fetch(self, symbol, timeframe, start, end=None):
+        """
+        Returns {field: ndarray} for one symbol, from cache when possible.
+        """
+        if timeframe not in TIMEFRAME_SOURCES:
+            raise ValueError(f"Unsupported timeframe '{timeframe}'. Use one of {list(TIMEFRAME_SOURCES)}")
+
+        cacheable = self.is_cacheable(timeframe, start, end)
+        key = (symbol, timeframe, start, end)
+        if cacheable:
+            columns = self.cache_get(key)
+            if columns is not None:
+                return columns
+
+        columns = concat_columns([chunk async for chunk in self.iter_chunks(symbol, timeframe, start, end)])
+
+        if cacheable:
+            self.cache_put(key, columns)
+        return columns
+
+    async def fetch_many(self, symbols, timeframe, start, end=None):
+        return {symbol: await self.fetch(symbol, timeframe, start, end) for symbol in symbols}
+
+    def stats(self):
+        return {"entries": len(self.cache), "hits": self.hits, "misses": self.misses}
+
+
+# --- Encoders ---
+
+def encode_json(result, timeframe):
+    """Columnar JSON: {"timeframe": ..., "candles": {symbol: {field: [...]}}}."""
+    return {
+        "timeframe": timeframe,
+        "candles": {
+            symbol: {field: column.tolist() for field, column in columns.items()}
+            for symbol, columns in result.items()
+        },
+    }
+
+
+def encode_ndjson_chunk(symbol, columns):
+    """One streamed JSON line per cursor chunk."""
+    line = {"symbol": symbol}
+    line.update({field: column.tolist() for field, column in columns.items()})
+    return (json.dumps(line, separators=(",", ":")) + "\n").encode()
+
+
+def encode_numpy(result):
+    """
+    NumPy-packed columns (.npz): one array per field across all symbols plus
+    `symbol_id` (int32 index into the `symbols` array).
+    Load with: np.load(io.BytesIO(body))
+    """
+    symbols = list(result)
+    # Copy: with one symbol concat_columns returns the (possibly cached) dict itself
+    merged = dict(concat_columns([result[symbol] for symbol in symbols]))
+    lengths = [len(result[symbol]["timestamp"]) for symbol in symbols]
+    merged["symbol_id"] = np.repeat(np.arange(len(symbols), dtype=np.int32), lengths)
+    merged["symbols"] = np.array(symbols, dtype=str)
+
+    buffer = io.BytesIO()
+    np.savez(buffer, **merged)
+    return buffer.getvalue()
+
+
+def arrow_batch(symbol, columns):
+    pa = require_pyarrow()
+    arrays = [pa.array(np.full(len(columns["timestamp"]), symbol)).dictionary_encode()]
+    arrays += [pa.array(columns[field]) for field in CANDLE_FIELDS]
+    return pa.record_batch(arrays, names=["symbol"] + list(CANDLE_FIELDS))
+
+
+def encode_arrow(result):
+    """Arrow IPC stream with a dictionary-encoded symbol column."""
+    pa = require_pyarrow()
+    batches = [arrow_batch(symbol, columns) for symbol, columns in result.items()]
+    sink = io.BytesIO()
+    if batches:
+        with pa.ipc.new_stream(sink, batches[0].schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+    return sink.getvalue()
+
+
+async def stream_arrow(history, symbols, timeframe, start, end):
+    """Arrow IPC stream, one record batch per cursor chunk."""
+    pa = require_pyarrow()
+    sink = io.BytesIO()
+    writer = None
+    for symbol in symbols:
+        async for columns in history.iter_chunks(symbol, timeframe, start, end):
+            batch = arrow_batch(symbol, columns)
+            if writer is None:
+                writer = pa.ipc.new_stream(sink, batch.schema)
+            writer.write_batch(batch)
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    if writer is not None:
+        writer.close()
+        yield sink.getvalue()
+
+
+async def stream_ndjson(history, symbols, timeframe, start, end):
+    for symbol in symbols:
+        async for columns in history.iter_chunks(symbol, timeframe, start, end):
+            yield encode_ndjson_chunk(symbol, columns)
+
+
+candle_history = CandleHistory()
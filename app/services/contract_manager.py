@@ -1,7 +1,29 @@
-import httpx
 import json
 from datetime import datetime
+from app.core.config import settings
 from app.core.redis_client import redis_client
+from app.core.http_client import upstox_client
+
+# Symbol Normalization
+UNDERLYING_NAMES = {
+    "NSE_INDEX|Nifty 50": "NIFTY",
+    "NSE_INDEX|Nifty Bank": "BANKNIFTY",
+    "NSE_INDEX|Nifty Fin Service": "FINNIFTY",
+    "BSE_INDEX|SENSEX": "SENSEX",
+}
+
+def underlying_name(instrument_key):
+    """Short name used in CONTRACT:* keys; MORNING_UNDERLYINGS can name stocks."""
+    configured = settings.MORNING_UNDERLYINGS.get(instrument_key, {}).get("name")
+    return configured or UNDERLYING_NAMES.get(instrument_key, instrument_key.split("|")[-1].replace(" ", "").upper())
+
+def grid_field(strike, option_type):
+    """Field of a contract in CONTRACT_GRID:{name}, e.g. '24200:CE' or '512.5:PE'."""
+    return f"{format(float(strike), 'f').rstrip('0').rstrip('.')}:{option_type}"
+
+def contract_underlyings():
+    """Underlyings whose contracts are kept cached (startup and the daily refresh)."""
+    return list(dict.fromkeys(settings.STARTUP_CONTRACT_UNDERLYINGS + list(settings.MORNING_UNDERLYINGS)))
 
 async def fetch_and_store_contracts(instrument_key: str = "NSE_INDEX|Nifty 50"):
     """
@@ -16,17 +38,10 @@ async def fetch_and_store_contracts(instrument_key: str = "NSE_INDEX|Nifty 50"):
         raise Exception("Access token not found in Redis. Please authenticate first.")
     
     # 2. Call Upstox API
-    url = "https://api.upstox.com/v2/option/contract"
     params = {"instrument_key": instrument_key}
-    headers = {
-        "Accept": "application/json",
-        "Authorization": f"Bearer {access_token}"
-    }
-    
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, params=params, headers=headers)
-        response.raise_for_status()
-        data = response.json()
+    response = await upstox_client.get("/v2/option/contract", params=params, token=access_token)
+    response.raise_for_status()
+    data = response.json()
         
     if data.get("status") != "success" or not data.get("data"):
         raise Exception(f"Failed to fetch contracts: {data}")
@@ -60,14 +75,10 @@ async def fetch_and_store_contracts(instrument_key: str = "NSE_INDEX|Nifty 50"):
     print(f"DEBUG: Nearest Expiry identified: {nearest_expiry}")
     
     # 4. Filter and Store
-    # Symbol Normalization
-    symbol_map = {
-        "NSE_INDEX|Nifty 50": "NIFTY",
-        "NSE_INDEX|Nifty Bank": "BANKNIFTY"
-    }
-    symbol_name = symbol_map.get(instrument_key, instrument_key.split("|")[-1].replace(" ", "").upper())
+    symbol_name = underlying_name(instrument_key)
     
     redis_data = {}
+    grid = {}  # {"strike:type": instrument_key}, the nearest expiry only
     count = 0
     
     for contract in contracts:
@@ -89,12 +100,42 @@ async def fetch_and_store_contracts(instrument_key: str = "NSE_INDEX|Nifty 50"):
                 })
                 
                 redis_data[key] = value
+                grid[grid_field(strike, opt_type)] = instr_key
+                
+                # Reverse lookup: instrument_key -> contract metadata
+                redis_data[f"INSTRUMENT:{instr_key}"] = json.dumps({
+                    "underlying": symbol_name,
+                    "expiry": nearest_expiry,
+                    "strike": strike,
+                    "option_type": opt_type,
+                    "lot_size": lot_size
+                })
                 count += 1
                 
     if redis_data:
-        redis_client.mset(redis_data)
+        # The underlying itself, so its ticks resolve to the same name
+        redis_data[f"INSTRUMENT:{instrument_key}"] = json.dumps({"underlying": symbol_name})
+        # The grid hash is replaced atomically, so it never mixes expiries
+        grid_key = f"CONTRACT_GRID:{symbol_name}"
+        pipe = redis_client.pipeline()
+        pipe.mset(redis_data)
+        pipe.delete(grid_key)
+        pipe.hset(grid_key, mapping=grid)
+        pipe.execute()
         print(f"DEBUG: Stored {count} contracts in Redis.")
     else:
         print("DEBUG: No contracts matched the criteria.")
         
     return count
+
+def get_instrument_meta(instrument_keys):
+    """
+    Batch lookup of contract metadata by instrument key (one MGET).
+    Returns {instrument_key: {"underlying", "expiry", "strike", "option_type", "lot_size"}}
+    for the keys present in the contract cache.
+    """
+    instrument_keys = list(instrument_keys)
+    if not instrument_keys:
+        return {}
+    values = redis_client.mget([f"INSTRUMENT:{key}" for key in instrument_keys])
+    return {key: json.loads(value) for key, value in zip(instrument_keys, values) if value}
@@ -0,0 +1,188 @@
+import asyncio
+import json
+import uuid
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.core.bus import bus, FEED_CONTROL
+from app.core.lease import RedisLease
+from app.core.startup import FEED_INSTRUMENTS_KEY
+from app.services.session_scheduler import SessionScheduler
+
+
+class FeedLeader:
+    """
+    Exactly one process streams the market feed: whichever API worker holds
+    the 'feed' lease. Every worker runs a FeedLeader; the holder connects the
+    WebSocket and executes control commands ('start_feed', 'morning_setup')
+    that the other workers forward over the 'feed_control' channel. Losing
+    the lease stops the feed at once, so two feeds never run side by side.
+    Its writes are fenced by the lease: ticks stop once the current term
+    may have expired, FEED_STATUS and control replies are only written
+    while the lease is still ours (RedisLease.if_owner).
+    """
+
+    def __init__(self):
+        self.lease = RedisLease("feed")
+        self.market_feed = None
+        self.feed_task = None
+        self.tasks = []
+        self.session = SessionScheduler(self)
+        self.handlers = {
+            "start_feed": self.start_feed,
+            "morning_setup": self.morning_setup,
+        }
+        self.stats = {"terms": 0, "commands": 0, "forwarded": 0, "timeouts": 0}
+
+    # --- Leadership ---
+
+    async def start(self):
+        # First attempt inline, so a single worker owns the feed before serving
+        await self.elect()
+        self.tasks = [asyncio.create_task(self.lease_loop()), asyncio.create_task(self.control_loop())]
+        if settings.SESSION_JOBS:
+            self.tasks.append(asyncio.create_task(self.session.run()))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        self.stop_feed()
+        self.lease.release()
+
+    async def elect(self):
+        was_leader = self.lease.held
+        try:
+            is_leader = await asyncio.to_thread(self.lease.keep)
+        except Exception as e:
+            # Ownership can't be proven without Redis; stepping down is the safe side
+            print(f"Error renewing feed lease: {e}")
+            self.lease.held = is_leader = False
+
+        if is_leader and not was_leader:
+            self.stats["terms"] += 1
+            print(f"DEBUG: Became feed leader ({self.lease.owner}, epoch {self.lease.epoch}).")
+            await self.resume_feed()
+        elif was_leader and not is_leader:
+            print("WARNING: Lost feed leadership, stopping the feed.")
+            self.stop_feed()
+
+        if is_leader:
+            await asyncio.to_thread(self.publish_status)
+
+    def publish_status(self):
+        status = json.dumps(self.status())
+        self.lease.if_owner(lambda pipe: pipe.set("FEED_STATUS", status, px=self.lease.ttl_ms))
+
+    async def lease_loop(self):
+        while True:
+            await asyncio.sleep(self.lease.ttl_ms / 3000)
+            await self.elect()
+
+    def status(self):
+        return {
+            "leader": self.lease.owner if self.lease.held else self.lease.holder(),
+            "epoch": self.lease.epoch,
+            "feed_active": self.feed_task is not None and not self.feed_task.done(),
+            "instruments": len(self.market_feed.instrument_keys) if self.market_feed else 0,
+        }
+
+    # --- Feed ---
+
+    def run_feed(self, access_token, instrument_keys):
+        from app.services.feed_service import MarketFeed
+
+        self.stop_feed()
+        self.market_feed = MarketFeed(access_token, list(instrument_keys), fence=self.lease.valid)
+        self.feed_task = asyncio.create_task(self.market_feed.start_stream())
+
+    def stop_feed(self):
+        if self.feed_task:
+            self.feed_task.cancel()
+        self.feed_task = None
+        self.market_feed = None
+
+    async def resume_feed(self):
+        """A new leader picks up the subscriptions of the previous one."""
+        if not settings.FEED_RESUME_ON_STARTUP:
+            return
+        token, instruments = redis_client.mget(["access_token", FEED_INSTRUMENTS_KEY])
+        instruments = json.loads(instruments) if instruments else []
+        if token and instruments:
+            self.run_feed(token, instruments)
+            print(f"DEBUG: Resumed market feed with {len(instruments)} instruments.")
+
+    # --- Control commands ---
+
+    async def start_feed(self, symbols):
+        token = redis_client.get("access_token")
+        if not token:
+            return {"error": "Authentication required. Please login first."}
+        self.run_feed(token, symbols)
+        return {"message": "Feed started in background", "instruments": symbols, "leader": self.lease.owner}
+
+    async def morning_setup(self):
+        if not self.market_feed:
+            return {"error": "Market Feed is not active. Please start the feed first."}
+        from app.services.morning_setup import MorningSetup
+
+        return await MorningSetup(self.market_feed).setup_morning_strikes()
+
+    async def execute(self, command, args):
+        handler = self.handlers.get(command)
+        if handler is None:
+            return {"error": f"Unknown feed command '{command}'"}
+        self.stats["commands"] += 1
+        try:
+            return await handler(**args)
+        except Exception as e:
+            return {"error": f"{command} failed: {e}"}
+
+    async def request(self, command, **args):
+        """
+        Runs a control command on the feed leader: in-process when this
+        worker leads, otherwise forwarded over the bus and awaited (bounded
+        by LEADER_CONTROL_TIMEOUT).
+        """
+        if self.lease.held:
+            return await self.execute(command, args)
+
+        request_id = uuid.uuid4().hex
+        bus.publish(FEED_CONTROL, json.dumps({"id": request_id, "command": command, "args": args}))
+        self.stats["forwarded"] += 1
+        reply = await asyncio.to_thread(
+            redis_client.blpop, [f"FEED_CONTROL_REPLY:{request_id}"], settings.LEADER_CONTROL_TIMEOUT
+        )
+        if reply is None:
+            self.stats["timeouts"] += 1
+            return {"error": f"No reply from the feed leader ({self.lease.holder() or 'none elected'})."}
+        return json.loads(reply[1])
+
+    async def control_loop(self):
+        consumer = bus.consumer(FEED_CONTROL)
+        try:
+            while True:
+                messages = await asyncio.to_thread(consumer.read)
+                # Every worker sees every command; only the leader answers
+                if not self.lease.held:
+                    continue
+                for _, raw in messages:
+                    try:
+                        command = json.loads(raw)
+                        result = await self.execute(command["command"], command.get("args", {}))
+                        if not await asyncio.to_thread(self.reply, command["id"], json.dumps(result)):
+                            print(f"WARNING: Lost the feed lease, not answering '{command['command']}'.")
+                    except Exception as e:
+                        print(f"Error handling feed command: {e}")
+        finally:
+            consumer.close()
+
+    def reply(self, request_id, payload):
+        key = f"FEED_CONTROL_REPLY:{request_id}"
+
+        def write(pipe):
+            pipe.rpush(key, payload)
+            pipe.expire(key, int(settings.LEADER_CONTROL_TIMEOUT) + 5)
+
+        return self.lease.if_owner(write)
+
+
+feed_leader = FeedLeader()
@@ -0,0 +1,195 @@
+import json
+import time
+from app.core.config import settings
+from app.core.bus import bus, TRADE_SIGNALS
+from app.services.contract_manager import get_instrument_meta
+
+# Upstox v3 subscription modes, cheapest first
+MODES = ("ltpc", "option_greeks", "full", "full_d30")
+RANK = {mode: i for i, mode in enumerate(MODES)}
+
+
+def is_index(instrument_key):
+    """Index segments (NSE_INDEX, BSE_INDEX) have no depth, OI or Greeks."""
+    return instrument_key.split("|", 1)[0].endswith("_INDEX")
+
+
+def feed_ltp(feed):
+    """LTP of one protobuf Feed in any mode."""
+    kind = feed.WhichOneof("FeedUnion")
+    if kind == "ltpc":
+        return feed.ltpc.ltp
+    if kind == "firstLevelWithGreeks":
+        return feed.firstLevelWithGreeks.ltpc.ltp
+    if kind == "fullFeed":
+        full = feed.fullFeed
+        return (full.indexFF if full.WhichOneof("FullFeedUnion") == "indexFF" else full.marketFF).ltpc.ltp
+    return 0.0
+
+
+class ModeManager:
+    """
+    Per-instrument subscription modes for the market feed.
+
+    Depth and Greeks only matter where we trade: strikes within
+    FEED_NEAR_STRIKES of spot and instruments with a recent signal get
+    FEED_NEAR_MODE / FEED_SIGNAL_MODE, far strikes FEED_FAR_MODE and
+    underlyings FEED_INDEX_MODE or FEED_EQUITY_MODE by segment. Instruments
+    missing from the contract cache stay in 'full'. Promotions apply at the
+    next rebalance, demotions only after the instrument has wanted a cheaper
+    mode for FEED_MODE_DEMOTE_SECONDS, so a spot hovering at a band edge
+    doesn't flap modes.
+
+    The manager does no I/O of its own where it can be avoided: the feed
+    passes in contract meta and signalled instruments fetched off the event
+    loop (untracked()/fetch_signals() in a thread).
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.modes = {}  # {instrument: current mode}
+        self.meta = {}  # {instrument: contract meta}
+        self.underlying_keys = {}  # {underlying instrument (index or stock): underlying name}
+        self.strike_step = {}  # {underlying: strike spacing}
+        self.spot = {}  # {underlying: last index LTP}
+        self.signals = {}  # {instrument: time of its last signal}
+        self.cheaper_since = {}  # {instrument: when it first wanted a cheaper mode}
+        self.signal_consumer = None
+        self.bytes = dict.fromkeys(MODES, 0)
+        self.ticks = dict.fromkeys(MODES, 0)
+        self.started = clock()
+        self.counters = {"promotions": 0, "demotions": 0, "change_messages": 0}
+
+    # --- Instruments ---
+
+    def untracked(self, instrument_keys):
+        return [key for key in dict.fromkeys(instrument_keys) if key not in self.modes]
+
+    def track(self, instrument_keys, meta=None):
+        """
+        Assigns a starting mode to new instruments. `meta` is their contract
+        meta (get_instrument_meta of untracked()), looked up here if omitted.
+        Returns {mode: [keys]} for the subscribe message(s).
+        """
+        new = self.untracked(instrument_keys)
+        self.meta.update(get_instrument_meta(new) if meta is None else meta)
+        strikes = {}
+        for key, meta in self.meta.items():
+            if "strike" in meta:
+                strikes.setdefault(meta["underlying"], set()).add(meta["strike"])
+            else:
+                self.underlying_keys[key] = meta["underlying"]
+        for underlying, values in strikes.items():
+            values = sorted(values)
+            steps = [b - a for a, b in zip(values, values[1:])]
+            self.strike_step[underlying] = min(steps) if steps else 0
+
+        now = self.clock()
+        groups = {}
+        for key in new:
+            self.modes[key] = self.target(key, now)
+            groups.setdefault(self.modes[key], []).append(key)
+        return groups
+
+    def target(self, key, now):
+        if key in self.underlying_keys:
+            return settings.FEED_INDEX_MODE if is_index(key) else settings.FEED_EQUITY_MODE
+        meta = self.meta.get(key)
+        if not meta or "strike" not in meta:
+            return "full"
+        if now - self.signals.get(key, float("-inf")) < settings.FEED_SIGNAL_HOLD_SECONDS:
+            return settings.FEED_SIGNAL_MODE
+        spot = self.spot.get(meta["underlying"])
+        if not spot:
+            # Until the index ticks we can't tell near from far
+            return settings.FEED_NEAR_MODE
+        band = settings.FEED_NEAR_STRIKES * self.strike_step.get(meta["underlying"], 0)
+        return settings.FEED_NEAR_MODE if abs(meta["strike"] - spot) <= band else settings.FEED_FAR_MODE
+
+    # --- Feed side ---
+
+    def observe(self, response):
+        """Accounts the bytes of each instrument in a FeedResponse and tracks underlying spot."""
+        for key, feed in response.feeds.items():
+            mode = self.modes.get(key, "full")
+            self.bytes[mode] += feed.ByteSize()
+            self.ticks[mode] += 1
+            underlying = self.underlying_keys.get(key)
+            if underlying:
+                ltp = feed_ltp(feed)
+                if ltp:
+                    self.spot[underlying] = ltp
+
+    def fetch_signals(self):
+        """Instruments signalled since the last call (bus I/O only; safe to run in a thread)."""
+        if self.signal_consumer is None:
+            self.signal_consumer = bus.consumer(TRADE_SIGNALS)
+        signaled = []
+        for _, raw in self.signal_consumer.read(block_ms=0):
+            try:
+                signaled.append(json.loads(raw)["symbol"])
+            except Exception as e:
+                print(f"Error reading signal for feed modes: {e}")
+        return signaled
+
+    def rebalance(self, signaled=None):
+        """
+        Re-evaluates every instrument, after recording `signaled` (fetched
+        here if omitted). Returns {mode: [keys]} that must be switched with a
+        change_mode message.
+        """
+        now = self.clock()
+        for key in self.fetch_signals() if signaled is None else signaled:
+            self.signals[key] = now
+        changes = {}
+        for key, current in self.modes.items():
+            wanted = self.target(key, now)
+            if RANK[wanted] > RANK[current]:
+                self.counters["promotions"] += 1
+            elif RANK[wanted] < RANK[current]:
+                since = self.cheaper_since.setdefault(key, now)
+                if now - since < settings.FEED_MODE_DEMOTE_SECONDS:
+                    continue
+                self.counters["demotions"] += 1
+            else:
+                self.cheaper_since.pop(key, None)
+                continue
+            self.cheaper_since.pop(key, None)
+            changes.setdefault(wanted, []).append(key)
+
+        for mode, keys in changes.items():
+            for key in keys:
+                self.modes[key] = mode
+        self.counters["change_messages"] += len(changes)
+        return changes
+
+    def close(self):
+        if self.signal_consumer:
+            self.signal_consumer.close()
+            self.signal_consumer = None
+
+    # --- Metrics ---
+
+    def stats(self):
+        """
+        Bandwidth per mode and the estimated bytes/sec saved against
+        subscribing everything in 'full' (measured bytes per 'full' tick).
+        """
+        elapsed = max(self.clock() - self.started, 1e-9)
+        per_tick = {mode: self.bytes[mode] / self.ticks[mode] for mode in MODES if self.ticks[mode]}
+        saved = None
+        if "full" in per_tick:
+            saved = sum(
+                self.ticks[mode] / elapsed * (per_tick["full"] - per_tick[mode])
+                for mode in per_tick if mode != "full"
+            )
+        counts = dict.fromkeys(MODES, 0)
+        for mode in self.modes.values():
+            counts[mode] += 1
+        return {
+            "instruments": counts,
+            "bytes_per_sec": {mode: round(self.bytes[mode] / elapsed) for mode in MODES},
+            "bytes_per_tick": {mode: round(size, 1) for mode, size in per_tick.items()},
+            "saved_bytes_per_sec": round(saved) if saved is not None else None,
+            **self.counters,
+        }
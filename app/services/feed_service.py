@@ -1,28 +1,71 @@
 import asyncio
 import json
 import ssl
+import time
 import websockets
-import httpx
 from google.protobuf.json_format import MessageToDict
 import app.core.MarketDataFeedV3_pb2 as pb
+from app.core.config import settings
+from app.core.bus import bus, LIVE_TICKS
+from app.core.http_client import upstox_client
 from app.core.redis_client import redis_client
+from app.core.session import market_session
+from app.core.startup import FEED_INSTRUMENTS_KEY
+from app.services.contract_manager import get_instrument_meta
+from app.services.feed_modes import feed_ltp
 
 class MarketFeed:
-    def __init__(self, access_token: str, instrument_keys: list):
+    def __init__(self, access_token: str, instrument_keys: list, fence=None):
         self.access_token = access_token
         self.instrument_keys = instrument_keys
+        self.fence = fence  # callable() -> False once this process may no longer publish (lost leadership)
+        self.fenced = 0  # Messages dropped by the fence
         self.websocket = None
+        self.modes = None  # ModeManager while streaming, if FEED_ADAPTIVE_MODES
+        # Underlyings whose LTP is kept here, so MorningSetup works without the conflator
+        self.spot_keys = set(settings.MORNING_UNDERLYINGS)
+        self.spots = {}  # {instrument_key: (ltp, received at)}
 
     async def get_market_data_feed_authorize_v3(self):
         """Get authorization for market data feed."""
-        headers = {
-            'Accept': 'application/json',
-            'Authorization': f'Bearer {self.access_token}'
+        response = await upstox_client.get('/v3/feed/market-data-feed/authorize', token=self.access_token)
+        return response.json()
+
+    def save_instruments(self):
+        """Remembers the subscription so a restarted API can resume it."""
+        redis_client.set(FEED_INSTRUMENTS_KEY, json.dumps(self.instrument_keys))
+
+    def feed_request(self, method, mode, instrument_keys):
+        data = {
+            "guid": "someguid",
+            "method": method,
+            "data": {
+                "mode": mode,
+                "instrumentKeys": instrument_keys
+            }
         }
-        url = 'https://api.upstox.com/v3/feed/market-data-feed/authorize'
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
-            return response.json()
+        return json.dumps(data).encode('utf-8')
+
+    async def subscription_groups(self, instrument_keys):
+        """{mode: [keys]} to subscribe: per-instrument modes, or all 'full'."""
+        if self.modes:
+            # Redis lookups run in a thread; the mode book itself is only touched on the loop
+            meta = await asyncio.to_thread(get_instrument_meta, self.modes.untracked(instrument_keys))
+            return self.modes.track(instrument_keys, meta)
+        return {"full": list(instrument_keys)}
+
+    async def mode_loop(self):
+        """Promotes/demotes instruments and publishes bandwidth metrics to FEED_MODES."""
+        while True:
+            await asyncio.sleep(settings.FEED_MODE_INTERVAL_SECONDS)
+            try:
+                signaled = await asyncio.to_thread(self.modes.fetch_signals)
+                for mode, keys in self.modes.rebalance(signaled).items():
+                    await self.websocket.send(self.feed_request("change_mode", mode, keys))
+                    print(f"DEBUG: Switched {len(keys)} instruments to '{mode}'.")
+                await asyncio.to_thread(redis_client.set, "FEED_MODES", json.dumps(self.modes.stats()))
+            except Exception as e:
+                print(f"Error changing feed modes: {e}")
 
     def decode_protobuf(self, buffer):
         """Decode protobuf message."""
@@ -44,19 +87,11 @@ class MarketFeed:
         self.instrument_keys.extend(instrument_keys)
         # Remove duplicates
         self.instrument_keys = list(set(self.instrument_keys))
+        self.save_instruments()
 
-        data = {
-            "guid": "someguid",
-            "method": "sub",
-            "data": {
-                "mode": "full",
-                "instrumentKeys": instrument_keys
-            }
-        }
-        
         try:
-            binary_data = json.dumps(data).encode('utf-8')
-            await self.websocket.send(binary_data)
+            for mode, keys in (await self.subscription_groups(instrument_keys)).items():
+                await self.websocket.send(self.feed_request("sub", mode, keys))
             print("DEBUG: Subscription request sent.")
         except Exception as e:
             print(f"Error sending subscription: {e}")
@@ -70,44 +105,62 @@ class MarketFeed:
         ssl_context.check_hostname = False
         ssl_context.verify_mode = ssl.CERT_NONE
 
+        mode_task = None
         try:
             # Get market data feed authorization
             response = await self.get_market_data_feed_authorize_v3()
             ws_url = response["data"]["authorized_redirect_uri"]
             
+            self.save_instruments()
+
             async with websockets.connect(ws_url, ssl=ssl_context) as websocket:
                 self.websocket = websocket
                 print('DEBUG: Connection established')
 
                 await asyncio.sleep(1)  # Wait for 1 second
 
-                # Data to be sent over the WebSocket
-                data = {
-                    "guid": "someguid",
-                    "method": "sub",
-                    "data": {
-                        "mode": "full",
-                        "instrumentKeys": self.instrument_keys
-                    }
-                }
+                # Subscribe, one request per mode
+                if settings.FEED_ADAPTIVE_MODES:
+                    from app.services.feed_modes import ModeManager
 
-                # Convert data to binary and send over WebSocket
-                binary_data = json.dumps(data).encode('utf-8')
-                await websocket.send(binary_data)
+                    self.modes = ModeManager()
+                    mode_task = asyncio.create_task(self.mode_loop())
+                for mode, keys in (await self.subscription_groups(self.instrument_keys)).items():
+                    await websocket.send(self.feed_request("sub", mode, keys))
 
                 # Continuously receive and decode data from WebSocket
                 while True:
                     message = await websocket.recv()
+                    if self.fence and not self.fence():
+                        # Lease term may have expired: another leader could be streaming
+                        self.fenced += 1
+                        continue
                     decoded_data = self.decode_protobuf(message)
+                    if self.modes:
+                        self.modes.observe(decoded_data)
+                    for key in self.spot_keys.intersection(decoded_data.feeds):
+                        ltp = feed_ltp(decoded_data.feeds[key])
+                        if ltp:
+                            self.spots[key] = (ltp, time.time())
+                    if decoded_data.type == pb.market_info:
+                        market_session.record_feed_status({
+                            segment: pb.MarketStatus.Name(status)
+                            for segment, status in decoded_data.marketInfo.segmentStatus.items()
+                        })
 
                     # Convert the decoded data to a dictionary
                     data_dict = MessageToDict(decoded_data)
 
-                    # Publish to Redis
-                    redis_client.publish("live_ticks", json.dumps(data_dict))
+                    # Publish to the tick bus
+                    bus.publish(LIVE_TICKS, json.dumps(data_dict))
                     
         except asyncio.CancelledError:
             print("DEBUG: WebSocket stream cancelled.")
         except Exception as e:
             print(f"Error in WebSocket stream: {e}")
+        finally:
+            if mode_task:
+                mode_task.cancel()
+            if self.modes:
+                self.modes.close()
 
@@ -0,0 +1,40 @@
+import itertools
+from fastapi import FastAPI, Request
+
+# Minimal stand-in for the Upstox order API, for tests and benchmarks:
+#   uvicorn app.services.mock_broker:app --port 8081
+# Orders are accepted and filled immediately at MOCK_FILL_PRICE.
+
+MOCK_FILL_PRICE = 100.0
+
+app = FastAPI(title="Mock Broker")
+orders = {}
+ids = itertools.count(1)
+
+@app.get("/v2/user/profile")
+def profile():
+    return {"status": "success", "data": {"user_id": "MOCK"}}
+
+@app.post("/v2/order/place")
+async def place_order(request: Request):
+    body = await request.json()
+    if body.get("quantity", 0) <= 0:
+        return {"status": "error", "errors": [{"message": "Quantity must be positive"}]}
+    order_id = f"MOCK-{next(ids)}"
+    orders[order_id] = {
+        "order_id": order_id,
+        "status": "complete",
+        "quantity": body["quantity"],
+        "filled_quantity": body["quantity"],
+        "average_price": body.get("price") or MOCK_FILL_PRICE,
+        "instrument_token": body.get("instrument_token"),
+        "transaction_type": body.get("transaction_type"),
+    }
+    return {"status": "success", "data": {"order_id": order_id}}
+
+@app.get("/v2/order/details")
+def order_details(order_id: str):
+    order = orders.get(order_id)
+    if not order:
+        return {"status": "error", "errors": [{"message": "Order not found"}]}
+    return {"status": "success", "data": order}
@@ -1,125 +1,143 @@
-import json
 import asyncio
-import math
+import time
+from app.core.config import settings
 from app.core.redis_client import redis_client
+from app.services.contract_manager import grid_field, underlying_name
+from app.core.ticks import get_latest_ticks
 
 class MorningSetup:
-    def __init__(self, market_feed):
+    def __init__(self, market_feed, underlyings=None):
         self.market_feed = market_feed
+        # {underlying key: {"name", "step", "width"}}, see MORNING_UNDERLYINGS
+        self.underlyings = underlyings or settings.MORNING_UNDERLYINGS
 
-    async def get_spot_price(self, symbol="NSE_INDEX|Nifty 50"):
+    def feed_spots(self, symbols):
+        """Latest LTPs the feed itself saw (MarketFeed.spots), when not older than SPOT_MAX_AGE_SECONDS."""
+        seen = self.market_feed.spots
+        oldest = time.time() - settings.SPOT_MAX_AGE_SECONDS
+        return {symbol: seen[symbol][0] for symbol in symbols if symbol in seen and seen[symbol][1] >= oldest}
+
+    async def get_spot_prices(self, symbols, timeout=None):
         """
-        Fetches the latest LTP for the symbol from Redis 'live_ticks' channel.
-        Waits for up to 5 seconds for a tick.
+        Fetches the latest LTP of every symbol from the conflated TICK:{symbol}
+        hashes (see app/worker/conflator.py), one pipelined read per poll,
+        falling back to the feed's own last ticks when the conflator isn't
+        running. Waits up to `timeout` seconds for all of them; missing ones
+        are left out.
         """
-        print(f"DEBUG: Waiting for tick for {symbol}...")
-        pubsub = redis_client.pubsub()
-        pubsub.subscribe("live_ticks")
+        timeout = settings.MORNING_SPOT_TIMEOUT if timeout is None else timeout
+        print(f"DEBUG: Waiting for ticks for {symbols}...")
+        end_time = asyncio.get_event_loop().time() + timeout
+        spots = {}
 
         try:
-            # Wait for a few seconds to get a tick
-            # We use a loop with timeout
-            end_time = asyncio.get_event_loop().time() + 5.0
-            
-            while asyncio.get_event_loop().time() < end_time:
-                message = pubsub.get_message(ignore_subscribe_messages=True)
-                if message:
-                    data = json.loads(message['data'])
-                    # Check if it matches our symbol (assuming data has instrument_key or similar)
-                    # The protobuf structure usually has 'instrument_key' or we can infer.
-                    # Based on feed_service, we publish the full dict.
-                    # Let's check the structure. Usually 'instrument_key' or 'key'.
-                    # If we can't verify symbol, we might assume it's the one we want if we only subscribed to one.
-                    # But we might be subscribed to many.
-                    # Let's assume 'instrument_key' is present.
-                    if data.get("instrument_key") == symbol or data.get("instrument_token") == symbol:
-                        # Extract LTP
-                        # Protobuf 'feeds' -> 'ltpc' -> 'ltp'
-                        # Or 'feeds' -> 'ff' -> 'marketFF' -> 'ltpc' -> 'ltp'
-                        # Structure varies by mode. 'full' mode has 'feeds'.
-                        feeds = data.get("feeds")
-                        if feeds:
-                            # It's a map of instrument_key -> feed
-                            feed = feeds.get(symbol)
-                            if feed:
-                                ltp = feed.get("ltpc", {}).get("ltp")
-                                if ltp:
-                                    return float(ltp)
-                
-                await asyncio.sleep(0.1)
-                
+            while True:
+                waiting = [symbol for symbol in symbols if symbol not in spots]
+                ticks = await asyncio.to_thread(get_latest_ticks, waiting, settings.SPOT_MAX_AGE_SECONDS)
+                spots.update({symbol: tick["ltp"] for symbol, tick in ticks.items() if tick.get("ltp")})
+                spots.update(self.feed_spots([symbol for symbol in waiting if symbol not in spots]))
+                if len(spots) == len(symbols) or asyncio.get_event_loop().time() >= end_time:
+                    break
+                await asyncio.sleep(settings.CONFLATE_INTERVAL_MS / 1000)
+
         except Exception as e:
-            print(f"Error fetching spot price: {e}")
-        finally:
-            pubsub.close()
-            
-        return None
+            print(f"Error fetching spot prices: {e}")
+
+        return spots
+
+    async def get_spot_price(self, symbol="NSE_INDEX|Nifty 50"):
+        return (await self.get_spot_prices([symbol])).get(symbol)
+
+    def build_grid(self, spot, step, width):
+        """ATM (spot rounded to the strike step) +/- `width` strikes."""
+        atm = round(spot / step) * step
+        return atm, [atm + i * step for i in range(-width, width + 1)]
+
+    def resolve_grids(self, grids):
+        """
+        Looks up every grid in one round trip (an HMGET per CONTRACT_GRID hash).
+        `grids` is {underlying key: [strikes]}; returns {underlying key: ([instrument keys], [missing])}.
+        """
+        fields = {key: [grid_field(strike, opt_type) for strike in strikes for opt_type in ("CE", "PE")]
+                  for key, strikes in grids.items()}
+        pipe = redis_client.pipeline(transaction=False)
+        for key, names in fields.items():
+            pipe.hmget(f"CONTRACT_GRID:{underlying_name(key)}", names)
+
+        resolved = {}
+        for (key, names), values in zip(fields.items(), pipe.execute()):
+            resolved[key] = (
+                [value for value in values if value],
+                [name for name, value in zip(names, values) if not value],
+            )
+        return resolved
 
     async def setup_morning_strikes(self):
         """
-        Main logic for morning setup.
+        Main logic for morning setup, for every configured underlying at once:
+        1. Subscribe underlyings the feed doesn't carry yet (their spot is needed)
+        2. Wait for all spots together
+        3. ATM +/- width strikes per underlying, with its own strike step
+        4. Resolve all grids in one batched contract-cache lookup
+        5. Subscribe the union in one request
         """
-        print("DEBUG: Starting Morning Setup...")
-        
-        # 1. Get Spot Price
-        spot_price = await self.get_spot_price("NSE_INDEX|Nifty 50")
-        if not spot_price:
-            print("ERROR: Could not fetch Spot Price for Nifty 50.")
-            return {"status": "error", "message": "Could not fetch Spot Price"}
-            
-        print(f"DEBUG: Spot Price: {spot_price}")
-        
-        # 2. Calculate ATM
-        # Round to nearest 50
-        atm = round(spot_price / 50) * 50
-        print(f"DEBUG: Calculated ATM: {atm}")
-        
-        # 3. Generate Grid (ATM +/- 2)
-        # [ATM-100, ATM-50, ATM, ATM+50, ATM+100]
-        strikes = [atm - 100, atm - 50, atm, atm + 50, atm + 100]
-        print(f"DEBUG: Strike Grid: {strikes}")
-        
+        started = time.perf_counter()
+        print(f"DEBUG: Starting Morning Setup for {list(self.underlyings)}...")
+        if not self.market_feed:
+            return {"status": "error", "message": "Market Feed not active"}
+
+        # 1. Underlyings must tick before we can find ATM
+        self.market_feed.spot_keys.update(self.underlyings)
+        missing = [key for key in self.underlyings if key not in self.market_feed.instrument_keys]
+        if missing:
+            await self.market_feed.subscribe_instruments(missing)
+
+        # 2. Spot Prices
+        spots = await self.get_spot_prices(list(self.underlyings))
+
+        # 3. Grids
+        results, grids = {}, {}
+        for key, config in self.underlyings.items():
+            spot = spots.get(key)
+            if not spot:
+                print(f"ERROR: Could not fetch Spot Price for {key}.")
+                results[key] = {
+                    "status": "error",
+                    "message": "Could not fetch Spot Price: no tick from the feed or the conflator "
+                               "(python -m app.worker.conflator) within MORNING_SPOT_TIMEOUT"
+                }
+                continue
+            atm, strikes = self.build_grid(spot, config["step"], config["width"])
+            grids[key] = strikes
+            results[key] = {"spot": spot, "atm": atm, "strikes": strikes}
+
         # 4. Fetch Keys from Redis
-        # Key Format: CONTRACT:NIFTY:{expiry}:{strike}:{type}
-        # We search for CONTRACT:NIFTY:*:{strike}:{type}
         instrument_keys = []
-        
-        for strike in strikes:
-            for opt_type in ["CE", "PE"]:
-                pattern = f"CONTRACT:NIFTY:*:{strike}:{opt_type}"
-                keys = redis_client.keys(pattern)
-                
-                if keys:
-                    # We expect only one key because contract_manager stores only nearest expiry
-                    # But if there are stale keys, we might get multiple.
-                    # We should pick the one with the nearest expiry if possible, 
-                    # but contract_manager logic implies only one set is stored (or we should clear old ones).
-                    # For now, take the first one.
-                    key = keys[0]
-                    value_json = redis_client.get(key)
-                    if value_json:
-                        value = json.loads(value_json)
-                        instr_key = value.get("instrument_key")
-                        if instr_key:
-                            instrument_keys.append(instr_key)
-                else:
-                    print(f"WARNING: No contract found for {strike} {opt_type}")
+        for key, (keys, not_found) in (await asyncio.to_thread(self.resolve_grids, grids)).items():
+            instrument_keys.extend(keys)
+            results[key]["status"] = "success" if keys else "error"
+            results[key]["instruments"] = len(keys)
+            if not_found:
+                print(f"WARNING: No contract found for {underlying_name(key)} {not_found}")
+                results[key]["missing"] = not_found
 
         if not instrument_keys:
             print("ERROR: No instrument keys found. Did you run /refresh-contracts?")
-            return {"status": "error", "message": "No instrument keys found"}
+            return {"status": "error", "message": "No instrument keys found", "underlyings": results}
 
         # 5. Subscribe
-        if self.market_feed:
-            await self.market_feed.subscribe_instruments(instrument_keys)
-            msg = f"✅ Morning Grid Locked: ATM {atm} | Tracks: {strikes}"
-            print(msg)
-            return {
-                "status": "success", 
-                "message": msg,
-                "atm": atm,
-                "strikes": strikes,
-                "subscribed_keys": instrument_keys
-            }
-        else:
-            return {"status": "error", "message": "Market Feed not active"}
+        await self.market_feed.subscribe_instruments(instrument_keys)
+        setup_ms = (time.perf_counter() - started) * 1000
+        locked = [
+            f"{underlying_name(key)} ATM {result['atm']}"
+            for key, result in results.items() if result["status"] == "success"
+        ]
+        msg = f"✅ Morning Grid Locked: {' | '.join(locked)} ({setup_ms:.0f} ms)"
+        print(msg)
+        return {
+            "status": "success",
+            "message": msg,
+            "underlyings": results,
+            "subscribed_keys": instrument_keys,
+            "setup_ms": round(setup_ms, 1),
+        }
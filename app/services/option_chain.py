@@ -0,0 +1,295 @@
+import json
+import time
+import numpy as np
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.core.bus import bus, CHAIN_UPDATES
+from app.core.session import trading_day
+from app.services.contract_manager import get_instrument_meta
+
+# OI build-up classification (price change vs OI change since the reference)
+LONG_BUILDUP = "LONG_BUILDUP"  # Price up, OI up
+SHORT_BUILDUP = "SHORT_BUILDUP"  # Price down, OI up
+SHORT_COVERING = "SHORT_COVERING"  # Price up, OI down
+LONG_UNWINDING = "LONG_UNWINDING"  # Price down, OI down
+NEUTRAL = "NEUTRAL"
+
+CALL, PUT = 0, 1
+
+
+def classify_buildup(price_change, oi_change):
+    if oi_change > 0:
+        return LONG_BUILDUP if price_change > 0 else SHORT_BUILDUP if price_change < 0 else NEUTRAL
+    if oi_change < 0:
+        return SHORT_COVERING if price_change > 0 else LONG_UNWINDING if price_change < 0 else NEUTRAL
+    return NEUTRAL
+
+
+class OptionChain:
+    """
+    Live aggregate for one underlying/expiry.
+
+    Per-strike state lives in [2, n_strikes] arrays (row 0 = CE, row 1 = PE).
+    Totals and the max-pain vector are adjusted by the delta of each changed
+    strike, so a tick costs O(changed strikes) bookkeeping plus one O(n)
+    vector add per OI change, never a full-chain recompute.
+    """
+
+    def __init__(self, underlying, expiry, strikes):
+        self.underlying = underlying
+        self.expiry = expiry
+        self.spot = 0.0
+        self.updated_at = 0.0
+        self.set_strikes(sorted(strikes))
+
+    def set_strikes(self, strikes):
+        """(Re)builds arrays for a new strike list, keeping known values."""
+        old = self.__dict__.get("index")
+        old_state = None
+        if old:
+            old_state = {name: getattr(self, name) for name in ("oi", "volume", "ltp", "iv", "ref_oi", "ref_ltp")}
+
+        self.strikes = np.array(strikes, dtype=float)
+        self.index = {strike: i for i, strike in enumerate(strikes)}
+        shape = (2, len(strikes))
+        self.oi = np.zeros(shape)
+        self.volume = np.zeros(shape)
+        self.ltp = np.zeros(shape)
+        self.iv = np.zeros(shape)
+        self.ref_oi = np.zeros(shape)
+        self.ref_ltp = np.zeros(shape)
+
+        if old_state:
+            for strike, i in old.items():
+                j = self.index[strike]
+                for name, values in old_state.items():
+                    getattr(self, name)[:, j] = values[:, i]
+
+        # Writer payoff at settlement price K_k for one contract at strike K_i
+        settle = self.strikes[:, None]
+        self.call_payoff = np.maximum(settle - self.strikes[None, :], 0)  # [k, i]
+        self.put_payoff = np.maximum(self.strikes[None, :] - settle, 0)
+        self.pain = self.call_payoff @ self.oi[CALL] + self.put_payoff @ self.oi[PUT]
+        self.total_oi = self.oi.sum(axis=1)
+        self.total_volume = self.volume.sum(axis=1)
+
+    def update(self, strike, side, ltp, oi, volume, iv):
+        i = self.index[strike]
+
+        # ltpc-mode ticks carry no OI/volume (0): keep the last known values
+        oi_change = oi - self.oi[side, i] if oi else 0
+        if oi_change:
+            self.total_oi[side] += oi_change
+            payoff = self.call_payoff if side == CALL else self.put_payoff
+            self.pain += oi_change * payoff[:, i]
+            self.oi[side, i] = oi
+            if not self.ref_oi[side, i]:
+                self.ref_oi[side, i] = oi
+
+        volume_change = volume - self.volume[side, i] if volume else 0
+        if volume_change:
+            self.total_volume[side] += volume_change
+            self.volume[side, i] = volume
+
+        if ltp:
+            self.ltp[side, i] = ltp
+            if not self.ref_ltp[side, i]:
+                self.ref_ltp[side, i] = ltp
+        if iv:
+            self.iv[side, i] = iv
+
+        self.updated_at = time.time()
+
+    def roll_reference(self):
+        """Current OI/price become the baseline for build-up classification."""
+        self.ref_oi = self.oi.copy()
+        self.ref_ltp = self.ltp.copy()
+
+    def atm_index(self):
+        if self.spot:
+            return int(np.abs(self.strikes - self.spot).argmin())
+        # No spot yet: the strike where call and put premiums cross
+        both = (self.ltp[CALL] > 0) & (self.ltp[PUT] > 0)
+        if not both.any():
+            return len(self.strikes) // 2
+        gap = np.where(both, np.abs(self.ltp[CALL] - self.ltp[PUT]), np.inf)
+        return int(gap.argmin())
+
+    def max_pain(self):
+        if not self.total_oi.any():
+            return None
+        return float(self.strikes[int(self.pain.argmin())])
+
+    def iv_skew(self, steps=None):
+        """
+        OTM put IV minus OTM call IV, `steps` strikes either side of ATM.
+        Positive = downside protection is bid.
+        """
+        steps = steps or settings.CHAIN_SKEW_STEPS
+        atm = self.atm_index()
+        put_i, call_i = atm - steps, atm + steps
+        if put_i < 0 or call_i >= len(self.strikes):
+            return None
+        put_iv, call_iv = self.iv[PUT, put_i], self.iv[CALL, call_i]
+        if not put_iv or not call_iv:
+            return None
+        return float(put_iv - call_iv)
+
+    def snapshot(self):
+        oi_change = self.oi - self.ref_oi
+        ltp_change = self.ltp - self.ref_ltp
+        total_call_oi, total_put_oi = self.total_oi
+        total_call_volume, total_put_volume = self.total_volume
+
+        return {
+            "underlying": self.underlying,
+            "expiry": self.expiry,
+            "spot": self.spot,
+            "atm": float(self.strikes[self.atm_index()]) if len(self.strikes) else None,
+            "pcr_oi": float(total_put_oi / total_call_oi) if total_call_oi else None,
+            "pcr_volume": float(total_put_volume / total_call_volume) if total_call_volume else None,
+            "max_pain": self.max_pain(),
+            "iv_skew": self.iv_skew(),
+            "updated_at": self.updated_at,
+            "strikes": [
+                {
+                    "strike": float(strike),
+                    "call_oi": float(self.oi[CALL, i]),
+                    "put_oi": float(self.oi[PUT, i]),
+                    "call_oi_change": float(oi_change[CALL, i]),
+                    "put_oi_change": float(oi_change[PUT, i]),
+                    "call_buildup": classify_buildup(ltp_change[CALL, i], oi_change[CALL, i]),
+                    "put_buildup": classify_buildup(ltp_change[PUT, i], oi_change[PUT, i]),
+                    "call_ltp": float(self.ltp[CALL, i]),
+                    "put_ltp": float(self.ltp[PUT, i]),
+                    "call_iv": float(self.iv[CALL, i]),
+                    "put_iv": float(self.iv[PUT, i]),
+                }
+                for i, strike in enumerate(self.strikes)
+            ],
+        }
+
+
+class OptionChainBook:
+    """
+    All live chains, fed from parsed tick batches in the resampler.
+    Changed chains are published (throttled) to Redis key CHAIN:{underlying}:{expiry}
+    and the 'chain_updates' bus, where the API and strategies read them. The
+    expiries with a live chain are kept in the set CHAIN_EXPIRIES:{underlying}.
+    """
+
+    def __init__(self, publish_interval_ms=None):
+        self.chains = {}  # {(underlying, expiry): OptionChain}
+        self.contracts = {}  # {instrument_key: (chain_key, strike, side)}
+        self.spot_keys = {}  # {instrument_key: underlying}
+        self.unknown = {}  # {key not in the contract cache: when to look it up again (monotonic)}
+        self.dirty = set()
+        self.publish_interval = (publish_interval_ms or settings.CHAIN_PUBLISH_INTERVAL_MS) / 1000
+        self.last_publish = 0.0
+
+    def register(self, instrument_keys):
+        now = time.monotonic()
+        new_keys = [
+            k for k in instrument_keys
+            if k not in self.contracts and k not in self.spot_keys and self.unknown.get(k, 0) <= now
+        ]
+        if not new_keys:
+            return
+
+        new_strikes = {}
+        for key, info in get_instrument_meta(new_keys).items():
+            if info.get("strike") is None:
+                self.spot_keys[key] = info["underlying"]
+                continue
+            chain_key = (info["underlying"], info["expiry"])
+            strike = float(info["strike"])
+            self.contracts[key] = (chain_key, strike, CALL if info["option_type"] == "CE" else PUT)
+            new_strikes.setdefault(chain_key, set()).add(strike)
+        # Subscribed before the contract refresh: retried every CONTRACT_RETRY_SECONDS
+        for key in new_keys:
+            if key in self.contracts or key in self.spot_keys:
+                self.unknown.pop(key, None)
+            else:
+                self.unknown[key] = now + settings.CONTRACT_RETRY_SECONDS
+
+        for chain_key, strikes in new_strikes.items():
+            chain = self.chains.get(chain_key)
+            if chain is None:
+                self.chains[chain_key] = OptionChain(chain_key[0], chain_key[1], strikes)
+            elif not strikes.issubset(chain.index):
+                chain.set_strikes(sorted(strikes.union(chain.index)))
+
+    def update(self, parsed_batch):
+        """
+        Applies a batch {instrument_key: parsed_tick}; only touched strikes change.
+        """
+        self.register(parsed_batch)
+
+        for key, parsed in parsed_batch.items():
+            underlying = self.spot_keys.get(key)
+            if underlying:
+                for (chain_underlying, _), chain in self.chains.items():
+                    if chain_underlying == underlying:
+                        chain.spot = parsed["ltp"]
+                continue
+
+            contract = self.contracts.get(key)
+            if contract:
+                chain_key, strike, side = contract
+                self.chains[chain_key].update(
+                    strike, side, parsed["ltp"], parsed["oi"], parsed["vtt"], parsed["iv"]
+                )
+                self.dirty.add(chain_key)
+
+    def roll_reference(self):
+        for chain in self.chains.values():
+            chain.roll_reference()
+
+    def publish_due(self, now=None):
+        """
+        Publishes changed chains at most once per CHAIN_PUBLISH_INTERVAL_MS.
+        """
+        now = now if now is not None else time.time()
+        if not self.dirty or now - self.last_publish < self.publish_interval:
+            return 0
+
+        messages = []
+        pipe = redis_client.pipeline(transaction=False)
+        for underlying, expiry in self.dirty:
+            payload = json.dumps(self.chains[(underlying, expiry)].snapshot(), separators=(",", ":"))
+            pipe.set(f"CHAIN:{underlying}:{expiry}", payload, ex=settings.CHAIN_TTL_SECONDS)
+            pipe.sadd(f"CHAIN_EXPIRIES:{underlying}", expiry)
+            pipe.expire(f"CHAIN_EXPIRIES:{underlying}", settings.CHAIN_TTL_SECONDS)
+            messages.append(payload)
+        pipe.execute()
+        bus.publish_many(CHAIN_UPDATES, messages)
+
+        published = len(self.dirty)
+        self.dirty = set()
+        self.last_publish = now
+        return published
+
+
+def get_chain_snapshot(underlying, expiry=None):
+    """
+    Latest published chain for an underlying (nearest live expiry unless given).
+    """
+    if expiry:
+        value = redis_client.get(f"CHAIN:{underlying}:{expiry}")
+        return json.loads(value) if value else None
+
+    # Expiry dates are ISO strings, so they sort and compare as dates
+    today = trading_day().isoformat()
+    expiries_key = f"CHAIN_EXPIRIES:{underlying}"
+    expiries = sorted(redis_client.smembers(expiries_key))
+    expired = [expiry for expiry in expiries if expiry < today]
+    if expired:
+        redis_client.srem(expiries_key, *expired)
+
+    for expiry in expiries:
+        if expiry < today:
+            continue
+        value = redis_client.get(f"CHAIN:{underlying}:{expiry}")
+        if value:
+            return json.loads(value)
+    return None
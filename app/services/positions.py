@@ -0,0 +1,215 @@
+import json
+import time
+import numpy as np
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.core.bus import bus, PNL_UPDATES
+from app.services.brokers import PENDING, OPEN
+from app.services.contract_manager import get_instrument_meta
+
+INITIAL_SLOTS = 64
+
+
+class PositionBook:
+    """
+    Live positions and mark-to-market P&L.
+
+    Every instrument traded (or held) gets a slot in flat numpy arrays:
+    net quantity, average price, realized P&L, last price and Greeks. A tick
+    batch only writes the marks of held instruments and the whole book is
+    revalued with a few vector operations; no per-tick dicts are built.
+    Risk limits are checked against the same arrays, plus the unfilled
+    quantity of working orders, before an order leaves.
+    """
+
+    def __init__(self, max_loss=None, max_lots_per_underlying=None):
+        self.max_loss = settings.RISK_MAX_LOSS if max_loss is None else max_loss
+        self.max_lots = settings.RISK_MAX_LOTS_PER_UNDERLYING if max_lots_per_underlying is None else max_lots_per_underlying
+        self.slots = {}  # {instrument_key: slot}
+        self.symbols = []  # slot -> instrument_key
+        self.underlyings = {}  # {underlying: id}
+        self.working = {}  # {order_id: (slot, unfilled quantity)} for BUY orders not yet done
+        self.count = 0
+        self.allocate(INITIAL_SLOTS)
+        self.last_publish = 0.0
+        self.totals = self.revalue()
+
+    def allocate(self, size):
+        def grow(name, dtype):
+            array = np.zeros(size, dtype=dtype)
+            if hasattr(self, name):
+                array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+
+        grow("qty", np.int64)
+        grow("avg_price", np.float64)
+        grow("realized", np.float64)
+        grow("ltp", np.float64)
+        grow("delta", np.float64)
+        grow("gamma", np.float64)
+        grow("vega", np.float64)
+        grow("lot_size", np.int64)
+        grow("underlying_id", np.int32)
+
+    def slot(self, symbol):
+        index = self.slots.get(symbol)
+        if index is not None:
+            return index
+        if self.count == len(self.qty):
+            self.allocate(len(self.qty) * 2)
+
+        meta = get_instrument_meta([symbol]).get(symbol, {})
+        underlying = meta.get("underlying", symbol)
+        index = self.slots[symbol] = self.count
+        self.symbols.append(symbol)
+        self.lot_size[index] = int(meta.get("lot_size") or 1)
+        self.underlying_id[index] = self.underlyings.setdefault(underlying, len(self.underlyings))
+        self.count += 1
+        return index
+
+    # --- Fills ---
+
+    def apply_fill(self, symbol, side, qty, price):
+        """
+        Books a fill. Closing quantity realizes P&L against the average
+        price; opening quantity moves the average.
+        """
+        i = self.slot(symbol)
+        signed = qty if side == "BUY" else -qty
+        held = int(self.qty[i])
+
+        if held == 0 or (held > 0) == (signed > 0):
+            total = held + signed
+            self.avg_price[i] = (self.avg_price[i] * abs(held) + price * qty) / abs(total)
+            self.qty[i] = total
+        else:
+            closing = min(qty, abs(held))
+            direction = 1 if held > 0 else -1
+            self.realized[i] += (price - self.avg_price[i]) * closing * direction
+            total = held + signed
+            self.qty[i] = total
+            if total == 0:
+                self.avg_price[i] = 0.0
+            elif (total > 0) != (held > 0):
+                # Flipped through zero: the remainder opens at the fill price
+                self.avg_price[i] = price
+        if not self.ltp[i]:
+            self.ltp[i] = price
+
+    # --- Marks ---
+
+    def on_feed(self, data):
+        """
+        Marks held instruments from one FeedResponse dict (any subscription mode).
+        """
+        feeds = data.get("feeds", {})
+        held = [(self.slots[symbol], feed) for symbol, feed in feeds.items() if symbol in self.slots]
+        if not held:
+            return
+
+        count = len(held)
+        slots = np.fromiter((i for i, _ in held), dtype=np.int64, count=count)
+        values = np.empty((4, count))
+        for j, (_, feed) in enumerate(held):
+            full = feed.get("fullFeed", {})
+            market = full.get("marketFF") or feed.get("firstLevelWithGreeks") or full.get("indexFF") or feed
+            greeks = market.get("optionGreeks") or {}
+            values[0, j] = market.get("ltpc", {}).get("ltp", 0)
+            values[1, j] = greeks.get("delta", 0)
+            values[2, j] = greeks.get("gamma", 0)
+            values[3, j] = greeks.get("vega", 0)
+
+        # Keep the previous mark where a field is missing from this tick
+        for row, array in zip(values, (self.ltp, self.delta, self.gamma, self.vega)):
+            known = row != 0
+            array[slots[known]] = row[known]
+        self.totals = self.revalue()
+
+    def revalue(self):
+        n = self.count
+        qty = self.qty[:n]
+        unrealized = (self.ltp[:n] - self.avg_price[:n]) * qty
+        realized = float(self.realized[:n].sum())
+        return {
+            "realized": realized,
+            "unrealized": float(unrealized.sum()),
+            "pnl": realized + float(unrealized.sum()),
+            "delta": float((self.delta[:n] * qty).sum()),
+            "gamma": float((self.gamma[:n] * qty).sum()),
+            "vega": float((self.vega[:n] * qty).sum()),
+            "open_positions": int(np.count_nonzero(qty)),
+        }
+
+    # --- Risk ---
+
+    def lots_by_underlying(self):
+        n = self.count
+        lots = np.abs(self.qty[:n]) // np.maximum(self.lot_size[:n], 1)
+        return np.bincount(self.underlying_id[:n], weights=lots, minlength=len(self.underlyings))
+
+    def working_lots(self, underlying_id):
+        return sum(
+            unfilled // max(int(self.lot_size[i]), 1)
+            for i, unfilled in self.working.values() if self.underlying_id[i] == underlying_id
+        )
+
+    def track_order(self, order):
+        """
+        Counts a sent BUY order's unfilled quantity against its underlying
+        until it is filled, cancelled or rejected. Called by the gateway on
+        every order state change.
+        """
+        unfilled = order["quantity"] - order["filled_qty"]
+        if order["side"] == "BUY" and order["status"] in (PENDING, OPEN) and unfilled > 0:
+            self.working[order["order_id"]] = (self.slot(order["symbol"]), unfilled)
+        else:
+            self.working.pop(order["order_id"], None)
+
+    def check_order(self, order):
+        """
+        Pre-trade risk check (OrderGateway.checks). Returns a rejection
+        reason or None.
+        """
+        if self.max_loss and self.totals["pnl"] <= -self.max_loss:
+            return f"Max loss reached ({self.totals['pnl']:.2f})"
+
+        if self.max_lots and order["side"] == "BUY":
+            i = self.slot(order["symbol"])
+            underlying_id = self.underlying_id[i]
+            # Working orders count too, or a burst of signals overshoots before the fills arrive
+            held = self.lots_by_underlying()[underlying_id] + self.working_lots(underlying_id)
+            if held + order["lots"] > self.max_lots:
+                return f"Max lots per underlying ({held:.0f} + {order['lots']} > {self.max_lots})"
+        return None
+
+    # --- Publishing ---
+
+    def snapshot(self):
+        n = self.count
+        held = np.flatnonzero(self.qty[:n] | (self.realized[:n] != 0))
+        return {
+            "ts": time.time(),
+            "totals": self.totals,
+            "positions": [
+                {
+                    "symbol": self.symbols[i],
+                    "qty": int(self.qty[i]),
+                    "avg_price": float(self.avg_price[i]),
+                    "ltp": float(self.ltp[i]),
+                    "unrealized": float((self.ltp[i] - self.avg_price[i]) * self.qty[i]),
+                    "realized": float(self.realized[i]),
+                }
+                for i in held
+            ],
+        }
+
+    def publish_due(self, now=None):
+        """Publishes the P&L snapshot at most every PNL_PUBLISH_INTERVAL_MS."""
+        now = now if now is not None else time.time()
+        if now - self.last_publish < settings.PNL_PUBLISH_INTERVAL_MS / 1000:
+            return False
+        self.last_publish = now
+        payload = json.dumps(self.snapshot())
+        redis_client.set("PNL_SNAPSHOT", payload)
+        bus.publish(PNL_UPDATES, payload)
+        return True
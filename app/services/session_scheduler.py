@@ -0,0 +1,106 @@
+import asyncio
+import json
+import time
+from datetime import datetime
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.core.session import IST, OPEN, CLOSED, market_session, is_trading_day, session_time
+
+
+class SessionScheduler:
+    """
+    Daily lifecycle jobs, run by the feed leader:
+      contracts      from SESSION_CONTRACTS_AT          refresh the contract cache before the open
+      morning_setup  from SESSION_OPEN, once OPEN       lock the ATM grid
+      archive        from SESSION_ARCHIVE_AT, once CLOSED  export the day's candles to Parquet
+
+    Each job runs once per trading day; completions are recorded in
+    SESSION_JOBS:{day} so a new leader doesn't repeat them. Jobs only start
+    within our lease term and are only recorded while the lease is still
+    ours. A failed job is retried every poll, at most SESSION_JOB_ATTEMPTS
+    times a day.
+    """
+
+    def __init__(self, leader, clock=time.time):
+        self.leader = leader
+        self.clock = clock
+        self.jobs = [
+            ("contracts", settings.SESSION_CONTRACTS_AT, None, self.refresh_contracts),
+            ("morning_setup", settings.SESSION_OPEN, OPEN, self.morning_setup),
+            ("archive", settings.SESSION_ARCHIVE_AT, CLOSED, self.archive),
+        ]
+        self.attempts = {}  # {(day, job): attempts}
+        self.phase = None
+
+    async def run(self):
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                print(f"Error in session scheduler: {e}")
+            await asyncio.sleep(settings.SESSION_POLL_SECONDS)
+
+    async def tick(self):
+        phase = market_session.phase()
+        if phase != self.phase:
+            print(f"DEBUG: Market session {self.phase} -> {phase}")
+            self.phase = phase
+
+        local = datetime.fromtimestamp(self.clock(), IST)
+        day = local.date()
+        if not self.leader.lease.valid() or not is_trading_day(day):
+            return
+        minute = local.hour * 60 + local.minute
+        jobs_key = f"SESSION_JOBS:{day.isoformat()}"
+        done = redis_client.hgetall(jobs_key)
+
+        for name, at, required_phase, job in self.jobs:
+            if name in done or minute < session_time(at) or (required_phase and phase != required_phase):
+                continue
+            attempts = self.attempts.get((day, name), 0)
+            if attempts >= settings.SESSION_JOB_ATTEMPTS:
+                continue
+            if not self.leader.lease.valid():
+                return  # A long job outlived our term: leave the rest to the new leader
+            self.attempts[(day, name)] = attempts + 1
+
+            print(f"DEBUG: Running session job '{name}' (attempt {attempts + 1}).")
+            try:
+                result = await job(day)
+            except Exception as e:
+                result = {"error": str(e)}
+            if result.get("error") or result.get("status") == "error":
+                print(f"WARNING: Session job '{name}' failed: {result}")
+                continue
+            entry = json.dumps({"at": int(self.clock()), "result": result})
+
+            def record(pipe):
+                pipe.hset(jobs_key, name, entry)
+                pipe.expire(jobs_key, 7 * 86400)
+
+            if not await asyncio.to_thread(self.leader.lease.if_owner, record):
+                print(f"WARNING: Lost the feed lease, session job '{name}' not recorded.")
+                return
+
+    # --- Jobs ---
+
+    async def refresh_contracts(self, day):
+        from app.services.contract_manager import fetch_and_store_contracts, contract_underlyings
+
+        underlyings = contract_underlyings()
+        counts = await asyncio.gather(*(fetch_and_store_contracts(key) for key in underlyings))
+        return {"contracts_stored": dict(zip(underlyings, counts))}
+
+    async def morning_setup(self, day):
+        result = await self.leader.morning_setup()
+        return {key: value for key, value in result.items() if key != "subscribed_keys"}
+
+    async def archive(self, day):
+        from app.worker.archiver import export_candles
+
+        return {"candles_exported": await export_candles(day)}
+
+    def status(self, day=None):
+        day = day or datetime.fromtimestamp(self.clock(), IST).date()
+        done = redis_client.hgetall(f"SESSION_JOBS:{day.isoformat()}")
+        return {name: json.loads(entry) for name, entry in done.items()}
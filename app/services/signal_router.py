@@ -0,0 +1,158 @@
+import itertools
+import json
+import queue
+import threading
+import time
+import httpx
+from app.core.config import settings
+from app.core.bus import bus as default_bus, TRADE_SIGNALS
+
+# Lower value is delivered first
+SIGNAL_PRIORITY = {"STRONG BUY": 0, "WATCHLIST": 1}
+
+
+class SignalSink:
+    """
+    One delivery target with its own bounded priority queue and thread.
+    A slow or failing sink drops signals (counted) instead of blocking the
+    strategy that produced them.
+    """
+
+    def __init__(self, name, maxsize=None):
+        self.name = name
+        self.queue = queue.PriorityQueue(maxsize=maxsize or settings.SIGNAL_SINK_QUEUE_SIZE)
+        self.sent = 0
+        self.dropped = 0
+        self.errors = 0
+        self.thread = None
+
+    def start(self):
+        if self.thread:
+            return
+        self.thread = threading.Thread(target=self.run, name=f"signal-sink-{self.name}", daemon=True)
+        self.thread.start()
+
+    def offer(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def run(self):
+        while True:
+            _, _, payload = self.queue.get()
+            try:
+                self.send(payload)
+                self.sent += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"Error delivering signal to {self.name}: {e}")
+
+    def send(self, payload):
+        raise NotImplementedError
+
+    def stats(self):
+        return {"sent": self.sent, "dropped": self.dropped, "errors": self.errors, "queued": self.queue.qsize()}
+
+
+class RedisSink(SignalSink):
+    """The 'trade_signals' bus, as before."""
+
+    def __init__(self, bus=None, maxsize=None):
+        super().__init__("redis", maxsize)
+        self.bus = bus or default_bus
+
+    def send(self, payload):
+        self.bus.publish(TRADE_SIGNALS, json.dumps(payload))
+
+
+class WebhookSink(SignalSink):
+    """POSTs each signal as JSON over a keep-alive connection."""
+
+    def __init__(self, url, maxsize=None):
+        super().__init__("webhook", maxsize)
+        self.url = url
+        self.client = httpx.Client(timeout=settings.SIGNAL_WEBHOOK_TIMEOUT)
+
+    def send(self, payload):
+        self.client.post(self.url, json=payload).raise_for_status()
+
+
+class CallbackSink(SignalSink):
+    """In-process delivery, e.g. to WebSocket clients."""
+
+    def __init__(self, name, callback, maxsize=None):
+        super().__init__(name, maxsize)
+        self.callback = callback
+
+    def send(self, payload):
+        self.callback(payload)
+
+
+class SignalRouter:
+    """
+    Sits between strategies and the sinks.
+
+    - Dedup: a symbol repeating its last delivered signal within
+      SIGNAL_DEDUP_SECONDS is suppressed.
+    - Cooldown: after a delivery, a symbol stays quiet for
+      SIGNAL_COOLDOWN_SECONDS unless its signal is upgraded
+      (WATCHLIST -> STRONG BUY).
+    - Priority: every sink drains STRONG BUY ahead of WATCHLIST.
+    """
+
+    def __init__(self, sinks=None, cooldown_seconds=None, dedup_seconds=None, clock=time.monotonic):
+        self.sinks = sinks if sinks is not None else default_sinks()
+        self.cooldown = settings.SIGNAL_COOLDOWN_SECONDS if cooldown_seconds is None else cooldown_seconds
+        self.dedup = settings.SIGNAL_DEDUP_SECONDS if dedup_seconds is None else dedup_seconds
+        self.clock = clock
+        self.last = {}  # {symbol: (signal, delivered_at)}
+        self.sequence = itertools.count()  # FIFO within one priority
+        self.lock = threading.Lock()
+        self.counters = {"submitted": 0, "routed": 0, "suppressed_duplicate": 0, "suppressed_cooldown": 0}
+
+    def start(self):
+        for sink in self.sinks:
+            sink.start()
+        return self
+
+    def admit(self, payload, now):
+        """Returns the suppression reason, or None if the signal goes out."""
+        last = self.last.get(payload["symbol"])
+        if last:
+            signal, delivered_at = last
+            age = now - delivered_at
+            if signal == payload["signal"] and age < self.dedup:
+                return "suppressed_duplicate"
+            upgrade = SIGNAL_PRIORITY.get(payload["signal"], 9) < SIGNAL_PRIORITY.get(signal, 9)
+            if age < self.cooldown and not upgrade:
+                return "suppressed_cooldown"
+        self.last[payload["symbol"]] = (payload["signal"], now)
+        return None
+
+    def submit(self, payload):
+        with self.lock:
+            self.counters["submitted"] += 1
+            reason = self.admit(payload, self.clock())
+            if reason:
+                self.counters[reason] += 1
+                return False
+            self.counters["routed"] += 1
+            item = (SIGNAL_PRIORITY.get(payload["signal"], 9), next(self.sequence), payload)
+
+        for sink in self.sinks:
+            sink.offer(item)
+        return True
+
+    def stats(self):
+        with self.lock:
+            result = dict(self.counters)
+        result["sinks"] = {sink.name: sink.stats() for sink in self.sinks}
+        return result
+
+
+def default_sinks(bus=None):
+    sinks = [RedisSink(bus)]
+    if settings.SIGNAL_WEBHOOK_URL:
+        sinks.append(WebhookSink(settings.SIGNAL_WEBHOOK_URL))
+    return sinks
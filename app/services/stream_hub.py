@@ -0,0 +1,245 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from app.core.config import settings
+from app.core.bus import bus, LIVE_TICKS, CANDLE_CLOSED, TRADE_SIGNALS
+from app.core.codec import decode_candle_batch
+from app.worker.archiver import TICK_COLUMNS, flatten_tick
+
+# Client-facing channel name -> bus channel
+CHANNELS = {"ticks": LIVE_TICKS, "candles": CANDLE_CLOSED, "signals": TRADE_SIGNALS}
+
+# Tick fields sent to dashboards (a subset of the archive row)
+TICK_FIELDS = ("ts", "ltp", "ltq", "vtt", "oi", "best_bid", "best_ask", "total_buy_qty", "total_sell_qty", "iv", "delta")
+TICK_INDEX = [list(TICK_COLUMNS).index(field) for field in TICK_FIELDS]
+
+
+class StreamClient:
+    """
+    One WebSocket connection.
+
+    Updates are conflated per (kind, instrument), last value wins, and sent
+    at most `max_rate` times a second. Ticks are delta-encoded against what
+    this client last received, so an unchanged field is never resent. The
+    pending map is bounded by the subscription size and signals by a fixed
+    backlog, so a slow client just skips intermediate values.
+    """
+
+    def __init__(self, websocket, max_rate=None):
+        self.websocket = websocket
+        self.channels = set()
+        self.instruments = set()
+        self.set_rate(max_rate)
+        self.pending = {}  # {(kind, key): latest data}
+        self.signals = deque(maxlen=settings.WS_SIGNAL_BACKLOG)
+        self.sent = {}  # {instrument: last tick sent}, base for deltas
+        self.wakeup = asyncio.Event()
+        self.frames = 0
+        self.conflated = 0
+
+    def set_rate(self, max_rate):
+        rate = min(max_rate or settings.WS_MAX_RATE_HZ, settings.WS_MAX_RATE_HZ)
+        self.interval = 1.0 / max(rate, 0.1)
+
+    def push(self, kind, key, data):
+        if (kind, key) in self.pending:
+            self.conflated += 1
+        self.pending[(kind, key)] = data
+        self.wakeup.set()
+
+    def push_signal(self, signal):
+        self.signals.append(signal)
+        self.wakeup.set()
+
+    def build_frame(self):
+        """
+        {"t": {instrument: {changed fields}}, "c": {instrument: [candles]}, "s": [signals]}
+        """
+        pending, self.pending = self.pending, {}
+        ticks, candles = {}, {}
+        for (kind, key), data in pending.items():
+            if kind == "tick":
+                last = self.sent.get(key)
+                delta = data if last is None else {f: v for f, v in data.items() if last.get(f) != v}
+                if delta:
+                    ticks[key] = delta
+                    self.sent[key] = data
+            else:
+                symbol, _ = key
+                candles.setdefault(symbol, []).append(data)
+
+        frame = {}
+        if ticks:
+            frame["t"] = ticks
+        if candles:
+            frame["c"] = candles
+        if self.signals:
+            frame["s"] = list(self.signals)
+            self.signals.clear()
+        return json.dumps(frame, separators=(",", ":")) if frame else None
+
+    async def sender(self):
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            frame = self.build_frame()
+            if frame:
+                await self.websocket.send_text(frame)
+                self.frames += 1
+            await asyncio.sleep(self.interval)
+
+
+class StreamHub:
+    """
+    Fans the bus out to WebSocket clients. Each bus channel is read once
+    (by one thread) no matter how many clients are connected; readers decode
+    only instruments somebody subscribed to and hand results to the event
+    loop, where they are routed through per-instrument subscriber indexes.
+    """
+
+    def __init__(self):
+        self.clients = set()
+        self.by_instrument = {"ticks": {}, "candles": {}}  # {kind: {instrument: {clients}}}
+        self.signal_clients = set()
+        self.loop = None
+        self.readers = {}
+        self.messages = 0
+
+    def start(self):
+        if self.readers:
+            return
+        self.loop = asyncio.get_running_loop()
+        for name in CHANNELS:
+            thread = threading.Thread(target=self.read_channel, args=(name,), name=f"ws-{name}", daemon=True)
+            thread.start()
+            self.readers[name] = thread
+        print("DEBUG: StreamHub readers started.")
+
+    # --- Bus side (reader threads) ---
+
+    def decode(self, name, raw):
+        if name == "ticks":
+            wanted = self.by_instrument["ticks"]
+            received_ms = int(time.time() * 1000)
+            updates = []
+            for symbol, feed in json.loads(raw).get("feeds", {}).items():
+                if symbol in wanted:
+                    row = flatten_tick(symbol, feed, received_ms)
+                    updates.append((symbol, {field: row[i] for field, i in zip(TICK_FIELDS, TICK_INDEX)}))
+            return updates
+        if name == "candles":
+            wanted = self.by_instrument["candles"]
+            return [(symbol, candle) for symbol, candle in decode_candle_batch(raw) if symbol in wanted]
+        return [json.loads(raw)]
+
+    def read_channel(self, name):
+        consumer = bus.consumer(CHANNELS[name])
+        while True:
+            try:
+                messages = consumer.read()
+                if not messages or not self.clients:
+                    continue
+                updates = []
+                for _, raw in messages:
+                    updates.extend(self.decode(name, raw))
+                if updates:
+                    self.loop.call_soon_threadsafe(self.route, name, updates)
+            except Exception as e:
+                print(f"Error in StreamHub {name} reader: {e}")
+                time.sleep(1)
+
+    # --- Event loop side ---
+
+    def route(self, name, updates):
+        self.messages += len(updates)
+        if name == "signals":
+            for signal in updates:
+                for client in self.signal_clients:
+                    client.push_signal(signal)
+            return
+
+        index = self.by_instrument[name]
+        for symbol, data in updates:
+            for client in index.get(symbol, ()):
+                if name == "ticks":
+                    client.push("tick", symbol, data)
+                else:
+                    client.push("candle", (symbol, data.get("timeframe", 60)), data)
+
+    def subscribe(self, client, channels, instruments):
+        instruments = list(instruments)[:max(0, settings.WS_MAX_INSTRUMENTS - len(client.instruments))]
+        client.channels.update(name for name in channels if name in CHANNELS)
+        client.instruments.update(instruments)
+        self.reindex(client)
+
+    def unsubscribe(self, client, channels, instruments):
+        client.channels.difference_update(channels)
+        client.instruments.difference_update(instruments)
+        for instrument in instruments:
+            client.sent.pop(instrument, None)
+        self.reindex(client)
+
+    def reindex(self, client):
+        for kind, index in self.by_instrument.items():
+            for instrument in list(index):
+                index[instrument].discard(client)
+                if not index[instrument]:
+                    del index[instrument]
+            if kind in client.channels:
+                for instrument in client.instruments:
+                    index.setdefault(instrument, set()).add(client)
+        if "signals" in client.channels:
+            self.signal_clients.add(client)
+        else:
+            self.signal_clients.discard(client)
+
+    def remove(self, client):
+        client.channels.clear()
+        client.instruments.clear()
+        self.reindex(client)
+        self.clients.discard(client)
+
+    async def serve(self, websocket):
+        """
+        Runs one accepted connection. Client messages:
+        {"action": "subscribe" | "unsubscribe", "channels": [...], "instruments": [...], "max_rate": hz}
+        """
+        self.start()
+        client = StreamClient(websocket)
+        self.clients.add(client)
+        sender = asyncio.create_task(client.sender())
+        try:
+            while True:
+                message = await websocket.receive_json()
+                action = message.get("action")
+                if "max_rate" in message:
+                    client.set_rate(float(message["max_rate"]))
+                if action == "subscribe":
+                    self.subscribe(client, message.get("channels", []), message.get("instruments", []))
+                elif action == "unsubscribe":
+                    self.unsubscribe(client, message.get("channels", []), message.get("instruments", []))
+                await websocket.send_text(json.dumps({
+                    "ack": action,
+                    "channels": sorted(client.channels),
+                    "instruments": len(client.instruments),
+                }))
+        except Exception:
+            # Disconnects surface here as WebSocketDisconnect
+            pass
+        finally:
+            sender.cancel()
+            self.remove(client)
+
+    def stats(self):
+        return {
+            "clients": len(self.clients),
+            "messages_routed": self.messages,
+            "frames_sent": sum(client.frames for client in self.clients),
+            "updates_conflated": sum(client.conflated for client in self.clients),
+            "subscribed_instruments": {kind: len(index) for kind, index in self.by_instrument.items()},
+        }
+
+
+stream_hub = StreamHub()
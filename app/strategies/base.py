@@ -0,0 +1,82 @@
+import importlib
+import json
+import time
+from app.core.bus import TRADE_SIGNALS
+
+HOOKS = ("on_tick", "on_candle", "on_chain_update")
+
+
+class BaseStrategy:
+    """
+    Plugin interface for the strategy host.
+
+    Override any of the hooks; the host only feeds a strategy the streams its
+    hooks need. Thresholds live in self.params (DEFAULT_PARAMS overlaid with
+    the config file) and are replaced in place on hot reload, so hooks should
+    read them from self.params on every call.
+    """
+
+    DEFAULT_PARAMS = {}
+    router = None  # SignalRouter set by the host; None publishes straight to the bus
+    features = None  # FeatureRing of recent 1m candle features, set by the host
+
+    def __init__(self, name=None, params=None, bus=None):
+        self.name = name or type(self).__name__
+        self.bus = bus
+        self.params = dict(self.DEFAULT_PARAMS)
+        self.configure(params or {})
+
+    def configure(self, params):
+        """Called at start-up and whenever the config file changes."""
+        self.params = {**self.DEFAULT_PARAMS, **params}
+
+    def on_tick(self, symbol, tick):
+        """Parsed tick (Resampler.parse_tick format)."""
+
+    def on_candle(self, symbol, candle):
+        """Closed candle of any timeframe; candle["timeframe"] is in seconds."""
+
+    def on_chain_update(self, chain):
+        """Option-chain snapshot (OptionChain.snapshot format)."""
+
+    def get_state(self):
+        """
+        State worth keeping across a restart (picklable), or None. The host
+        snapshots it after every candle batch.
+        """
+        return None
+
+    def set_state(self, state):
+        """Restores what get_state() returned before the restart."""
+
+    @classmethod
+    def handles(cls, hook):
+        return getattr(cls, hook) is not getattr(BaseStrategy, hook)
+
+    @classmethod
+    def subscribes(cls, hook, params):
+        """
+        Whether the host should feed `hook` under these params. Override to
+        make an expensive stream (e.g. ticks) opt-in per configuration.
+        """
+        return cls.handles(hook)
+
+    def publish_signal(self, payload):
+        payload.setdefault("strategy", self.name)
+        # Wall clock, for signal-to-order latency downstream
+        payload.setdefault("emitted_at", time.time())
+        if self.router:
+            self.router.submit(payload)
+        else:
+            self.bus.publish(TRADE_SIGNALS, json.dumps(payload))
+
+
+def load_strategy_class(path):
+    """
+    Imports a strategy class from 'package.module:ClassName'.
+    """
+    module_name, _, class_name = path.partition(":")
+    cls = getattr(importlib.import_module(module_name), class_name)
+    if not (isinstance(cls, type) and issubclass(cls, BaseStrategy)):
+        raise TypeError(f"{path} is not a BaseStrategy")
+    return cls
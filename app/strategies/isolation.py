@@ -0,0 +1,227 @@
+import queue
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from app.core.config import settings
+from app.core.codec import CANDLE_FIELDS
+from app.strategies.base import HOOKS, load_strategy_class
+
+# Spawned children: forking a process that runs bus reader threads is unsafe
+MP_CONTEXT = mp.get_context("spawn")
+
+HEADER_SLOTS = 1  # [write sequence]
+ROW_FIELDS = ("symbol_id", "timeframe") + CANDLE_FIELDS
+
+
+class SharedCandleBuffer:
+    """
+    Ring buffer of closed candles in shared memory, written once by the host
+    and read by every isolated strategy process.
+
+    One float64 row per candle (symbol id, timeframe, CANDLE_FIELDS; exact for
+    integers below 2**53). Header slot 0 holds the total rows written, so a
+    reader can tell which of its rows were overwritten before it got to them.
+    Symbol names are assigned ids by the writer; each notification carries
+    the names a reader has not received yet, with their first id.
+    """
+
+    def __init__(self, rows=None, name=None):
+        self.rows = rows or settings.STRATEGY_SHM_ROWS
+        self.width = len(ROW_FIELDS)
+        size = 8 * (HEADER_SLOTS + self.rows * self.width)
+        if name:
+            # Readers attach without registering with the resource tracker
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.owner = name is None
+
+        array = np.ndarray(HEADER_SLOTS + self.rows * self.width, dtype=np.float64, buffer=self.shm.buf)
+        self.header = array[:HEADER_SLOTS]
+        self.data = array[HEADER_SLOTS:].reshape(self.rows, self.width)
+        self.symbols = []  # id -> symbol
+        self.symbol_ids = {}
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, candles):
+        """
+        Appends [(symbol, candle)]. Returns (start_seq, end_seq, new_symbols).
+        """
+        new_symbols = []
+        start = seq = int(self.header[0])
+        for symbol, candle in candles:
+            symbol_id = self.symbol_ids.get(symbol)
+            if symbol_id is None:
+                symbol_id = self.symbol_ids[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+                new_symbols.append(symbol)
+            row = self.data[seq % self.rows]
+            row[0] = symbol_id
+            row[1] = candle.get("timeframe", 60)
+            row[2:] = [candle.get(field) or 0 for field in CANDLE_FIELDS]
+            seq += 1
+        self.header[0] = seq
+        return start, seq, new_symbols
+
+    def read(self, start, end, symbols):
+        """
+        Returns ([(symbol, candle)], dropped) for rows [start, end).
+        Rows the writer has already lapped are dropped.
+        """
+        first = max(start, int(self.header[0]) - self.rows)
+        if first >= end:
+            return [], end - start
+        positions = np.arange(first, end) % self.rows
+        block = self.data[positions].copy()
+        # Rows overwritten while copying are dropped too
+        lapped = min(len(block), max(0, int(self.header[0]) - self.rows - first))
+        block = block[lapped:]
+
+        candles = []
+        for values in block.tolist():
+            candle = dict(zip(CANDLE_FIELDS, values[2:]))
+            candle["timeframe"] = int(values[1])
+            candle["timestamp"] = int(candle["timestamp"])
+            candles.append((symbols[int(values[0])], candle))
+        return candles, (first - start) + lapped
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def run_isolated(spec, shm_name, shm_rows, symbols, inbox, stats):
+    """
+    Child process entry point: owns one strategy instance and serves its
+    hooks from the inbox. stats = [cpu_seconds, calls, dropped_candles].
+    """
+    from app.core.bus import get_bus
+    from app.services.signal_router import SignalRouter
+
+    cls = load_strategy_class(spec["class"])
+    strategy = cls(spec["name"], spec.get("params", {}), get_bus())
+    # Cooldown/dedup state is per process
+    strategy.router = SignalRouter().start()
+    buffer = SharedCandleBuffer(shm_rows, name=shm_name)
+
+    try:
+        while True:
+            message = inbox.get()
+            if message is None:
+                break
+            kind = message[0]
+            started = time.process_time()
+            calls = 1
+            try:
+                if kind == "candles":
+                    _, start, end, first_id, new_symbols = message
+                    # Names from a notification the host could not deliver come again here
+                    del symbols[first_id:]
+                    symbols.extend(new_symbols)
+                    candles, dropped = buffer.read(start, end, symbols)
+                    if dropped:
+                        with stats.get_lock():
+                            stats[2] += dropped
+                    for symbol, candle in candles:
+                        strategy.on_candle(symbol, candle)
+                    calls = len(candles)
+                elif kind == "on_tick":
+                    strategy.on_tick(message[1], message[2])
+                elif kind == "on_chain_update":
+                    strategy.on_chain_update(message[1])
+                elif kind == "configure":
+                    strategy.configure(message[1])
+                    print(f"DEBUG: Strategy '{strategy.name}' reconfigured.")
+            except Exception as e:
+                print(f"Error in strategy '{strategy.name}' ({kind}): {e}")
+            with stats.get_lock():
+                stats[0] += time.process_time() - started
+                stats[1] += calls
+    finally:
+        buffer.close()
+
+
+class IsolatedStrategy:
+    """
+    Host-side handle of a strategy running in its own process.
+    Candles reach it through the shared candle buffer (the queue only carries
+    the row range); ticks and chain snapshots are queued and dropped, with a
+    counter, when the child falls behind. Symbol names and reconfigurations
+    are never lost with a dropped message: they are resent with the next one.
+    """
+
+    def __init__(self, spec, buffer):
+        self.name = spec["name"]
+        self.spec = spec
+        self.cls = load_strategy_class(spec["class"])
+        self.hooks = {hook for hook in HOOKS if self.cls.subscribes(hook, spec.get("params", {}))}
+        self.inbox = MP_CONTEXT.Queue(maxsize=settings.STRATEGY_QUEUE_SIZE)
+        self.stats = MP_CONTEXT.Array("d", 3)
+        self.dropped = 0
+        self.symbols_sent = len(buffer.symbols)  # Symbol ids the child has been sent
+        self.pending_params = None  # Reconfiguration not yet queued
+        self.process = MP_CONTEXT.Process(
+            target=run_isolated,
+            args=(spec, buffer.name, buffer.rows, list(buffer.symbols), self.inbox, self.stats),
+            name=f"strategy-{self.name}",
+            daemon=True,
+        )
+        self.process.start()
+        print(f"DEBUG: Strategy '{self.name}' started in process {self.process.pid}.")
+
+    def put(self, message, block=False):
+        try:
+            self.inbox.put(message, block=block, timeout=1 if block else None)
+            return True
+        except queue.Full:
+            return False
+
+    def send(self, message, block=False):
+        """Queues a message behind any pending reconfiguration. Returns False if it was dropped."""
+        if self.pending_params is not None and self.put(("configure", self.pending_params), block):
+            self.pending_params = None
+        if self.put(message, block):
+            return True
+        self.dropped += 1
+        return False
+
+    def send_candles(self, start, end, symbols):
+        """
+        Notifies the child of buffer rows [start, end). `symbols` is the
+        buffer's id -> name table; names from its last delivered notification
+        on are included, so a drop is caught up by the next one.
+        """
+        first_id = min(self.symbols_sent, len(symbols))
+        if self.send(("candles", start, end, first_id, symbols[first_id:]), block=True):
+            self.symbols_sent = len(symbols)
+
+    def configure(self, params):
+        self.spec = {**self.spec, "params": params}
+        self.hooks = {hook for hook in HOOKS if self.cls.subscribes(hook, params)}
+        self.pending_params = params
+        if self.put(("configure", params), block=True):
+            self.pending_params = None
+
+    def cpu_stats(self):
+        with self.stats.get_lock():
+            cpu_seconds, calls, dropped_candles = self.stats[:]
+        return {
+            "cpu_seconds": cpu_seconds,
+            "calls": int(calls),
+            "dropped": self.dropped + int(dropped_candles),
+            "isolated": True,
+            "pid": self.process.pid,
+            "alive": self.process.is_alive(),
+        }
+
+    def stop(self):
+        self.send(None, block=True)
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        print(f"DEBUG: Strategy '{self.name}' stopped.")
@@ -0,0 +1,263 @@
+import time
+from app.core.features import FEATURE_VERSION, compute_features, feature_dict
+from app.core.utils import bucket_start
+from app.strategies.base import BaseStrategy
+
+SIGNAL_LEVELS = ("NEUTRAL", "WATCHLIST", "STRONG BUY")
+
+class SniperStrategy(BaseStrategy):
+    """
+    Scores every closed 1-minute option candle out of 100 and publishes
+    STRONG BUY / WATCHLIST signals. With "intrabar" on, the forming candle is
+    also re-scored on ticks and a signal goes out as soon as its level rises.
+    """
+
+    DEFAULT_PARAMS = {
+        "strong_buy_score": 80,
+        "watchlist_score": 60,
+        "delta_threshold": 0.40,
+        "gamma_threshold": 0.001,
+        "timeframe": 60,
+        # Intrabar mode: re-score the forming candle on every tick
+        "intrabar": False,
+        "hysteresis": 5,  # Score points below a threshold before a signal level is dropped
+        "debounce_ms": 2000,  # Min time between level changes of one instrument
+        "intrabar_cpu_budget_ms": 200,  # CPU per second spent re-scoring; the rest is deferred
+    }
+
+    def __init__(self, name=None, params=None, bus=None):
+        super().__init__(name, params, bus)
+        self.latest_candles = {}  # {instrument_token: candle_data}
+        self.partial_candles = {}  # {instrument_token: forming candle built from ticks}
+        self.signal_state = {}  # {instrument_token: (level, changed_at)}
+        self.pending = {}  # Instruments with unscored ticks (ordered set)
+        self.budget_window = 0
+        self.budget_used = 0.0
+        self.intrabar_stats = {"evaluated": 0, "published": 0, "backlog": 0}
+
+    @classmethod
+    def subscribes(cls, hook, params):
+        if hook == "on_tick":
+            return bool({**cls.DEFAULT_PARAMS, **params}["intrabar"])
+        return super().subscribes(hook, params)
+
+    def get_state(self):
+        # Debounce times are monotonic and meaningless in a new process; only levels are kept
+        return {
+            "latest_candles": self.latest_candles,
+            "partial_candles": self.partial_candles,
+            "signal_levels": {symbol: level for symbol, (level, _) in self.signal_state.items()},
+        }
+
+    def set_state(self, state):
+        self.latest_candles = state.get("latest_candles", {})
+        self.partial_candles = state.get("partial_candles", {})
+        self.signal_state = {symbol: (level, float("-inf")) for symbol, level in state.get("signal_levels", {}).items()}
+
+    def calculate_vwap(self, candle):
+        """
+        Calculates approximate VWAP for the candle.
+        """
+        return (candle['high'] + candle['low'] + candle['close']) / 3
+
+    def get_strike_grade(self, delta):
+        """
+        Determines the strike grade based on Delta.
+        """
+        if 0.4 <= abs(delta) <= 0.6:
+            return "ATM/Near-OTM (Prime Target)"
+        elif abs(delta) > 0.6:
+            return "ITM (High Delta)"
+        else:
+            return "OTM (Low Delta)"
+
+    def candle_features(self, candle, prev_candle):
+        """
+        The resampler's feature vector when the candle carries one of the
+        current version, else computed here (intrabar and isolated runs).
+        """
+        if candle.get("feature_version") == FEATURE_VERSION:
+            return candle["features"]
+        return feature_dict(compute_features(candle, prev_candle))
+
+    def calculate_trade_score(self, candle, prev_candle):
+        """
+        Calculates the trade score based on multiple factors.
+        Total Score: 100
+        """
+        score = 0
+        breakdown = []
+        features = self.candle_features(candle, prev_candle)
+
+        # 1. Wall Break (30 pts)
+        # If close > max_sell_wall_price (and wall exists)
+        if features["wall_break"]:
+            score += 30
+            breakdown.append("Wall Break (+30)")
+
+        # 2. OI Unwinding (20 pts)
+        # If OI decreased (Sellers leaving)
+        if features["oi_delta"] < 0:
+            score += 20
+            breakdown.append("OI Unwinding (+20)")
+
+        # 3. Pressure Check (20 pts)
+        # If Demand > Supply
+        if features["pressure_ratio"] > 0.5:
+            score += 20
+            breakdown.append("Buying Pressure (+20)")
+
+        # 4. Greeks Confirmation (15 pts)
+        # Split: Delta (10), Gamma (5)
+        delta = candle.get('delta', 0)
+        gamma = candle.get('gamma', 0)
+
+        if abs(delta) > self.params["delta_threshold"]:
+            score += 10
+            breakdown.append("Good Delta (+10)")
+
+        if gamma > self.params["gamma_threshold"]:
+            score += 5
+            breakdown.append("Gamma Accel (+5)")
+
+        # 5. Trend Check (15 pts)
+        # If Close > VWAP
+        if features["vwap_gap"] > 0:
+            score += 15
+            breakdown.append("Above VWAP (+15)")
+
+        return score, breakdown
+
+    def signal_level(self, score):
+        if score >= self.params["strong_buy_score"]:
+            return 2
+        if score >= self.params["watchlist_score"]:
+            return 1
+        return 0
+
+    def update_signal_state(self, symbol, score, now=None):
+        """
+        Hysteresis + debounce: a level is entered at its threshold but only
+        left once the score falls `hysteresis` points below it, and no
+        instrument changes level more often than every `debounce_ms`.
+        Returns the new level name on an upgrade, else None.
+        """
+        now = now if now is not None else time.monotonic()
+        level, changed_at = self.signal_state.get(symbol, (0, float("-inf")))
+
+        target = self.signal_level(score)
+        if target < level:
+            target = min(level, self.signal_level(score + self.params["hysteresis"]))
+        if target == level or (now - changed_at) * 1000 < self.params["debounce_ms"]:
+            return None
+
+        self.signal_state[symbol] = (target, now)
+        return SIGNAL_LEVELS[target] if target > level else None
+
+    def on_tick(self, symbol, tick):
+        """
+        Folds the tick into the forming candle and re-scores pending
+        instruments within the per-second CPU budget (latest tick wins).
+        """
+        minute_ts = bucket_start(tick["timestamp"], self.params["timeframe"])
+        ltp = tick["ltp"]
+        candle = self.partial_candles.get(symbol)
+        if candle is None or candle["timestamp"] != minute_ts:
+            candle = self.partial_candles[symbol] = {
+                "timestamp": minute_ts, "open": ltp, "high": ltp, "low": ltp, "close": ltp,
+            }
+        else:
+            candle["high"] = max(candle["high"], ltp)
+            candle["low"] = min(candle["low"], ltp)
+            candle["close"] = ltp
+        # Depth, OI and Greeks: latest tick, as in the closed candle
+        candle["volume"] = tick["vtt"]
+        candle["open_interest"] = tick["oi"]
+        for field in ("total_buy_qty", "total_sell_qty", "delta", "gamma", "max_sell_wall_price", "best_bid", "best_ask"):
+            candle[field] = tick[field]
+
+        self.pending[symbol] = None
+        self.evaluate_pending()
+
+    def evaluate_pending(self):
+        window = int(time.monotonic())
+        if window != self.budget_window:
+            self.budget_window = window
+            self.budget_used = 0.0
+
+        budget = self.params["intrabar_cpu_budget_ms"] / 1000
+        while self.pending and self.budget_used < budget:
+            started = time.thread_time()
+            symbol = next(iter(self.pending))
+            del self.pending[symbol]
+            self.evaluate_intrabar(symbol)
+            self.budget_used += time.thread_time() - started
+        self.intrabar_stats["backlog"] = len(self.pending)
+
+    def evaluate_intrabar(self, symbol):
+        candle = self.partial_candles[symbol]
+        score, breakdown = self.calculate_trade_score(candle, self.latest_candles.get(symbol))
+        self.intrabar_stats["evaluated"] += 1
+
+        signal_type = self.update_signal_state(symbol, score)
+        if signal_type:
+            self.intrabar_stats["published"] += 1
+            print(f"[{symbol}] Intrabar Score: {score}/100 | Signal: {signal_type}")
+            self.publish_signal({
+                "symbol": symbol,
+                "signal": signal_type,
+                "score": score,
+                "breakdown": breakdown,
+                "strike_grade": self.get_strike_grade(candle["delta"]),
+                "price": candle["close"],
+                "timestamp": candle["timestamp"],
+                "intrabar": True,
+            })
+
+    def on_candle(self, symbol, candle):
+        # Higher-timeframe roll-ups on the same bus are ignored
+        if candle.get("timeframe", 60) == self.params["timeframe"]:
+            self.process_candle(symbol, candle)
+
+    def process_candle(self, symbol, candle_data):
+        """
+        Processes a new candle: calculates score and publishes signal.
+        """
+        prev_candle = self.latest_candles.get(symbol)
+
+        # Calculate Score
+        score, breakdown = self.calculate_trade_score(candle_data, prev_candle)
+
+        # Determine Signal
+        signal_type = SIGNAL_LEVELS[self.signal_level(score)]
+
+        # Strike Grade
+        delta = candle_data.get('delta', 0)
+        strike_grade = self.get_strike_grade(delta)
+
+        # Log Analysis
+        print(f"[{symbol}] Score: {score}/100 | Signal: {signal_type} | Grade: {strike_grade}")
+        if breakdown:
+            print(f"  -> Factors: {', '.join(breakdown)}")
+
+        # In intrabar mode the close only publishes if the level changes
+        publish = signal_type in ["STRONG BUY", "WATCHLIST"]
+        if self.params["intrabar"]:
+            publish = self.update_signal_state(symbol, score) is not None
+
+        # Publish Signal if significant
+        if publish:
+            signal_payload = {
+                "symbol": symbol,
+                "signal": signal_type,
+                "score": score,
+                "breakdown": breakdown,
+                "strike_grade": strike_grade,
+                "price": candle_data['close'],
+                "timestamp": candle_data['timestamp']
+            }
+            self.publish_signal(signal_payload)
+            print(f"  -> Signal Published: {signal_type}")
+
+        # Update Memory
+        self.latest_candles[symbol] = candle_data
@@ -0,0 +1,265 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+import numpy as np
+import pytz
+from app.core.config import settings
+from app.core.bus import bus, default_consumer_name, LIVE_TICKS
+from app.core.codec import CANDLE_FIELDS
+from app.core.database import get_pool
+from app.core.utils import require_pyarrow
+from app.services.contract_manager import get_instrument_meta
+from app.services.candle_history import COLUMN_DTYPES
+
+IST = pytz.timezone("Asia/Kolkata")
+
+# Flat tick row written to the archive
+TICK_COLUMNS = {
+    "ts": np.int64,  # Exchange last-trade time (ms), falls back to receive time
+    "symbol": str,
+    "ltp": np.float64,
+    "ltq": np.int64,
+    "close_price": np.float64,
+    "vtt": np.int64,
+    "oi": np.float64,
+    "atp": np.float64,
+    "total_buy_qty": np.float64,
+    "total_sell_qty": np.float64,
+    "best_bid": np.float64,
+    "best_bid_qty": np.int64,
+    "best_ask": np.float64,
+    "best_ask_qty": np.int64,
+    "iv": np.float64,
+    "delta": np.float64,
+    "theta": np.float64,
+    "gamma": np.float64,
+    "vega": np.float64,
+}
+
+
+def flatten_tick(symbol, feed, received_ms):
+    """
+    Flattens one instrument's feed (any subscription mode) into a TICK_COLUMNS row.
+    """
+    full = feed.get("fullFeed", {})
+    market = full.get("marketFF") or full.get("indexFF") or feed.get("firstLevelWithGreeks") or feed
+    ltpc = market.get("ltpc", {})
+    greeks = market.get("optionGreeks") or full.get("optionGreeks", {})
+
+    depth = market.get("marketLevel", {}).get("bidAskQuote") or [market.get("firstDepth", {})]
+    top = depth[0] if depth else {}
+
+    return (
+        int(ltpc.get("ltt") or received_ms),
+        symbol,
+        float(ltpc.get("ltp", 0)),
+        int(ltpc.get("ltq", 0)),
+        float(ltpc.get("cp", 0)),
+        int(market.get("vtt", ltpc.get("volume", 0))),
+        float(market.get("oi", 0)),
+        float(market.get("atp", 0)),
+        float(market.get("tbq", 0)),
+        float(market.get("tsq", 0)),
+        float(top.get("bidP", 0)),
+        int(top.get("bidQ", 0)),
+        float(top.get("askP", 0)),
+        int(top.get("askQ", 0)),
+        float(market.get("iv", greeks.get("iv", 0))),
+        float(greeks.get("delta", 0)),
+        float(greeks.get("theta", 0)),
+        float(greeks.get("gamma", 0)),
+        float(greeks.get("vega", 0)),
+    )
+
+
+def trading_day(epoch_seconds):
+    return datetime.fromtimestamp(epoch_seconds, IST).date().isoformat()
+
+
+def write_partition(kind, day, underlying, columns, root=None):
+    """
+    Writes one Parquet part file under {root}/{kind}/date={day}/underlying={underlying}/.
+    Symbols are dictionary-encoded; the file appears atomically.
+    """
+    pa = require_pyarrow()
+    import pyarrow.parquet as pq
+
+    directory = os.path.join(root or settings.ARCHIVE_DIR, kind, f"date={day}", f"underlying={underlying}")
+    os.makedirs(directory, exist_ok=True)
+    name = f"part-{time.time_ns()}-{os.getpid()}.parquet"
+    tmp_path = os.path.join(directory, f".{name}.tmp")
+
+    pq.write_table(
+        pa.table(columns),
+        tmp_path,
+        compression=settings.ARCHIVE_COMPRESSION,
+        use_dictionary=["symbol"],
+    )
+    final_path = os.path.join(directory, name)
+    os.replace(tmp_path, final_path)
+    return final_path
+
+
+def load_archive(kind, start_day, end_day=None, underlying=None, columns=None, as_pandas=False, root=None):
+    """
+    Loads archived ticks or candles for [start_day, end_day] (ISO dates).
+    Files are memory-mapped; returns {column: ndarray} or a DataFrame.
+    """
+    pa = require_pyarrow()
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+
+    partitioning = ds.partitioning(
+        pa.schema([("date", pa.string()), ("underlying", pa.string())]), flavor="hive"
+    )
+    dataset = ds.dataset(
+        os.path.join(root or settings.ARCHIVE_DIR, kind),
+        format="parquet",
+        partitioning=partitioning,
+        filesystem=pafs.LocalFileSystem(use_mmap=True),
+    )
+
+    end_day = end_day or start_day
+    expression = (ds.field("date") >= str(start_day)) & (ds.field("date") <= str(end_day))
+    if underlying:
+        expression = expression & (ds.field("underlying") == underlying)
+
+    table = dataset.to_table(columns=columns, filter=expression)
+    if as_pandas:
+        return table.to_pandas()
+    return {name: table.column(name).to_numpy() for name in table.column_names}
+
+
+class TickRecorder:
+    """
+    Archives raw ticks from the bus into per-day, per-underlying Parquet parts.
+    Bus entries are acknowledged only after their rows are on disk.
+    """
+
+    def __init__(self, root=None, flush_rows=None, flush_seconds=None):
+        self.root = root
+        self.flush_rows = flush_rows or settings.ARCHIVE_FLUSH_ROWS
+        self.flush_seconds = flush_seconds or settings.ARCHIVE_FLUSH_SECONDS
+        self.buffers = {}  # {(day, underlying): [rows]}
+        self.buffered_rows = 0
+        self.underlyings = {}  # {instrument_key: underlying}
+        self.last_flush = time.monotonic()
+
+    def resolve_underlyings(self, symbols):
+        missing = [symbol for symbol in symbols if symbol not in self.underlyings]
+        if missing:
+            meta = get_instrument_meta(missing)
+            for symbol in missing:
+                self.underlyings[symbol] = meta.get(symbol, {}).get("underlying", "UNKNOWN")
+
+    def record(self, data, received_ms=None):
+        """
+        Buffers every instrument in one FeedResponse dict.
+        """
+        received_ms = received_ms or int(time.time() * 1000)
+        feeds = data.get("feeds", {})
+        self.resolve_underlyings(feeds)
+
+        for symbol, feed in feeds.items():
+            row = flatten_tick(symbol, feed, received_ms)
+            key = (trading_day(row[0] / 1000), self.underlyings[symbol])
+            self.buffers.setdefault(key, []).append(row)
+            self.buffered_rows += 1
+
+    def should_flush(self):
+        return (
+            self.buffered_rows >= self.flush_rows
+            or (self.buffered_rows and time.monotonic() - self.last_flush >= self.flush_seconds)
+        )
+
+    def flush(self):
+        for (day, underlying), rows in self.buffers.items():
+            columns = {
+                name: np.array([row[i] for row in rows], dtype=dtype)
+                for i, (name, dtype) in enumerate(TICK_COLUMNS.items())
+            }
+            path = write_partition("ticks", day, underlying, columns, self.root)
+            print(f"DEBUG: Archived {len(rows)} ticks -> {path}")
+        self.buffers = {}
+        self.buffered_rows = 0
+        self.last_flush = time.monotonic()
+
+    def run(self):
+        consumer = bus.consumer(LIVE_TICKS, group="archiver", consumer_name=default_consumer_name("archiver"))
+        pending_ids = []
+        print("TickRecorder Running... Archiving ticks.")
+
+        try:
+            while True:
+                messages = consumer.read()
+                for message_id, raw in messages:
+                    try:
+                        self.record(json.loads(raw))
+                    except Exception as e:
+                        print(f"Error archiving tick message: {e}")
+                    pending_ids.append(message_id)
+
+                if self.should_flush():
+                    self.flush()
+                    consumer.ack(pending_ids)
+                    pending_ids = []
+        finally:
+            if self.buffered_rows:
+                self.flush()
+                consumer.ack(pending_ids)
+
+
+async def export_candles(day, root=None):
+    """
+    Streams one trading day of market_candles into Parquet, one part per underlying.
+    """
+    day_start = IST.localize(datetime.combine(day, datetime.min.time()))
+    day_end = day_start + timedelta(days=1)
+    select = ", ".join(
+        ["symbol", "extract(epoch FROM timestamp)::bigint AS timestamp"]
+        + [f for f in CANDLE_FIELDS if f != "timestamp"]
+    )
+    query = f"SELECT {select} FROM market_candles WHERE timestamp >= $1 AND timestamp < $2 ORDER BY symbol, timestamp"
+
+    rows_by_symbol = {}
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            async for record in conn.cursor(query, day_start, day_end, prefetch=settings.CANDLE_STREAM_CHUNK_ROWS):
+                rows_by_symbol.setdefault(record["symbol"], []).append(tuple(record))
+
+    meta = get_instrument_meta(rows_by_symbol)
+    grouped = {}
+    for symbol, rows in rows_by_symbol.items():
+        grouped.setdefault(meta.get(symbol, {}).get("underlying", "UNKNOWN"), []).extend(rows)
+
+    for underlying, rows in grouped.items():
+        columns = {"symbol": np.array([row[0] for row in rows], dtype=str)}
+        for i, field in enumerate(CANDLE_FIELDS, start=1):
+            columns[field] = np.array([row[i] or 0 for row in rows], dtype=COLUMN_DTYPES[field])
+        path = write_partition("candles", day.isoformat(), underlying, columns, root)
+        print(f"DEBUG: Archived {len(rows)} candles -> {path}")
+
+    return sum(len(rows) for rows in grouped.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parquet tick and candle archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("record", help="Archive live ticks from the bus")
+    export = sub.add_parser("export", help="Export one day of market_candles")
+    export.add_argument("--date", default=date.today().isoformat())
+    args = parser.parse_args()
+
+    if args.command == "record":
+        TickRecorder().run()
+    else:
+        count = asyncio.run(export_candles(date.fromisoformat(args.date)))
+        print(f"Exported {count} candles for {args.date}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import json
+import time
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.core.bus import bus, LIVE_TICKS, LIVE_SNAPSHOTS
+from app.core.codec import encode_tick_snapshot
+from app.core.ticks import tick_key
+from app.worker.archiver import TICK_COLUMNS, flatten_tick
+
+# Per-instrument hash fields: the archive row without the symbol, plus the
+# time the conflator last wrote it
+TICK_FIELDS = tuple(name for name in TICK_COLUMNS if name != "symbol")
+TICK_INDEX = [list(TICK_COLUMNS).index(name) for name in TICK_FIELDS]
+
+
+class Conflator:
+    """
+    Last-value view of the tick stream for consumers that don't need every
+    tick (spot lookups, dashboards, analytics). Ticks are folded into the
+    latest row per instrument; every CONFLATE_INTERVAL_MS the instruments
+    that changed are written to their TICK:{instrument} hash and published
+    as one batched 'live_snapshots' message, in two round trips.
+    """
+
+    def __init__(self, interval_ms=None):
+        self.interval = (interval_ms or settings.CONFLATE_INTERVAL_MS) / 1000
+        self.pending = {}  # {symbol: latest row} since the last flush
+        self.stats = {"messages": 0, "ticks": 0, "conflated": 0, "flushes": 0, "written": 0}
+
+    def record(self, data, received_ms=None):
+        received_ms = received_ms or int(time.time() * 1000)
+        self.stats["messages"] += 1
+        for symbol, feed in data.get("feeds", {}).items():
+            if symbol in self.pending:
+                self.stats["conflated"] += 1
+            self.pending[symbol] = flatten_tick(symbol, feed, received_ms)
+            self.stats["ticks"] += 1
+
+    def flush(self):
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        now_ms = int(time.time() * 1000)
+        rows = {symbol: [row[i] for i in TICK_INDEX] for symbol, row in pending.items()}
+
+        pipe = redis_client.pipeline(transaction=False)
+        for symbol, values in rows.items():
+            mapping = dict(zip(TICK_FIELDS, values))
+            mapping["updated_ms"] = now_ms
+            pipe.hset(tick_key(symbol), mapping=mapping)
+        pipe.set("CONFLATOR_STATS", json.dumps(self.stats))
+        pipe.execute()
+
+        bus.publish(LIVE_SNAPSHOTS, encode_tick_snapshot(now_ms, TICK_FIELDS, rows))
+        self.stats["flushes"] += 1
+        self.stats["written"] += len(rows)
+
+    def run(self):
+        # Plain tail: a last-value view has nothing to replay after a restart
+        consumer = bus.consumer(LIVE_TICKS)
+        block_ms = max(int(self.interval * 1000), 1)
+        next_flush = time.monotonic() + self.interval
+        print(f"Conflator Running... Snapshots every {self.interval * 1000:.0f} ms.")
+
+        while True:
+            for _, raw in consumer.read(block_ms=block_ms):
+                try:
+                    self.record(json.loads(raw))
+                except Exception as e:
+                    print(f"Error conflating tick message: {e}")
+
+            now = time.monotonic()
+            if now >= next_flush:
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"Error writing conflated ticks: {e}")
+                next_flush = now + self.interval
+
+
+if __name__ == "__main__":
+    Conflator().run()
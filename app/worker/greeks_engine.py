@@ -0,0 +1,132 @@
+import time
+from datetime import datetime
+import numpy as np
+import pytz
+from app.core.config import settings
+from app.core.greeks import SECONDS_PER_YEAR, implied_vol, bs_greeks
+from app.services.contract_manager import get_instrument_meta
+
+IST = pytz.timezone("Asia/Kolkata")
+
+GREEK_FIELDS = ("iv", "delta", "gamma", "theta", "vega")
+
+
+def expiry_timestamp(expiry):
+    """Options expire at the 15:30 IST close of their expiry date."""
+    day = datetime.strptime(expiry, "%Y-%m-%d")
+    return IST.localize(day.replace(hour=15, minute=30)).timestamp()
+
+
+class GreeksEngine:
+    """
+    In-house IV and Greeks for every option in the subscribed grid.
+
+    Contract terms (strike, CE/PE, expiry) come from the contract cache and
+    live in flat arrays indexed by slot; spot comes from the underlying's own
+    ticks. Each tick batch is solved in one vectorized pass, so instruments
+    on the cheap 'ltpc' mode still get Greeks.
+    """
+
+    def __init__(self, rate=None):
+        self.rate = settings.GREEKS_RISK_FREE_RATE if rate is None else rate
+        self.slots = {}  # {instrument_key: slot}
+        self.strike = np.empty(0)
+        self.is_call = np.empty(0, dtype=bool)
+        self.expiry_ts = np.empty(0)
+        self.underlying = []  # slot -> underlying name
+        self.spot_keys = {}  # {instrument_key of an underlying: name}
+        self.spot = {}  # {underlying: last price}
+        self.unknown = {}  # {key not in the contract cache: when to look it up again (monotonic)}
+
+    def register(self, instrument_keys):
+        """
+        Adds new instruments with one batched contract-cache lookup. Keys the
+        cache doesn't know yet (subscribed before the contract refresh) are
+        retried every CONTRACT_RETRY_SECONDS.
+        """
+        now = time.monotonic()
+        new_keys = [
+            k for k in instrument_keys
+            if k not in self.slots and k not in self.spot_keys and self.unknown.get(k, 0) <= now
+        ]
+        if not new_keys:
+            return
+
+        meta = get_instrument_meta(new_keys)
+        strikes, calls, expiries = [], [], []
+        for key in new_keys:
+            info = meta.get(key)
+            if not info:
+                self.unknown[key] = now + settings.CONTRACT_RETRY_SECONDS
+                continue
+            self.unknown.pop(key, None)
+            if info.get("strike") is None:
+                self.spot_keys[key] = info["underlying"]
+            else:
+                self.slots[key] = len(self.underlying)
+                self.underlying.append(info["underlying"])
+                strikes.append(float(info["strike"]))
+                calls.append(info["option_type"] == "CE")
+                expiries.append(expiry_timestamp(info["expiry"]))
+
+        if strikes:
+            self.strike = np.concatenate([self.strike, strikes])
+            self.is_call = np.concatenate([self.is_call, np.array(calls, dtype=bool)])
+            self.expiry_ts = np.concatenate([self.expiry_ts, expiries])
+
+    def compute(self, ltps, now=None):
+        """
+        Solves IV and Greeks for {instrument_key: ltp} in one vectorized pass.
+        Returns {instrument_key: {"iv", "delta", "gamma", "theta", "vega"}} for
+        options whose underlying spot is known and whose IV could be solved.
+        """
+        keys = [k for k in ltps if k in self.slots and self.underlying[self.slots[k]] in self.spot]
+        if not keys:
+            return {}
+
+        now = now if now is not None else time.time()
+        idx = np.fromiter((self.slots[k] for k in keys), dtype=np.int64, count=len(keys))
+        price = np.fromiter((ltps[k] for k in keys), dtype=float, count=len(keys))
+        spot = np.fromiter((self.spot[self.underlying[i]] for i in idx), dtype=float, count=len(keys))
+        strike = self.strike[idx]
+        is_call = self.is_call[idx]
+        t = np.maximum(self.expiry_ts[idx] - now, 0) / SECONDS_PER_YEAR
+
+        sigma = implied_vol(price, spot, strike, t, self.rate, is_call)
+        solved = np.isfinite(sigma)
+        # Keep the Greeks math on valid inputs only
+        sigma_safe = np.where(solved, sigma, 0.2)
+        t_safe = np.where(t > 0, t, 1.0 / SECONDS_PER_YEAR)
+        delta, gamma, theta, vega = bs_greeks(spot, strike, t_safe, self.rate, sigma_safe, is_call)
+
+        results = {}
+        for i, key in enumerate(keys):
+            if solved[i]:
+                results[key] = {
+                    "iv": float(sigma[i] * 100),
+                    "delta": float(delta[i]),
+                    "gamma": float(gamma[i]),
+                    "theta": float(theta[i]),
+                    "vega": float(vega[i]),
+                }
+        return results
+
+    def apply(self, parsed_batch, now=None):
+        """
+        Fills Greeks into a tick batch {instrument_key: parsed_tick}.
+        Broker values are kept unless missing (all zero) or
+        GREEKS_OVERRIDE_BROKER is set.
+        """
+        self.register(parsed_batch)
+
+        for key, parsed in parsed_batch.items():
+            if key in self.spot_keys and parsed["ltp"] > 0:
+                self.spot[self.spot_keys[key]] = parsed["ltp"]
+
+        ltps = {
+            key: parsed["ltp"] for key, parsed in parsed_batch.items()
+            if key in self.slots and parsed["ltp"] > 0
+            and (settings.GREEKS_OVERRIDE_BROKER or not any(parsed[f] for f in GREEK_FIELDS))
+        }
+        for key, greeks in self.compute(ltps, now).items():
+            parsed_batch[key].update(greeks)
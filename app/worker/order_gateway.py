@@ -0,0 +1,209 @@
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+import numpy as np
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.core.bus import bus, default_consumer_name, LIVE_TICKS, TRADE_SIGNALS, ORDER_UPDATES
+from app.services.brokers import get_broker, PaperBroker, PENDING, OPEN, FILLED, REJECTED, CANCELLED
+from app.services.contract_manager import get_instrument_meta
+from app.services.positions import PositionBook
+from app.worker.archiver import TICK_COLUMNS, flatten_tick
+
+QUOTE_INDEX = [list(TICK_COLUMNS).index(field) for field in ("best_bid", "best_bid_qty", "best_ask", "best_ask_qty")]
+
+
+class OrderGateway:
+    """
+    Turns 'trade_signals' into orders, after the position book's risk checks.
+
+    Sizing is lots x lot_size from the contract cache. Orders go to the
+    configured broker (paper simulator, Upstox or the local mock), their state
+    is kept in the ORDERS hash and every change is published on
+    'order_updates'. Signal-to-order-sent latency is recorded per order.
+    """
+
+    def __init__(self, broker=None):
+        self.broker = broker or get_broker(access_token=redis_client.get("access_token"))
+        self.orders = {}  # {order_id: order} for working orders
+        self.lot_sizes = {}  # {instrument_key: lot_size}
+        self.latencies = deque(maxlen=settings.ORDER_LATENCY_SAMPLES)  # signal -> sent (ms)
+        self.ids = itertools.count(1)
+        self.positions = PositionBook()
+        self.booked = {}  # {order_id: filled quantity already in the position book}
+        self.checks = [self.positions.check_order]  # Pre-trade checks: callable(order) -> rejection reason or None
+        self.counts = {PENDING: 0, OPEN: 0, FILLED: 0, REJECTED: 0, CANCELLED: 0}  # State changes seen
+
+    # --- Orders ---
+
+    def lots_for(self, signal):
+        return {
+            "STRONG BUY": settings.ORDER_LOTS_STRONG_BUY,
+            "WATCHLIST": settings.ORDER_LOTS_WATCHLIST,
+        }.get(signal["signal"], 0)
+
+    def lot_size(self, symbol):
+        if symbol not in self.lot_sizes:
+            meta = get_instrument_meta([symbol]).get(symbol, {})
+            self.lot_sizes[symbol] = int(meta.get("lot_size") or 0)
+        return self.lot_sizes[symbol]
+
+    def build_order(self, signal, received_at):
+        lots = self.lots_for(signal)
+        lot_size = self.lot_size(signal["symbol"])
+        if lots <= 0 or lot_size <= 0:
+            return None
+        return {
+            "order_id": f"SB-{int(received_at)}-{next(self.ids)}",
+            "symbol": signal["symbol"],
+            "side": "BUY",
+            "lots": lots,
+            "quantity": lots * lot_size,
+            "signal": signal["signal"],
+            "strategy": signal.get("strategy"),
+            "status": PENDING,
+            "filled_qty": 0,
+            "avg_price": 0.0,
+            "emitted_at": signal.get("emitted_at"),
+            "received_at": received_at,
+        }
+
+    async def submit(self, order, started):
+        for check in self.checks:
+            reason = check(order)
+            if reason:
+                order["status"] = REJECTED
+                order["reason"] = reason
+                self.record(order)
+                return
+
+        order["sent_at"] = time.time()
+        order["gateway_ms"] = (time.perf_counter() - started) * 1000
+        self.positions.track_order(order)
+        try:
+            await self.broker.place(order)
+        except Exception as e:
+            order["status"] = REJECTED
+            order["reason"] = f"Broker error: {e}"
+
+        if order.get("emitted_at"):
+            order["signal_to_sent_ms"] = (order["sent_at"] - order["emitted_at"]) * 1000
+            self.latencies.append(order["signal_to_sent_ms"])
+        if order["status"] == OPEN:
+            self.orders[order["order_id"]] = order
+        self.record(order)
+
+    async def handle_signal(self, signal):
+        started = time.perf_counter()
+        order = self.build_order(signal, time.time())
+        if order is None:
+            return None
+        await self.submit(order, started)
+        print(f"DEBUG: Order {order['order_id']} {order['side']} {order['quantity']} {order['symbol']} -> {order['status']}"
+              f" ({order.get('signal_to_sent_ms', 0):.2f} ms from signal)")
+        return order
+
+    def record(self, order):
+        self.counts[order["status"]] = self.counts.get(order["status"], 0) + 1
+        new_fill = order["filled_qty"] - self.booked.get(order["order_id"], 0)
+        if new_fill > 0:
+            self.positions.apply_fill(order["symbol"], order["side"], new_fill, order["last_fill"]["price"])
+            self.booked[order["order_id"]] = order["filled_qty"]
+        self.positions.track_order(order)
+        if order["status"] != OPEN:
+            self.orders.pop(order["order_id"], None)
+            self.booked.pop(order["order_id"], None)
+        payload = json.dumps(order)
+        redis_client.hset("ORDERS", order["order_id"], payload)
+        bus.publish(ORDER_UPDATES, payload)
+
+    # --- Fills ---
+
+    def on_feed(self, data):
+        """
+        Marks positions from a FeedResponse; when paper trading also refreshes
+        quotes and matches working orders.
+        """
+        if isinstance(self.broker, PaperBroker):
+            received_ms = int(time.time() * 1000)
+            for symbol, feed in data.get("feeds", {}).items():
+                row = flatten_tick(symbol, feed, received_ms)
+                self.broker.update_quote(symbol, *(row[i] for i in QUOTE_INDEX))
+
+            for order in list(self.orders.values()):
+                if self.broker.match(order):
+                    self.record(order)
+
+        self.positions.on_feed(data)
+        self.positions.publish_due()
+
+    async def poll_open_orders(self):
+        while True:
+            await asyncio.sleep(settings.ORDER_POLL_MS / 1000)
+            for order in list(self.orders.values()):
+                try:
+                    if await self.broker.refresh(order):
+                        self.record(order)
+                except Exception as e:
+                    print(f"Error refreshing order {order['order_id']}: {e}")
+
+    # --- Loops ---
+
+    async def signal_loop(self):
+        consumer = bus.consumer(
+            TRADE_SIGNALS, group="order_gateway", consumer_name=default_consumer_name("order_gateway")
+        )
+        while True:
+            messages = await asyncio.to_thread(consumer.read)
+            for _, raw in messages:
+                try:
+                    await self.handle_signal(json.loads(raw))
+                except Exception as e:
+                    print(f"Error handling signal: {e}")
+            consumer.ack([message_id for message_id, _ in messages])
+
+    async def quote_loop(self):
+        consumer = bus.consumer(LIVE_TICKS)
+        while True:
+            messages = await asyncio.to_thread(consumer.read)
+            for _, raw in messages:
+                try:
+                    self.on_feed(json.loads(raw))
+                except Exception as e:
+                    print(f"Error processing tick for orders/positions: {e}")
+
+    def stats(self):
+        latencies = np.array(self.latencies) if self.latencies else None
+        return {
+            "broker": self.broker.name,
+            "order_events": dict(self.counts),
+            "working": len(self.orders),
+            "pnl": self.positions.totals,
+            "signal_to_sent_ms": {
+                "count": len(self.latencies),
+                "p50": float(np.percentile(latencies, 50)) if latencies is not None else None,
+                "p99": float(np.percentile(latencies, 99)) if latencies is not None else None,
+                "max": float(latencies.max()) if latencies is not None else None,
+            },
+        }
+
+    async def run(self):
+        await self.broker.start()
+        print(f"OrderGateway Running... Broker: {self.broker.name}")
+        tasks = [asyncio.create_task(self.signal_loop()), asyncio.create_task(self.quote_loop())]
+        if not isinstance(self.broker, PaperBroker):
+            tasks.append(asyncio.create_task(self.poll_open_orders()))
+
+        try:
+            while True:
+                await asyncio.sleep(settings.ORDER_STATS_SECONDS)
+                redis_client.set("ORDER_STATS", json.dumps(self.stats()))
+        finally:
+            for task in tasks:
+                task.cancel()
+            await self.broker.close()
+
+if __name__ == "__main__":
+    asyncio.run(OrderGateway().run())
@@ -4,11 +4,48 @@ import time
 from datetime import datetime
 import asyncpg
 from app.core.config import settings
+from app.core.bus import bus, default_consumer_name, LIVE_TICKS, CANDLE_CLOSED
+from app.core.codec import encode_candle_batch
+from app.core.features import FEATURE_VERSION, FEATURE_NAMES, FEATURE_QUERY, compute_features, feature_rows
+from app.core.redis_client import redis_client
+from app.core.session import market_session
+from app.core.snapshot import SnapshotStore
+from app.core.startup import FEED_INSTRUMENTS_KEY
+from app.core.utils import bucket_start
+from app.worker.scheduler import BoundaryScheduler
+from app.worker.greeks_engine import GreeksEngine, expiry_timestamp
+from app.services.option_chain import OptionChainBook
+
+FLOW_QUERY = """
+INSERT INTO market_candle_flow (
+    timestamp, symbol, tick_count, buy_volume, sell_volume, prices, volumes
+) VALUES ($1, $2, $3, $4, $5, $6, $7)
+ON CONFLICT (timestamp, symbol) DO NOTHING;
+"""
+
+
+def profile_levels(profile):
+    """{price level: volume} -> [prices, volumes] sorted by price."""
+    levels = sorted(profile or ())
+    bucket = settings.CANDLE_PROFILE_BUCKET
+    return [[round(level * bucket, 2) for level in levels], [profile[level] for level in levels]]
+
 
 class Resampler:
     def __init__(self):
         self.current_candles = {}  # {symbol: {data_points}}
+        self.closed_candles = []  # [(symbol, candle)] waiting for the next sweep
+        self.last_closed = {}  # {symbol: last finalized 1m candle}, source for flat candles
+        self.rollup_candles = {}  # {timeframe: {symbol: candle}} for timeframes above 1m
+        self.flow_state = {}  # {symbol: [last vtt, bid, ask, ltp, side]} for tick classification
+        self.greeks_engine = GreeksEngine() if settings.GREEKS_ENGINE else None
+        self.option_chains = OptionChainBook()
         self.db_pool = None
+        self.snapshots = None  # SnapshotStore, opened by restore_snapshot()
+        self.dirty = set()  # Symbols whose open candle changed since the last snapshot
+        self.closed_journaled = 0  # closed_candles already in the snapshot journal
+        self.last_sweep = None
+        self.next_snapshot = 0.0
 
     async def start(self):
         """Initialize DB pool."""
@@ -25,8 +62,89 @@ class Resampler:
         """Close DB pool."""
         if self.db_pool:
             await self.db_pool.close()
+        if self.snapshots:
+            self.save_snapshot(full=True)
+            self.snapshots.close()
 
-    def parse_full_data(self, data):
+    # --- Snapshots ---
+
+    def snapshot_state(self):
+        return {
+            "current": dict(self.current_candles),
+            "closed": {(symbol, candle["minute_ts"]): candle for symbol, candle in self.closed_candles},
+            "last_closed": dict(self.last_closed),
+            "rollup": {
+                (tf, symbol): candle
+                for tf, candles in self.rollup_candles.items() for symbol, candle in candles.items()
+            },
+            "meta": {"last_sweep": self.last_sweep},
+        }
+
+    def save_snapshot(self, full=False):
+        """
+        Full snapshot after each sweep; in between only the open candles
+        touched since the last one (and newly closed ones) are journaled.
+        """
+        if self.snapshots is None:
+            return
+        try:
+            if full:
+                self.snapshots.save(self.snapshot_state())
+            else:
+                self.snapshots.append({
+                    "current": {symbol: self.current_candles.get(symbol) for symbol in self.dirty},
+                    "closed": {
+                        (symbol, candle["minute_ts"]): candle
+                        for symbol, candle in self.closed_candles[self.closed_journaled:]
+                    },
+                })
+        except Exception as e:
+            print(f"Error writing resampler snapshot: {e}")
+            return
+        self.dirty.clear()
+        self.closed_journaled = len(self.closed_candles)
+        self.next_snapshot = time.monotonic() + settings.SNAPSHOT_INTERVAL_MS / 1000
+
+    def restore_snapshot(self):
+        """
+        Reloads open candles from the last snapshot, so a restart mid-minute
+        keeps the partial candle. Candles older than the last completed sweep
+        were already stored and are dropped rather than written again.
+        """
+        self.snapshots = SnapshotStore("resampler")
+        state, saved_at = self.snapshots.load()
+        if state:
+            last_sweep = state["meta"].get("last_sweep") or 0
+            self.current_candles = {
+                symbol: candle for symbol, candle in state["current"].items() if candle["minute_ts"] >= last_sweep
+            }
+            self.closed_candles = sorted(
+                ((symbol, candle) for (symbol, _), candle in state["closed"].items() if candle["minute_ts"] >= last_sweep),
+                key=lambda item: item[1]["minute_ts"]
+            )
+            self.last_closed = state["last_closed"]
+            self.rollup_candles = {}
+            for (tf, symbol), candle in state["rollup"].items():
+                self.rollup_candles.setdefault(tf, {})[symbol] = candle
+            self.last_sweep = state["meta"].get("last_sweep")
+            print(f"DEBUG: Restored {len(self.current_candles)} open candles from snapshot "
+                  f"({time.time() - saved_at:.1f}s old).")
+        self.save_snapshot(full=True)
+        return state is not None
+
+    def tick_timestamp(self, ltpc, received_ms=None):
+        """
+        Exchange time of the last trade (ltt), in seconds. Falls back to the
+        receive time when the feed has none, or when it is older than
+        CANDLE_LTT_MAX_LAG_MS (a quote update without a new trade).
+        """
+        received_ms = received_ms or int(time.time() * 1000)
+        ltt = int(ltpc.get("ltt", 0) or 0)
+        if ltt and received_ms - ltt <= settings.CANDLE_LTT_MAX_LAG_MS:
+            return ltt // 1000
+        return received_ms // 1000
+
+    def parse_full_data(self, data, received_ms=None):
         """
         Parses the 'fullFeed' structure from Upstox WebSocket.
         Extracts OHLC, Volume, OI, Greeks, and Market Depth Walls.
@@ -42,13 +160,14 @@ class Resampler:
             market_ff = data["fullFeed"]["marketFF"]
             
             # 1. Basic Data
+            # v3 feeds carry vtt/oi on marketFF; older payloads nested them
             ltp = float(market_ff.get("ltpc", {}).get("ltp", 0))
-            vtt = int(market_ff.get("ltpc", {}).get("volume", 0)) # Volume Traded Today
-            oi = int(market_ff.get("marketOHLC", {}).get("oi", 0))
+            vtt = int(market_ff.get("vtt", market_ff.get("ltpc", {}).get("volume", 0))) # Volume Traded Today
+            oi = int(float(market_ff.get("oi", market_ff.get("marketOHLC", {}).get("oi", 0))))
             
-            # 2. Greeks
-            greeks = data["fullFeed"].get("optionGreeks", {})
-            iv = float(greeks.get("iv", 0))
+            # 2. Greeks (v3 feeds carry them inside marketFF, IV alongside)
+            greeks = market_ff.get("optionGreeks") or data["fullFeed"].get("optionGreeks", {})
+            iv = float(market_ff.get("iv", greeks.get("iv", 0)))
             delta = float(greeks.get("delta", 0))
             theta = float(greeks.get("theta", 0))
             gamma = float(greeks.get("gamma", 0))
@@ -58,8 +177,8 @@ class Resampler:
             market_level = market_ff.get("marketLevel", {})
             bid_ask_quote = market_level.get("bidAskQuote", [])
             
-            total_buy_qty = int(market_level.get("totalBuyQty", 0))
-            total_sell_qty = int(market_level.get("totalSellQty", 0))
+            total_buy_qty = int(float(market_ff.get("tbq", market_level.get("totalBuyQty", 0))))
+            total_sell_qty = int(float(market_ff.get("tsq", market_level.get("totalSellQty", 0))))
             
             best_bid = 0.0
             best_ask = 0.0
@@ -106,24 +225,82 @@ class Resampler:
                 "max_buy_wall_qty": max_buy_wall_qty,
                 "max_sell_wall_price": max_sell_wall_price,
                 "max_sell_wall_qty": max_sell_wall_qty,
-                "timestamp": int(time.time()) # Current processing time
+                "timestamp": self.tick_timestamp(market_ff.get("ltpc", {}), received_ms)
             }
             
         except Exception as e:
             print(f"Error parsing full data: {e}")
             return None
 
+    def parse_light_data(self, data, received_ms=None):
+        """
+        Parses the cheaper subscription modes ('ltpc', 'option_greeks') and
+        index ticks. Fields the mode does not carry are zero; Greeks can be
+        filled in afterwards by the GreeksEngine.
+        """
+        try:
+            first_level = data.get("firstLevelWithGreeks") or {}
+            source = first_level or data.get("fullFeed", {}).get("indexFF") or data
+            ltpc = source.get("ltpc")
+            if not ltpc:
+                return None
+
+            greeks = first_level.get("optionGreeks", {})
+            depth = first_level.get("firstDepth", {})
+
+            return {
+                "ltp": float(ltpc.get("ltp", 0)),
+                "vtt": int(source.get("vtt", 0)),
+                "oi": int(float(source.get("oi", 0))),
+                "total_buy_qty": 0,
+                "total_sell_qty": 0,
+                "iv": float(source.get("iv", 0)),
+                "delta": float(greeks.get("delta", 0)),
+                "theta": float(greeks.get("theta", 0)),
+                "gamma": float(greeks.get("gamma", 0)),
+                "vega": float(greeks.get("vega", 0)),
+                "best_bid": float(depth.get("bidP", 0)),
+                "best_ask": float(depth.get("askP", 0)),
+                # One level is not enough to find a wall
+                "max_buy_wall_price": 0.0,
+                "max_buy_wall_qty": -1,
+                "max_sell_wall_price": 0.0,
+                "max_sell_wall_qty": -1,
+                "timestamp": self.tick_timestamp(ltpc, received_ms)
+            }
+
+        except Exception as e:
+            print(f"Error parsing light data: {e}")
+            return None
+
+    def parse_tick(self, data, received_ms=None):
+        """
+        Parses a tick in any subscription mode. `received_ms` is when the
+        frame was received (FeedResponse.currentTs), now if not given.
+        """
+        if "fullFeed" in data and "marketFF" in data["fullFeed"]:
+            return self.parse_full_data(data, received_ms)
+        return self.parse_light_data(data, received_ms)
+
     async def process_tick(self, symbol, raw_data):
         """
         Processes a single tick. Aggregates into 1-minute candles.
         """
-        parsed = self.parse_full_data(raw_data)
-        if not parsed:
-            return
+        parsed = self.parse_tick(raw_data)
+        if parsed:
+            self.update_candle(symbol, parsed)
 
-        # Determine current minute bucket
+    def update_candle(self, symbol, parsed):
+        """
+        Folds a parsed tick into the symbol's open 1-minute candle.
+        """
+
+        # Determine current minute bucket; a trade late for a swept minute counts in the next one
         ts = parsed["timestamp"]
-        minute_ts = (ts // 60) * 60
+        minute_ts = bucket_start(ts, 60)
+        if self.last_sweep and minute_ts < self.last_sweep:
+            minute_ts = self.last_sweep
+        self.dirty.add(symbol)
         
         if symbol not in self.current_candles:
             self.current_candles[symbol] = {
@@ -133,15 +310,19 @@ class Resampler:
                 "low": parsed["ltp"],
                 "close": parsed["ltp"],
                 "volume": parsed["vtt"], # Will be updated to max(vtt)
-                "last_tick": parsed # Store full last tick for snapshot values
+                "last_tick": parsed, # Store full last tick for snapshot values
+                "tick_count": 0,
+                "buy_volume": 0,
+                "sell_volume": 0,
+                "profile": {} # {price level: traded volume}
             }
         else:
             candle = self.current_candles[symbol]
             
             # Check if new minute
             if minute_ts > candle["minute_ts"]:
-                # Finalize and Store previous candle
-                await self.store_candle(symbol, candle)
+                # Finalize previous candle; stored and published on the next sweep
+                self.closed_candles.append((symbol, candle))
                 
                 # Start new candle
                 self.current_candles[symbol] = {
@@ -151,7 +332,11 @@ class Resampler:
                     "low": parsed["ltp"],
                     "close": parsed["ltp"],
                     "volume": parsed["vtt"],
-                    "last_tick": parsed
+                    "last_tick": parsed,
+                    "tick_count": 0,
+                    "buy_volume": 0,
+                    "sell_volume": 0,
+                    "profile": {}
                 }
             else:
                 # Update existing candle
@@ -161,18 +346,265 @@ class Resampler:
                 candle["volume"] = max(candle["volume"], parsed["vtt"]) # Max VTT
                 candle["last_tick"] = parsed # Always update to latest for snapshot
 
-    async def store_candle(self, symbol, candle):
+        self.apply_flow(symbol, self.current_candles[symbol], parsed)
+
+    def apply_flow(self, symbol, candle, parsed):
         """
-        Inserts the aggregated candle into the database.
+        Adds one tick to the candle's order flow. The volume traded since the
+        previous tick (VTT delta) goes to the volume-at-price profile and to
+        the aggressor side: a buy if the trade lifted the previous ask, a sell
+        if it hit the previous bid, otherwise by the tick rule (an unchanged
+        price keeps the previous side).
         """
-        if not self.db_pool:
+        candle["tick_count"] = candle.get("tick_count", 0) + 1
+        ltp, vtt = parsed["ltp"], parsed["vtt"]
+        state = self.flow_state.get(symbol)
+        if state is None:
+            self.flow_state[symbol] = [vtt, parsed["best_bid"], parsed["best_ask"], ltp, 0]
             return
 
+        last_vtt, bid, ask, last_ltp, side = state
+        # Modes without VTT (ltpc, index) report 0; a lower VTT is a new session
+        traded = vtt - last_vtt if vtt and last_vtt else 0
+        if traded > 0 and ltp > 0:
+            if ask and ltp >= ask:
+                side = 1
+            elif bid and ltp <= bid:
+                side = -1
+            elif ltp != last_ltp:
+                side = 1 if ltp > last_ltp else -1
+            if side > 0:
+                candle["buy_volume"] = candle.get("buy_volume", 0) + traded
+            elif side < 0:
+                candle["sell_volume"] = candle.get("sell_volume", 0) + traded
+            level = round(ltp / settings.CANDLE_PROFILE_BUCKET)
+            profile = candle.setdefault("profile", {})
+            profile[level] = profile.get(level, 0) + traded
+
+        state[0] = vtt or last_vtt
+        state[1] = parsed["best_bid"] or bid
+        state[2] = parsed["best_ask"] or ask
+        state[3] = ltp or last_ltp
+        state[4] = side
+
+    def to_candle_record(self, candle):
+        """
+        Flattens a candle (OHLCV + last-tick snapshot) into CANDLE_FIELDS,
+        plus its order flow (FLOW_FIELDS).
+        """
         last_tick = candle["last_tick"]
-        
-        # Convert timestamp to datetime
-        dt = datetime.fromtimestamp(candle["minute_ts"])
-        
+        return {
+            "timestamp": candle["minute_ts"],
+            "open": candle["open"],
+            "high": candle["high"],
+            "low": candle["low"],
+            "close": candle["close"],
+            "volume": candle["volume"],
+            "open_interest": last_tick["oi"],
+            "total_buy_qty": last_tick["total_buy_qty"],
+            "total_sell_qty": last_tick["total_sell_qty"],
+            "iv": last_tick["iv"],
+            "delta": last_tick["delta"],
+            "theta": last_tick["theta"],
+            "gamma": last_tick["gamma"],
+            "vega": last_tick["vega"],
+            "best_bid": last_tick["best_bid"],
+            "best_ask": last_tick["best_ask"],
+            "max_buy_wall_price": last_tick["max_buy_wall_price"],
+            "max_buy_wall_qty": last_tick["max_buy_wall_qty"],
+            "max_sell_wall_price": last_tick["max_sell_wall_price"],
+            "max_sell_wall_qty": last_tick["max_sell_wall_qty"],
+            "tick_count": candle.get("tick_count", 0),
+            "buy_volume": candle.get("buy_volume", 0),
+            "sell_volume": candle.get("sell_volume", 0),
+            "profile": profile_levels(candle.get("profile")),
+        }
+
+    def roll_up(self, timeframe, symbol, candle):
+        """
+        Merges a closed 1m candle into the open `timeframe` candle for symbol.
+        Returns the previous higher-timeframe candle if a new bucket started.
+        """
+        bucket = bucket_start(candle["minute_ts"], timeframe)
+        open_candles = self.rollup_candles.setdefault(timeframe, {})
+        current = open_candles.get(symbol)
+        finished = None
+
+        if current and current["minute_ts"] != bucket:
+            finished, current = current, None
+
+        if current is None:
+            open_candles[symbol] = dict(candle, minute_ts=bucket, profile=dict(candle.get("profile") or {}))
+        else:
+            current["high"] = max(current["high"], candle["high"])
+            current["low"] = min(current["low"], candle["low"])
+            current["close"] = candle["close"]
+            current["volume"] = max(current["volume"], candle["volume"])
+            current["last_tick"] = candle["last_tick"]
+            for field in ("tick_count", "buy_volume", "sell_volume"):
+                current[field] = current.get(field, 0) + candle.get(field, 0)
+            profile = current.setdefault("profile", {})
+            for level, volume in (candle.get("profile") or {}).items():
+                profile[level] = profile.get(level, 0) + volume
+
+        return finished
+
+    async def sweep(self, boundary):
+        """
+        Timer-driven finalization at a minute boundary.
+        1. Closes every 1m candle older than `boundary`, ticking or not.
+        2. Carries a flat candle forward for subscribed instruments with no
+           trades; last closes are dropped at the session close.
+        3. Rolls 1m candles up into higher timeframes and closes finished buckets.
+        4. Stores the 1m batch and publishes all timeframes in one round trip.
+        Outside market hours, with no candle left open, it does nothing.
+        """
+        active = market_session.is_active()
+        if not self.current_candles and not self.closed_candles and not active:
+            # Session closed: nothing is carried into the next one
+            self.last_closed.clear()
+            return []
+
+        # 1. Close open 1m candles (tick-path closes are already buffered)
+        for symbol, candle in list(self.current_candles.items()):
+            if candle["minute_ts"] < boundary:
+                self.closed_candles.append((symbol, candle))
+                del self.current_candles[symbol]
+
+        batch, self.closed_candles = self.closed_candles, []
+        self.closed_journaled = 0
+        self.last_sweep = boundary
+        # OI build-up is classified against the previous minute
+        self.option_chains.roll_reference()
+        batch.sort(key=lambda item: item[1]["minute_ts"])
+        previous = {}  # {symbol: last 1m candle before this batch}, for features
+        for symbol, candle in batch:
+            previous.setdefault(symbol, self.last_closed.get(symbol))
+            self.last_closed[symbol] = candle
+
+        # 2. Flat candles: O=H=L=C=last close, volume (VTT) unchanged
+        if settings.CANDLE_CARRY_FORWARD and active:
+            last_minute = boundary - 60
+            self.prune_last_closed(last_minute, await asyncio.to_thread(self.subscribed_instruments))
+            for symbol, last in list(self.last_closed.items()):
+                if last["minute_ts"] < last_minute:
+                    flat = {
+                        "minute_ts": last_minute,
+                        "open": last["close"],
+                        "high": last["close"],
+                        "low": last["close"],
+                        "close": last["close"],
+                        "volume": last["volume"],
+                        "last_tick": last["last_tick"],
+                        "tick_count": 0,
+                        "buy_volume": 0,
+                        "sell_volume": 0,
+                        "profile": {}
+                    }
+                    batch.append((symbol, flat))
+                    previous.setdefault(symbol, last)
+                    self.last_closed[symbol] = flat
+
+        # 3. Higher timeframes
+        finished = {tf: [] for tf in settings.CANDLE_TIMEFRAMES if tf != 60}
+        for symbol, candle in batch:
+            for tf in finished:
+                done = self.roll_up(tf, symbol, candle)
+                if done:
+                    finished[tf].append((symbol, done))
+
+        for tf in finished:
+            open_candles = self.rollup_candles.get(tf, {})
+            for symbol, candle in list(open_candles.items()):
+                if candle["minute_ts"] + tf <= boundary:
+                    finished[tf].append((symbol, candle))
+                    del open_candles[symbol]
+
+        if not batch:
+            self.save_snapshot(full=True)
+            return []
+
+        # 4. One write, one publish round trip
+        records = [(symbol, self.to_candle_record(candle)) for symbol, candle in batch]
+        features = None
+        if settings.FEATURES_ENABLED:
+            self.attach_features(records, previous)
+            features = (FEATURE_VERSION, FEATURE_NAMES)
+        await self.store_candles(records)
+        # Snapshot right after the write: a restart won't store these candles again
+        self.save_snapshot(full=True)
+
+        messages = [encode_candle_batch(boundary, records, 60, features)]
+        for tf, candles in finished.items():
+            if candles:
+                tf_records = [(symbol, self.to_candle_record(candle)) for symbol, candle in candles]
+                messages.append(encode_candle_batch(boundary, tf_records, tf))
+        try:
+            bus.publish_many(CANDLE_CLOSED, messages)
+        except Exception as e:
+            print(f"Error publishing closed candles: {e}")
+
+        return records
+
+    def subscribed_instruments(self):
+        """The feed's current subscription, or None when it is unknown."""
+        try:
+            raw = redis_client.get(FEED_INSTRUMENTS_KEY)
+        except Exception as e:
+            print(f"WARNING: Feed instruments unavailable: {e}")
+            return None
+        return set(json.loads(raw)) if raw else None
+
+    def prune_last_closed(self, last_minute, subscribed=None):
+        """
+        Stops carrying forward instruments that are no longer subscribed,
+        have expired, or have not traded for CANDLE_CARRY_FORWARD_IDLE_MINUTES.
+        """
+        idle_since = last_minute - settings.CANDLE_CARRY_FORWARD_IDLE_MINUTES * 60
+        for symbol, last in list(self.last_closed.items()):
+            contract = self.option_chains.contracts.get(symbol)
+            if (
+                (subscribed is not None and symbol not in subscribed)
+                or (contract and expiry_timestamp(contract[0][1]) <= last_minute)
+                or last["last_tick"]["timestamp"] < idle_since
+            ):
+                del self.last_closed[symbol]
+
+    def attach_features(self, records, previous):
+        """
+        Feature stage: computes the versioned feature vector of every closed
+        1m candle once, here, so the DB, live strategies and backtests all
+        see the same values. `previous` holds each symbol's candle before
+        the batch (records are in time order).
+        """
+        last = {}
+        for symbol, record in records:
+            prev = last.get(symbol)
+            if prev is None and previous.get(symbol):
+                prev = self.to_candle_record(previous[symbol])
+            record["features"] = compute_features(record, prev)
+            last[symbol] = record
+
+    async def flush(self, now=None):
+        """
+        Sweeps at the minute boundary at or before `now` (defaults to the current time).
+        """
+        now = now if now is not None else time.time()
+        return await self.sweep(bucket_start(now, 60))
+
+    async def store_candle(self, symbol, candle):
+        """
+        Inserts a single aggregated candle into the database.
+        """
+        await self.store_candles([(symbol, self.to_candle_record(candle))])
+
+    async def store_candles(self, records):
+        """
+        Inserts a batch of candle records [(symbol, record)] in one round trip.
+        """
+        if not self.db_pool or not records:
+            return
+
         query = """
         INSERT INTO market_candles (
             timestamp, symbol,
@@ -193,20 +625,109 @@ class Resampler:
         )
         ON CONFLICT (timestamp, symbol) DO NOTHING;
         """
+
+        rows = [
+            (
+                datetime.fromtimestamp(r["timestamp"]), symbol,
+                r["open"], r["high"], r["low"], r["close"], r["volume"],
+                r["open_interest"], r["total_buy_qty"], r["total_sell_qty"],
+                r["iv"], r["delta"], r["theta"], r["gamma"], r["vega"],
+                r["best_bid"], r["best_ask"],
+                r["max_buy_wall_price"], r["max_buy_wall_qty"],
+                r["max_sell_wall_price"], r["max_sell_wall_qty"]
+            )
+            for symbol, r in records
+        ]
         
-        try:
-            await self.db_pool.execute(
-                query,
-                dt, symbol,
-                candle["open"], candle["high"], candle["low"], candle["close"], candle["volume"],
-                last_tick["oi"], last_tick["total_buy_qty"], last_tick["total_sell_qty"],
-                last_tick["iv"], last_tick["delta"], last_tick["theta"], last_tick["gamma"], last_tick["vega"],
-                last_tick["best_bid"], last_tick["best_ask"],
-                last_tick["max_buy_wall_price"], last_tick["max_buy_wall_qty"],
-                last_tick["max_sell_wall_price"], last_tick["max_sell_wall_qty"]
+        flow_rows = [
+            (
+                datetime.fromtimestamp(r["timestamp"]), symbol,
+                r["tick_count"], r["buy_volume"], r["sell_volume"],
+                r["profile"][0], r["profile"][1]
             )
-            # print(f"DEBUG: Stored candle for {symbol} at {dt}")
+            for symbol, r in records if r.get("tick_count")
+        ]
+        feature_batch = feature_rows(records)
+
+        try:
+            async with self.db_pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.executemany(query, rows)
+                    if flow_rows:
+                        await conn.executemany(FLOW_QUERY, flow_rows)
+                    if feature_batch:
+                        await conn.executemany(FEATURE_QUERY, feature_batch)
+        except Exception as e:
+            print(f"Error storing candles: {e}")
+
+    async def handle_feed_message(self, data):
+        """
+        Parses every instrument in one FeedResponse frame, fills Greeks for the
+        whole batch in one vectorized pass, then updates candles.
+        """
+        parsed_batch = {}
+        received_ms = int(data.get("currentTs", 0)) or None
+        for symbol, feed in data.get("feeds", {}).items():
+            parsed = self.parse_tick(feed, received_ms)
+            if parsed:
+                parsed_batch[symbol] = parsed
+
+        if self.greeks_engine and parsed_batch:
+            try:
+                self.greeks_engine.apply(parsed_batch)
+            except Exception as e:
+                print(f"Error computing Greeks: {e}")
+
+        try:
+            self.option_chains.update(parsed_batch)
+            self.option_chains.publish_due()
         except Exception as e:
-            print(f"Error storing candle: {e}")
+            print(f"Error updating option chains: {e}")
+
+        for symbol, parsed in parsed_batch.items():
+            self.update_candle(symbol, parsed)
+
+    async def run(self):
+        """
+        Consumes 'live_ticks' as a member of the 'resampler' consumer group.
+        Entries are acknowledged once a snapshot covers them, so after a crash
+        the stream replays exactly the ticks the restored state is missing.
+        """
+        consumer = bus.consumer(
+            LIVE_TICKS, group="resampler", consumer_name=default_consumer_name("resampler")
+        )
+        print("Resampler Running... Listening for ticks.")
+        scheduler = BoundaryScheduler(self.sweep, interval=60)
+        sweeper = asyncio.create_task(scheduler.run())
+        pending = []
+
+        try:
+            while True:
+                # Blocking Redis read runs off the event loop
+                messages = await asyncio.to_thread(consumer.read)
+                for _, raw in messages:
+                    try:
+                        await self.handle_feed_message(json.loads(raw))
+                    except Exception as e:
+                        print(f"Error processing tick message: {e}")
+                pending.extend(message_id for message_id, _ in messages)
+                if self.snapshots is None or time.monotonic() >= self.next_snapshot:
+                    self.save_snapshot()
+                    consumer.ack(pending)
+                    pending = []
+        finally:
+            sweeper.cancel()
 
 resampler = Resampler()
+
+async def main():
+    await resampler.start()
+    if settings.SNAPSHOT_ENABLED:
+        resampler.restore_snapshot()
+    try:
+        await resampler.run()
+    finally:
+        await resampler.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
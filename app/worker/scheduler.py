@@ -0,0 +1,48 @@
+import asyncio
+import time
+from app.core.config import settings
+from app.core.utils import bucket_start
+
+
+class BoundaryScheduler:
+    """
+    Calls `callback(boundary_ts)` once per bucket boundary.
+
+    Boundaries are aligned to exchange time (see bucket_start) and the
+    callback fires `grace_ms` after the boundary, so ticks stamped just
+    before it are already processed. If the loop stalls past several
+    boundaries, only the latest one is fired; sweeps close everything older.
+    """
+
+    def __init__(self, callback, interval=60, grace_ms=None, clock=time.time):
+        self.callback = callback
+        self.interval = interval
+        self.grace = (settings.CANDLE_GRACE_MS if grace_ms is None else grace_ms) / 1000
+        self.clock = clock
+        self.last_boundary = None
+
+    def next_boundary(self, now):
+        return bucket_start(now, self.interval) + self.interval
+
+    async def run(self):
+        boundary = self.next_boundary(self.clock())
+
+        while True:
+            # asyncio timers can fire a little early; sleep again until due
+            delay = boundary + self.grace - self.clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            latest = bucket_start(self.clock() - self.grace, self.interval)
+            if latest > boundary:
+                print(f"WARNING: Scheduler skipped {(latest - boundary) // self.interval} boundaries.")
+                boundary = latest
+
+            try:
+                await self.callback(boundary)
+            except Exception as e:
+                print(f"Error in scheduled sweep at {boundary}: {e}")
+
+            self.last_boundary = boundary
+            boundary += self.interval
@@ -1,146 +1,338 @@
 import json
-import asyncio
+import os
+import queue
+import threading
+import time
 import redis
-from app.core.redis_client import redis_client
 from app.core.config import settings
+from app.core.bus import get_bus, default_consumer_name, LIVE_TICKS, CANDLE_CLOSED, CHAIN_UPDATES
+from app.core.codec import decode_candle_batch
+from app.core.features import FEATURE_VERSION, FeatureRing
+from app.core.snapshot import SnapshotStore
+from app.strategies.base import HOOKS, load_strategy_class
+from app.strategies.isolation import SharedCandleBuffer, IsolatedStrategy
+from app.services.signal_router import SignalRouter, default_sinks
+# Backwards compatible import path for the original scoring strategy
+from app.strategies.sniper import SniperStrategy
 
-class SniperStrategy:
-    def __init__(self):
-        self.latest_candles = {}  # {instrument_token: candle_data}
+# Used when STRATEGY_CONFIG does not exist
+DEFAULT_STRATEGIES = [
+    {"name": "sniper", "class": "app.strategies.sniper:SniperStrategy", "params": {}},
+]
+
+# Hook -> (bus channel, consumer group). Ticks and chain snapshots are only
+# worth their latest value, so those are tailed without a group.
+HOOK_CHANNELS = {
+    "on_candle": (CANDLE_CLOSED, "strategy"),
+    "on_tick": (LIVE_TICKS, None),
+    "on_chain_update": (CHAIN_UPDATES, None),
+}
+
+
+class StrategyHost:
+    """
+    Runs several strategy plugins side by side on one set of bus streams.
+
+    Strategies come from the JSON file at STRATEGY_CONFIG and are reloaded
+    when it changes: new entries start, removed ones stop, changed params are
+    applied in place. Entries with "isolated": true run in their own process,
+    fed through a shared-memory candle buffer. CPU time is accounted per
+    strategy and published to the STRATEGY_STATS hash.
+    """
+
+    def __init__(self, config_path=None):
+        self.config_path = config_path or settings.STRATEGY_CONFIG
         self.redis = redis.Redis(
             host=settings.REDIS_HOST,
             port=settings.REDIS_PORT,
             decode_responses=True
         )
+        self.bus = get_bus(self.redis)
+        self.router = SignalRouter(default_sinks(self.bus))
+        self.features = FeatureRing()  # Last FEATURE_RING_SIZE 1m feature vectors per symbol
+        self.strategies = {}  # {name: BaseStrategy} running in this process
+        self.isolated = {}  # {name: IsolatedStrategy}
+        self.specs = {}  # {name: config entry}
+        self.cpu = {}  # {name: [cpu_seconds, calls]} for in-process strategies
+        self.config_mtime = None
+        self.candle_buffer = None
+        self.parser = None
+        self.events = queue.Queue(maxsize=settings.STRATEGY_QUEUE_SIZE)
+        self.pumps = {}  # {hook: thread}
+        self.routes = {hook: [] for hook in HOOKS}  # {hook: [(name, strategy)]} in-process
+        self.snapshots = SnapshotStore("strategies") if settings.SNAPSHOT_ENABLED else None
+        self.restored = {}  # {name: state} from the last snapshot, applied when the strategy starts
+
+    # --- Configuration ---
+
+    def read_config(self):
+        if not os.path.exists(self.config_path):
+            return DEFAULT_STRATEGIES
+        with open(self.config_path) as f:
+            config = json.load(f)
+        return [spec for spec in config.get("strategies", []) if spec.get("enabled", True)]
+
+    def reload_if_changed(self):
+        mtime = os.path.getmtime(self.config_path) if os.path.exists(self.config_path) else 0
+        if mtime == self.config_mtime:
+            return False
+        try:
+            specs = self.read_config()
+        except Exception as e:
+            # Keep running the previous set on a broken edit
+            print(f"Error reading strategy config {self.config_path}: {e}")
+            self.config_mtime = mtime
+            return False
+        self.config_mtime = mtime
+        self.apply_config(specs)
+        return True
+
+    def apply_config(self, specs):
+        wanted = {spec["name"]: spec for spec in specs}
 
-    def calculate_vwap(self, candle):
+        for name in list(self.specs):
+            old = self.specs[name]
+            new = wanted.get(name)
+            if new is None or new["class"] != old["class"] or new.get("isolated", False) != old.get("isolated", False):
+                self.stop_strategy(name)
+
+        for name, spec in wanted.items():
+            if name not in self.specs:
+                try:
+                    self.start_strategy(spec)
+                except Exception as e:
+                    print(f"Error starting strategy '{name}': {e}")
+            elif spec.get("params", {}) != self.specs[name].get("params", {}):
+                self.specs[name] = spec
+                if name in self.isolated:
+                    self.isolated[name].configure(spec.get("params", {}))
+                else:
+                    self.strategies[name].configure(spec.get("params", {}))
+                print(f"DEBUG: Strategy '{name}' reconfigured.")
+
+        self.build_routes()
+        self.ensure_pumps()
+        print(f"DEBUG: Strategies active: {list(self.specs)}")
+
+    def start_strategy(self, spec):
+        name = spec["name"]
+        if spec.get("isolated", False):
+            if self.candle_buffer is None:
+                self.candle_buffer = SharedCandleBuffer()
+            self.isolated[name] = IsolatedStrategy(spec, self.candle_buffer)
+        else:
+            cls = load_strategy_class(spec["class"])
+            self.strategies[name] = cls(name, spec.get("params", {}), self.bus)
+            self.strategies[name].router = self.router
+            self.strategies[name].features = self.features
+            if name in self.restored:
+                self.strategies[name].set_state(self.restored.pop(name))
+                print(f"DEBUG: Strategy '{name}' state restored from snapshot.")
+            self.cpu[name] = [0.0, 0]
+        self.specs[name] = spec
+
+    def stop_strategy(self, name):
+        if name in self.isolated:
+            self.isolated.pop(name).stop()
+        self.strategies.pop(name, None)
+        self.cpu.pop(name, None)
+        self.specs.pop(name, None)
+
+    def build_routes(self):
         """
-        Calculates approximate VWAP for the candle.
+        Resolves once per config change which strategies receive each hook,
+        keeping the per-tick dispatch a plain list walk.
         """
-        return (candle['high'] + candle['low'] + candle['close']) / 3
+        self.routes = {
+            hook: [
+                (name, strategy) for name, strategy in self.strategies.items()
+                if type(strategy).subscribes(hook, strategy.params)
+            ]
+            for hook in HOOKS
+        }
+
+    # --- Streams ---
 
-    def get_strike_grade(self, delta):
+    def needed_hooks(self):
+        hooks = {"on_candle"}
+        hooks.update(hook for hook, receivers in self.routes.items() if receivers)
+        for handle in self.isolated.values():
+            hooks.update(handle.hooks)
+        return hooks
+
+    def ensure_pumps(self):
         """
-        Determines the strike grade based on Delta.
+        Starts (once) a reader thread per stream some strategy consumes.
         """
-        if 0.4 <= abs(delta) <= 0.6:
-            return "ATM/Near-OTM (Prime Target)"
-        elif abs(delta) > 0.6:
-            return "ITM (High Delta)"
-        else:
-            return "OTM (Low Delta)"
+        for hook in self.needed_hooks():
+            if hook in self.pumps:
+                continue
+            if hook == "on_tick" and self.parser is None:
+                # Reuse the resampler's tick parsers
+                from app.worker.resampler import Resampler
+                self.parser = Resampler()
+            channel, group = HOOK_CHANNELS[hook]
+            consumer = self.bus.consumer(
+                channel, group=group, consumer_name=default_consumer_name(group) if group else None
+            )
+            thread = threading.Thread(target=self.pump, args=(hook, consumer), name=f"strategy-{hook}", daemon=True)
+            thread.start()
+            self.pumps[hook] = thread
+
+    def pump(self, hook, consumer):
+        while True:
+            try:
+                messages = consumer.read()
+                if messages:
+                    self.events.put((hook, consumer, messages))
+            except Exception as e:
+                print(f"Error reading {hook} stream: {e}")
+                time.sleep(1)
+
+    # --- Dispatch ---
+
+    def call(self, name, strategy, hook, *args):
+        started = time.thread_time()
+        try:
+            getattr(strategy, hook)(*args)
+        except Exception as e:
+            print(f"Error in strategy '{name}' ({hook}): {e}")
+        account = self.cpu[name]
+        account[0] += time.thread_time() - started
+        account[1] += 1
 
-    def calculate_trade_score(self, candle, prev_candle):
+    def dispatch(self, hook, *args):
+        for name, strategy in self.routes[hook]:
+            self.call(name, strategy, hook, *args)
+        for handle in self.isolated.values():
+            if hook in handle.hooks:
+                handle.send((hook,) + args)
+
+    def has_receivers(self, hook):
+        return bool(self.routes[hook]) or any(hook in handle.hooks for handle in self.isolated.values())
+
+    def process_batch(self, candles):
         """
-        Calculates the trade score based on multiple factors.
-        Total Score: 100
+        Feeds one minute's grid of closed candles [(symbol, candle)] to every strategy.
         """
-        score = 0
-        breakdown = []
-
-        # 1. Wall Break (30 pts)
-        # If close > max_sell_wall_price (and wall exists)
-        max_sell_wall = candle.get('max_sell_wall_price', 0)
-        if max_sell_wall > 0 and candle['close'] > max_sell_wall:
-            score += 30
-            breakdown.append("Wall Break (+30)")
-
-        # 2. OI Unwinding (20 pts)
-        # If OI decreased (Sellers leaving)
-        if prev_candle and candle['open_interest'] < prev_candle['open_interest']:
-            score += 20
-            breakdown.append("OI Unwinding (+20)")
-
-        # 3. Pressure Check (20 pts)
-        # If Demand > Supply
-        if candle['total_buy_qty'] > candle['total_sell_qty']:
-            score += 20
-            breakdown.append("Buying Pressure (+20)")
-
-        # 4. Greeks Confirmation (15 pts)
-        # Split: Delta (10), Gamma (5)
-        delta = candle.get('delta', 0)
-        gamma = candle.get('gamma', 0)
-        
-        if abs(delta) > 0.40:
-            score += 10
-            breakdown.append("Good Delta (+10)")
-        
-        if gamma > 0.001:
-            score += 5
-            breakdown.append("Gamma Accel (+5)")
-
-        # 5. Trend Check (15 pts)
-        # If Close > VWAP
-        vwap = self.calculate_vwap(candle)
-        if candle['close'] > vwap:
-            score += 15
-            breakdown.append("Above VWAP (+15)")
-
-        return score, breakdown
-
-    def process_candle(self, symbol, candle_data):
+        for symbol, candle in candles:
+            # Ring first, so a strategy's window already ends with this candle
+            if candle.get("feature_version") == FEATURE_VERSION and candle.get("timeframe", 60) == 60:
+                self.features.push(symbol, candle["timestamp"], list(candle["features"].values()))
+            self.dispatch("on_candle", symbol, candle)
+
+        receivers = [handle for handle in self.isolated.values() if "on_candle" in handle.hooks]
+        if receivers and candles:
+            start, end, _ = self.candle_buffer.write(candles)
+            for handle in receivers:
+                handle.send_candles(start, end, self.candle_buffer.symbols)
+
+    def handle_messages(self, hook, messages):
+        for _, raw in messages:
+            try:
+                if hook == "on_candle":
+                    self.process_batch(decode_candle_batch(raw))
+                elif hook == "on_tick":
+                    # The reader keeps running after tick mode is switched off
+                    if not self.has_receivers("on_tick"):
+                        continue
+                    data = json.loads(raw)
+                    received_ms = int(data.get("currentTs", 0)) or None
+                    for symbol, feed in data.get("feeds", {}).items():
+                        tick = self.parser.parse_tick(feed, received_ms)
+                        if tick:
+                            self.dispatch("on_tick", symbol, tick)
+                else:
+                    self.dispatch("on_chain_update", json.loads(raw))
+            except Exception as e:
+                print(f"Error processing {hook} message: {e}")
+
+    # --- Snapshots ---
+
+    def restore_snapshot(self):
+        if self.snapshots is None:
+            return
+        state, _ = self.snapshots.load()
+        self.restored = (state or {}).get("strategies", {})
+
+    def save_snapshot(self):
         """
-        Processes a new candle: calculates score and publishes signal.
+        Written before a candle batch is acknowledged, so a restarted host
+        resumes from the snapshot and gets every later candle replayed.
         """
-        prev_candle = self.latest_candles.get(symbol)
-        
-        # Calculate Score
-        score, breakdown = self.calculate_trade_score(candle_data, prev_candle)
-        
-        # Determine Signal
-        signal_type = "NEUTRAL"
-        if score >= 80:
-            signal_type = "STRONG BUY"
-        elif score >= 60:
-            signal_type = "WATCHLIST"
-            
-        # Strike Grade
-        delta = candle_data.get('delta', 0)
-        strike_grade = self.get_strike_grade(delta)
-
-        # Log Analysis
-        print(f"[{symbol}] Score: {score}/100 | Signal: {signal_type} | Grade: {strike_grade}")
-        if breakdown:
-            print(f"  -> Factors: {', '.join(breakdown)}")
-
-        # Publish Signal if significant
-        if signal_type in ["STRONG BUY", "WATCHLIST"]:
-            signal_payload = {
-                "symbol": symbol,
-                "signal": signal_type,
-                "score": score,
-                "breakdown": breakdown,
-                "strike_grade": strike_grade,
-                "price": candle_data['close'],
-                "timestamp": candle_data['timestamp']
-            }
-            self.redis.publish("trade_signals", json.dumps(signal_payload))
-            print(f"  -> Signal Published: {signal_type}")
-
-        # Update Memory
-        self.latest_candles[symbol] = candle_data
+        if self.snapshots is None:
+            return
+        states = {}
+        for name, strategy in self.strategies.items():
+            state = strategy.get_state()
+            if state is not None:
+                states[name] = state
+        try:
+            self.snapshots.save({"strategies": states})
+        except Exception as e:
+            print(f"Error writing strategy snapshot: {e}")
+
+    # --- Accounting ---
+
+    def stats(self):
+        result = {}
+        for name, (cpu_seconds, calls) in self.cpu.items():
+            result[name] = {"cpu_seconds": cpu_seconds, "calls": calls, "dropped": 0, "isolated": False}
+        for name, handle in self.isolated.items():
+            result[name] = handle.cpu_stats()
+        for entry in result.values():
+            entry["cpu_ms_per_call"] = entry["cpu_seconds"] * 1000 / entry["calls"] if entry["calls"] else 0.0
+        return result
+
+    def publish_stats(self):
+        stats = self.stats()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.delete("STRATEGY_STATS")
+        if stats:
+            pipe.hset("STRATEGY_STATS", mapping={name: json.dumps(entry) for name, entry in stats.items()})
+        pipe.set("SIGNAL_ROUTER_STATS", json.dumps(self.router.stats()))
+        pipe.execute()
+        for name, entry in stats.items():
+            print(f"DEBUG: Strategy '{name}' CPU {entry['cpu_seconds']:.3f}s over {entry['calls']} calls")
 
     def run(self):
         """
-        Subscribes to Redis 'candle_closed' channel and processes messages.
+        With the streams backend candles are consumed in the 'strategy'
+        group, so a restarted host resumes from its last acknowledged candle.
         """
-        pubsub = self.redis.pubsub()
-        pubsub.subscribe("candle_closed")
-        print("SniperStrategy Engine Running... Listening for candles.")
+        self.router.start()
+        self.restore_snapshot()
+        self.reload_if_changed()
+        print("StrategyHost Running... Listening for candles.")
+        next_reload = time.monotonic() + settings.STRATEGY_RELOAD_SECONDS
+        next_stats = time.monotonic() + settings.STRATEGY_STATS_SECONDS
 
-        for message in pubsub.listen():
-            if message['type'] == 'message':
+        try:
+            while True:
                 try:
-                    data = json.loads(message['data'])
-                    symbol = data.get('symbol')
-                    candle = data.get('candle')
-                    
-                    if symbol and candle:
-                        self.process_candle(symbol, candle)
-                except Exception as e:
-                    print(f"Error processing message: {e}")
+                    hook, consumer, messages = self.events.get(timeout=1)
+                    self.handle_messages(hook, messages)
+                    if hook == "on_candle":
+                        self.save_snapshot()
+                    consumer.ack([message_id for message_id, _ in messages])
+                except queue.Empty:
+                    pass
+
+                now = time.monotonic()
+                if now >= next_reload:
+                    self.reload_if_changed()
+                    next_reload = now + settings.STRATEGY_RELOAD_SECONDS
+                if now >= next_stats:
+                    self.publish_stats()
+                    next_stats = now + settings.STRATEGY_STATS_SECONDS
+        finally:
+            for name in list(self.isolated):
+                self.stop_strategy(name)
+            if self.candle_buffer:
+                self.candle_buffer.close()
+            if self.snapshots:
+                self.snapshots.close()
 
 if __name__ == "__main__":
-    strategy = SniperStrategy()
-    strategy.run()
+    host = StrategyHost()
+    host.run()
@@ -0,0 +1,111 @@
+"""
+Parquet archive benchmark: write time for one trading day of ticks and
+reload time for a month of 1m candles.
+
+Usage:
+    python -m benchmarks.bench_archive --instruments 100 --ticks-per-second 1
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+import numpy as np
+from app.core.codec import CANDLE_FIELDS
+from app.services.candle_history import COLUMN_DTYPES
+from app.worker.archiver import TICK_COLUMNS, write_partition, load_archive
+
+SESSION_SECONDS = 375 * 60
+SESSION_MINUTES = 375
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def synthetic_ticks(instruments, ticks_per_second, day_start_ms):
+    """Columns for one session of ticks, instruments interleaved in time order."""
+    rng = np.random.default_rng(7)
+    per_instrument = int(SESSION_SECONDS * ticks_per_second)
+    rows = instruments * per_instrument
+    symbols = np.array([f"NSE_FO|{40000 + i}" for i in range(instruments)])
+
+    columns = {}
+    for name, dtype in TICK_COLUMNS.items():
+        if name == "symbol":
+            columns[name] = np.tile(symbols, per_instrument)
+        elif name == "ts":
+            columns[name] = day_start_ms + np.repeat(
+                np.arange(per_instrument, dtype=np.int64) * int(1000 / ticks_per_second), instruments
+            )
+        elif dtype is np.int64:
+            columns[name] = rng.integers(0, 10**6, rows, dtype=np.int64)
+        else:
+            columns[name] = np.round(100 + rng.standard_normal(rows).cumsum() * 0.05, 2)
+    return columns
+
+
+def synthetic_candles(instruments, day_start):
+    rng = np.random.default_rng(11)
+    rows = instruments * SESSION_MINUTES
+    columns = {"symbol": np.repeat(np.array([f"NSE_FO|{40000 + i}" for i in range(instruments)]), SESSION_MINUTES)}
+    for field in CANDLE_FIELDS:
+        if field == "timestamp":
+            columns[field] = np.tile(day_start + np.arange(SESSION_MINUTES, dtype=np.int64) * 60, instruments)
+        elif COLUMN_DTYPES[field] is np.int64:
+            columns[field] = rng.integers(0, 10**6, rows, dtype=np.int64)
+        else:
+            columns[field] = np.round(100 + rng.standard_normal(rows), 2)
+    return columns
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--instruments", type=int, default=100)
+    parser.add_argument("--ticks-per-second", type=float, default=1.0)
+    parser.add_argument("--days", type=int, default=22, help="Trading days of candles to reload")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="sniper_archive_")
+    try:
+        # 1. One day of ticks
+        columns = synthetic_ticks(args.instruments, args.ticks_per_second, 1_700_000_000_000)
+        rows = len(columns["ts"])
+        start = time.perf_counter()
+        write_partition("ticks", "2025-01-01", "NIFTY", columns, root)
+        elapsed = time.perf_counter() - start
+        raw_mb = sum(c.nbytes for c in columns.values()) / 1e6
+        print(f"Tick write:    {rows:>12,} rows in {elapsed:6.2f}s ({rows / elapsed:,.0f} rows/s), "
+              f"{directory_size(os.path.join(root, 'ticks')) / 1e6:.1f} MB on disk ({raw_mb:.1f} MB as arrays)")
+
+        start = time.perf_counter()
+        loaded = load_archive("ticks", "2025-01-01", root=root)
+        print(f"Tick reload:   {len(loaded['ts']):>12,} rows in {time.perf_counter() - start:6.2f}s")
+
+        # 2. A month of candles, one partition per day
+        first_day = date(2025, 1, 1)
+        write_total = 0.0
+        for offset in range(args.days):
+            day = first_day + timedelta(days=offset)
+            candles = synthetic_candles(args.instruments, 1_735_700_000 + offset * 86400)
+            start = time.perf_counter()
+            write_partition("candles", day.isoformat(), "NIFTY", candles, root)
+            write_total += time.perf_counter() - start
+        print(f"Candle write:  {args.days} days in {write_total:6.2f}s ({write_total / args.days * 1000:.1f} ms/day)")
+
+        last_day = (first_day + timedelta(days=args.days - 1)).isoformat()
+        start = time.perf_counter()
+        month = load_archive("candles", first_day.isoformat(), last_day, root=root)
+        elapsed = time.perf_counter() - start
+        print(f"Candle reload: {len(month['timestamp']):>12,} rows in {elapsed:6.2f}s (numpy)")
+
+        start = time.perf_counter()
+        frame = load_archive("candles", first_day.isoformat(), last_day, root=root, as_pandas=True)
+        print(f"Candle reload: {len(frame):>12,} rows in {time.perf_counter() - start:6.2f}s (pandas)")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Throughput benchmark: Redis pub/sub vs Redis Streams for the tick bus.
+
+Usage:
+    python -m benchmarks.bench_bus --messages 50000 --batch 500
+    python -m benchmarks.bench_bus --fake   # in-process fakeredis, no server needed
+"""
+import argparse
+import json
+import threading
+import time
+import redis
+from app.core.config import settings
+from app.core.bus import PubSubBus, StreamBus
+
+STREAM = "bench_bus_ticks"
+
+
+def make_payload(size):
+    # Roughly the shape of one published FeedResponse dict
+    return json.dumps({"type": "live_feed", "feeds": {"NSE_FO|BENCH": {"pad": "x" * size}}})
+
+
+def get_client(fake):
+    if fake:
+        import fakeredis  # Optional, only for the --fake mode
+        return fakeredis.FakeRedis(decode_responses=True)
+    return redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, decode_responses=True)
+
+
+def report(label, count, elapsed):
+    print(f"{label:<40} {count:>8} msgs in {elapsed:7.3f}s  -> {count / elapsed:>10,.0f} msg/s")
+
+
+def bench_pubsub(client, payload, messages, batch):
+    bus = PubSubBus(client)
+    consumer = bus.consumer(STREAM)
+    consumer.read(block_ms=100)  # Swallow the subscribe confirmation
+
+    received = [0]
+
+    def drain():
+        # Both publish rounds; stop early once the channel goes quiet
+        while received[0] < messages * 2:
+            batch_read = consumer.read(count=batch, block_ms=2000)
+            if not batch_read:
+                break
+            received[0] += len(batch_read)
+
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+
+    start = time.perf_counter()
+    for _ in range(messages):
+        bus.publish(STREAM, payload)
+    report("pubsub publish (1 per round trip)", messages, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(0, messages, batch):
+        bus.publish_many(STREAM, [payload] * batch)
+    report(f"pubsub publish (pipelined x{batch})", messages, time.perf_counter() - start)
+
+    reader.join(timeout=10)
+    # Pub/sub drops whatever a slow subscriber could not keep up with
+    print(f"{'pubsub delivered to subscriber':<40} {received[0]:>8} of {messages * 2}")
+    consumer.close()
+
+
+def bench_streams(client, payload, messages, batch):
+    client.delete(STREAM)
+    bus = StreamBus(client, maxlen=messages * 2)
+
+    start = time.perf_counter()
+    for _ in range(messages):
+        bus.publish(STREAM, payload)
+    report("streams XADD (1 per round trip)", messages, time.perf_counter() - start)
+
+    client.delete(STREAM)
+    consumer = bus.consumer(STREAM, group="bench", consumer_name="bench-1")
+
+    start = time.perf_counter()
+    for _ in range(0, messages, batch):
+        bus.publish_many(STREAM, [payload] * batch)
+    report(f"streams XADD (pipelined x{batch})", messages, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    consumed = 0
+    while consumed < messages:
+        entries = consumer.read(count=batch, block_ms=0)
+        if not entries:
+            break
+        consumer.ack([entry_id for entry_id, _ in entries])
+        consumed += len(entries)
+    report(f"streams XREADGROUP+XACK (x{batch})", consumed, time.perf_counter() - start)
+
+    client.delete(STREAM)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--payload-size", type=int, default=1500)
+    parser.add_argument("--fake", action="store_true", help="Use fakeredis instead of a server")
+    args = parser.parse_args()
+
+    client = get_client(args.fake)
+    payload = make_payload(args.payload_size)
+    print(f"Payload: {len(payload)} bytes | Messages: {args.messages} | Batch: {args.batch}\n")
+
+    bench_pubsub(client, payload, args.messages, args.batch)
+    bench_streams(client, payload, args.messages, args.batch)
+
+
+if __name__ == "__main__":
+    main()
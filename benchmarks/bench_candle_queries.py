@@ -0,0 +1,136 @@
+"""
+Latency benchmark for typical chart and backtest reads on market_candles.
+
+Seeds synthetic 1m candles under a 'BENCH|' symbol prefix, refreshes the
+continuous aggregates, optionally compresses old chunks, then times each query.
+
+Usage:
+    python -m benchmarks.bench_candle_queries --symbols 100 --days 30
+    python -m benchmarks.bench_candle_queries --no-seed --compress
+    python -m benchmarks.bench_candle_queries --cleanup
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+import asyncpg
+from app.core.database import connection_params, init_db
+from app.core.migrations import CONTINUOUS_AGGREGATES
+
+PREFIX = "BENCH|"
+SESSION_MINUTES = 375  # 09:15 - 15:30 IST
+
+QUERIES = {
+    "chart: 1 symbol, today, 1m": (
+        "SELECT * FROM market_candles WHERE symbol = $1 AND timestamp >= $2 ORDER BY timestamp DESC LIMIT 375",
+        lambda end: end - timedelta(days=1), 1,
+    ),
+    "chart: 1 symbol, 5 days, 5m": (
+        "SELECT * FROM market_candles_5m WHERE symbol = $1 AND timestamp >= $2 ORDER BY timestamp",
+        lambda end: end - timedelta(days=5), 1,
+    ),
+    "chart: 1 symbol, 3 weeks, 15m": (
+        "SELECT * FROM market_candles_15m WHERE symbol = $1 AND timestamp >= $2 ORDER BY timestamp",
+        lambda end: end - timedelta(weeks=3), 1,
+    ),
+    "chart: 1 symbol, all, 1d": (
+        "SELECT * FROM market_candles_1d WHERE symbol = $1 AND timestamp >= $2 ORDER BY timestamp",
+        lambda end: end - timedelta(days=365), 1,
+    ),
+    "backtest: 10 symbols, full range, 1m": (
+        "SELECT * FROM market_candles WHERE symbol = ANY($1::text[]) AND timestamp >= $2 ORDER BY symbol, timestamp",
+        lambda end: end - timedelta(days=365), 10,
+    ),
+}
+
+
+def synthetic_rows(symbols, days, end):
+    """1m candles for `days` trading sessions ending at `end` (random walk per symbol)."""
+    for symbol in symbols:
+        price, oi, vtt = 100.0, 100000, 0
+        for day in range(days, 0, -1):
+            session_open = (end - timedelta(days=day)).replace(hour=3, minute=45, second=0, microsecond=0)  # 09:15 IST
+            vtt = 0
+            for minute in range(SESSION_MINUTES):
+                ts = session_open + timedelta(minutes=minute)
+                o = price
+                price = max(0.05, price + random.gauss(0, 0.5))
+                vtt += random.randint(0, 5000)
+                oi += random.randint(-500, 500)
+                yield (
+                    ts, symbol, o, max(o, price) + 0.1, min(o, price) - 0.1, price, vtt,
+                    oi, random.randint(0, 10**6), random.randint(0, 10**6),
+                    15.0, 0.5, -5.0, 0.001, 3.0,
+                    price - 0.05, price + 0.05, price - 1, 5000, price + 1, 5000,
+                )
+
+
+async def seed(conn, symbols, days, end):
+    rows = list(synthetic_rows(symbols, days, end))
+    start = time.perf_counter()
+    await conn.copy_records_to_table("market_candles", records=rows)
+    print(f"Seeded {len(rows):,} rows in {time.perf_counter() - start:.2f}s")
+
+    for view in CONTINUOUS_AGGREGATES:
+        start = time.perf_counter()
+        await conn.execute(f"CALL refresh_continuous_aggregate('{view}', NULL, NULL);")
+        print(f"Refreshed {view} in {time.perf_counter() - start:.2f}s")
+
+
+async def compress(conn):
+    start = time.perf_counter()
+    chunks = await conn.fetch(
+        "SELECT compress_chunk(c, if_not_compressed => TRUE) FROM show_chunks('market_candles', older_than => INTERVAL '1 day') c;"
+    )
+    print(f"Compressed {len(chunks)} chunks in {time.perf_counter() - start:.2f}s")
+
+
+async def run_queries(conn, symbols, repeats, end):
+    print(f"\n{'query':<40} {'rows':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for label, (query, since, symbol_count) in QUERIES.items():
+        timings = []
+        rows = []
+        for _ in range(repeats):
+            picked = random.sample(symbols, symbol_count)
+            arg = picked[0] if symbol_count == 1 else picked
+            start = time.perf_counter()
+            rows = await conn.fetch(query, arg, since(end))
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        print(f"{label:<40} {len(rows):>8} {statistics.median(timings):>9.2f} {p99:>9.2f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--days", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--no-seed", action="store_true")
+    parser.add_argument("--compress", action="store_true", help="Compress chunks older than a day first")
+    parser.add_argument("--cleanup", action="store_true", help="Delete BENCH| rows and exit")
+    args = parser.parse_args()
+
+    await init_db()
+    conn = await asyncpg.connect(**connection_params())
+    try:
+        if args.cleanup:
+            await conn.execute("DELETE FROM market_candles WHERE symbol LIKE $1;", PREFIX + "%")
+            print("Benchmark rows deleted.")
+            return
+
+        symbols = [f"{PREFIX}{i:04d}" for i in range(args.symbols)]
+        end = datetime.now(timezone.utc)
+        if not args.no_seed:
+            await seed(conn, symbols, args.days, end)
+        if args.compress:
+            await compress(conn)
+        await run_queries(conn, symbols, args.repeats, end)
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
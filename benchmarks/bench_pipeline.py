@@ -0,0 +1,318 @@
+"""
+Pipeline benchmark: synthetic FeedResponse frames driven through every
+stage of the tick path, one stage at a time and then end to end.
+
+Stages: decode (protobuf), to_dict, publish (tick bus), parse, greeks,
+chain, candles, sweep (close and publish a minute), store (market_candles,
+needs --db) and score (SniperStrategy). Reports throughput, p50/p99 latency
+and memory. --save writes the results as JSON; --compare diffs a run
+against saved results and exits non-zero on a p50 regression.
+
+Usage:
+    python -m benchmarks.bench_pipeline --fake --instruments 500 --frames 3000
+    python -m benchmarks.bench_pipeline --fake --save benchmarks/results/baseline.json
+    python -m benchmarks.bench_pipeline --fake --compare benchmarks/results/baseline.json
+    python -m benchmarks.bench_pipeline --db   # local Redis (db 15) and Postgres, BENCH| rows
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+import numpy as np
+from benchmarks.market_generator import SyntheticMarket
+
+PREFIX = "BENCH|"
+
+
+def use_redis(fake, db):
+    """
+    Points the shared client at fakeredis or a scratch database before any
+    app module binds it, so synthetic ticks never reach the live bus.
+    """
+    import redis
+    import app.core.redis_client as redis_module
+    from app.core.config import settings
+
+    if fake:
+        import fakeredis  # Optional, only for the --fake mode
+        redis_module.redis_client = fakeredis.FakeRedis(decode_responses=True)
+    else:
+        redis_module.redis_client = redis.Redis(
+            host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=db, decode_responses=True
+        )
+    return redis_module.redis_client
+
+
+def summarize(samples, ticks=None):
+    samples = np.asarray(samples)
+    total = float(samples.sum())
+    result = {
+        "count": int(len(samples)),
+        "total_s": total,
+        "per_sec": len(samples) / total if total else 0.0,
+        "p50_us": float(np.percentile(samples, 50) * 1e6),
+        "p99_us": float(np.percentile(samples, 99) * 1e6),
+        "max_us": float(samples.max() * 1e6),
+    }
+    if ticks is not None:
+        result["ticks_per_sec"] = ticks / total if total else 0.0
+    return result
+
+
+def report(name, stage):
+    line = (f"{name:<10} {stage['count']:>7} x  {stage['per_sec']:>11,.0f}/s  "
+            f"p50 {stage['p50_us']:>9.1f} us  p99 {stage['p99_us']:>9.1f} us")
+    if "ticks_per_sec" in stage:
+        line += f"  ({stage['ticks_per_sec']:,.0f} ticks/s)"
+    print(line)
+
+
+def timed(fn, items):
+    """Calls fn(item) per item; returns (results, per-call seconds)."""
+    results, samples = [], []
+    for item in items:
+        started = time.perf_counter()
+        results.append(fn(item))
+        samples.append(time.perf_counter() - started)
+    return results, samples
+
+
+async def run_stages(args, market, frames, db_pool):
+    from google.protobuf.json_format import MessageToDict
+    import app.core.MarketDataFeedV3_pb2 as pb
+    from app.core.bus import bus, LIVE_TICKS
+    from app.core.utils import bucket_start
+    from app.strategies.sniper import SniperStrategy
+    from app.worker.resampler import Resampler
+
+    stages = {}
+    ticks = sum(len(pb.FeedResponse.FromString(frame).feeds) for frame in frames)
+
+    responses, samples = timed(pb.FeedResponse.FromString, frames)
+    stages["decode"] = summarize(samples, ticks)
+    dicts, samples = timed(MessageToDict, responses)
+    stages["to_dict"] = summarize(samples, ticks)
+    _, samples = timed(lambda data: bus.publish(LIVE_TICKS, json.dumps(data)), dicts)
+    stages["publish"] = summarize(samples, ticks)
+
+    resampler = Resampler()
+    resampler.db_pool = db_pool
+    parse = lambda data: {
+        symbol: parsed for symbol, feed in data.get("feeds", {}).items()
+        if (parsed := resampler.parse_tick(feed))
+    }
+    batches, samples = timed(parse, dicts)
+    stages["parse"] = summarize(samples, ticks)
+    if resampler.greeks_engine:
+        _, samples = timed(resampler.greeks_engine.apply, batches)
+        stages["greeks"] = summarize(samples, ticks)
+
+    def chain(batch):
+        resampler.option_chains.update(batch)
+        resampler.option_chains.publish_due()
+    _, samples = timed(chain, batches)
+    stages["chain"] = summarize(samples, ticks)
+
+    def candles(batch):
+        for symbol, parsed in batch.items():
+            resampler.update_candle(symbol, parsed)
+    _, samples = timed(candles, batches)
+    stages["candles"] = summarize(samples, ticks)
+
+    # Minutes: refill candles from a slice of frames, then time the sweep
+    store_samples = []
+    store = resampler.store_candles
+
+    async def timed_store(records):
+        started = time.perf_counter()
+        await store(records)
+        store_samples.append(time.perf_counter() - started)
+    resampler.store_candles = timed_store
+
+    sweep_samples, closed = [], []
+    boundary = bucket_start(time.time(), 60) + 60
+    per_minute = max(len(batches) // args.minutes, 1)
+    for minute in range(args.minutes):
+        for batch in batches[minute * per_minute:(minute + 1) * per_minute]:
+            candles(batch)
+        started = time.perf_counter()
+        records = await resampler.sweep(boundary + minute * 60)
+        sweep_samples.append(time.perf_counter() - started)
+        closed.extend((symbol, dict(record, timeframe=60)) for symbol, record in records)
+    stages["sweep"] = summarize(sweep_samples)
+    if db_pool:
+        stages["store"] = summarize(store_samples)
+
+    strategy = SniperStrategy(bus=bus)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        _, samples = timed(lambda item: strategy.on_candle(*item), closed)
+    stages["score"] = summarize(samples)
+    return stages
+
+
+async def run_end_to_end(args, frames, db_pool):
+    """
+    Feed-side decode and publish, resampler consume, minute sweeps and strategy
+    scoring in one thread; latency is per frame and per minute close.
+    """
+    from google.protobuf.json_format import MessageToDict
+    import app.core.MarketDataFeedV3_pb2 as pb
+    from app.core.bus import bus, LIVE_TICKS, CANDLE_CLOSED
+    from app.core.codec import decode_candle_batch
+    from app.core.utils import bucket_start
+    from app.strategies.sniper import SniperStrategy
+    from app.worker.resampler import Resampler
+
+    resampler = Resampler()
+    resampler.db_pool = db_pool
+    strategy = SniperStrategy(bus=bus)
+    ticks_in = bus.consumer(LIVE_TICKS, group="bench_pipeline", consumer_name="bench")
+    candles_in = bus.consumer(CANDLE_CLOSED, group="bench_pipeline", consumer_name="bench")
+
+    frame_samples, minute_samples = [], []
+    boundary = bucket_start(time.time(), 60) + 60
+    per_minute = max(len(frames) // args.minutes, 1)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for i, frame in enumerate(frames):
+            started = time.perf_counter()
+            bus.publish(LIVE_TICKS, json.dumps(MessageToDict(pb.FeedResponse.FromString(frame))))
+            messages = ticks_in.read(block_ms=0)
+            for _, raw in messages:
+                await resampler.handle_feed_message(json.loads(raw))
+            ticks_in.ack([message_id for message_id, _ in messages])
+            frame_samples.append(time.perf_counter() - started)
+
+            if (i + 1) % per_minute == 0:
+                started = time.perf_counter()
+                await resampler.sweep(boundary)
+                boundary += 60
+                messages = candles_in.read(block_ms=0)
+                for _, raw in messages:
+                    for symbol, candle in decode_candle_batch(raw):
+                        strategy.on_candle(symbol, candle)
+                candles_in.ack([message_id for message_id, _ in messages])
+                minute_samples.append(time.perf_counter() - started)
+
+    ticks_in.close()
+    candles_in.close()
+    stages = {"e2e_frame": summarize(frame_samples)}
+    if minute_samples:
+        stages["e2e_minute"] = summarize(minute_samples)
+    return stages
+
+
+def compare(results, path, tolerance):
+    with open(path) as f:
+        baseline = json.load(f)
+    print(f"\nAgainst {path} ({baseline['meta'].get('saved_at', '?')}):")
+    regressions = []
+    for name, stage in results["stages"].items():
+        old = baseline["stages"].get(name)
+        if not old or not old["p50_us"]:
+            continue
+        change = stage["p50_us"] / old["p50_us"] - 1
+        flag = ""
+        if change > tolerance:
+            flag = "  <-- REGRESSION"
+            regressions.append(name)
+        print(f"{name:<10} p50 {old['p50_us']:>9.1f} -> {stage['p50_us']:>9.1f} us ({change:+.1%}){flag}")
+    return regressions
+
+
+async def run(args):
+    from app.core.config import settings
+
+    client = use_redis(args.fake, args.redis_db)
+    settings.GREEKS_ENGINE = not args.no_greeks_engine
+
+    market = SyntheticMarket(
+        instruments=args.instruments, tick_rate=args.tick_rate, frame_ms=args.frame_ms,
+        depth=args.depth, greeks=not args.no_broker_greeks, prefix=PREFIX if args.db else None,
+    )
+    market.seed_contract_cache(client)
+    started = time.perf_counter()
+    frames = market.frames(args.frames)
+    print(f"Generated {len(frames):,} frames ({market.instruments} instruments, depth {args.depth}, "
+          f"avg {np.mean([len(f) for f in frames]):,.0f} bytes) in {time.perf_counter() - started:.2f}s\n")
+
+    db_pool = None
+    if args.db:
+        from app.core.database import get_pool, init_db
+        await init_db()
+        db_pool = await get_pool()
+
+    try:
+        stages = await run_stages(args, market, frames, db_pool)
+        stages.update(await run_end_to_end(args, frames, db_pool))
+        for name, stage in stages.items():
+            report(name, stage)
+
+        memory = {"max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+        if not args.no_memory:
+            # Separate pass: tracing slows everything down
+            tracemalloc.start()
+            await run_end_to_end(args, frames, db_pool)
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            memory.update(e2e_peak_mb=peak / 2**20, e2e_retained_mb=current / 2**20)
+        print("\nMemory: " + ", ".join(f"{name} {value:.1f}" for name, value in memory.items()))
+    finally:
+        if db_pool:
+            await db_pool.execute("DELETE FROM market_candles WHERE symbol LIKE $1", PREFIX + "%")
+
+    results = {
+        "meta": {
+            "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "redis": "fakeredis" if args.fake else f"local db {args.redis_db}",
+            "bus": settings.BUS_BACKEND,
+            "args": vars(args),
+        },
+        "stages": stages,
+        "memory": memory,
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved to {args.save}")
+    if args.compare:
+        return compare(results, args.compare, args.tolerance)
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--instruments", type=int, default=201, help="Underlying + option grid")
+    parser.add_argument("--tick-rate", type=float, default=2.0, help="Ticks/s per instrument")
+    parser.add_argument("--frame-ms", type=int, default=100, help="Market time per FeedResponse")
+    parser.add_argument("--depth", type=int, default=5, help="Bid/ask levels (5 or 30)")
+    parser.add_argument("--frames", type=int, default=3000)
+    parser.add_argument("--minutes", type=int, default=5, help="Sweeps the frames are spread over")
+    parser.add_argument("--no-broker-greeks", action="store_true", help="Leave Greeks to the local engine")
+    parser.add_argument("--no-greeks-engine", action="store_true")
+    parser.add_argument("--fake", action="store_true", help="Use fakeredis instead of a server")
+    parser.add_argument("--redis-db", type=int, default=15, help="Scratch database on the local server")
+    parser.add_argument("--db", action="store_true", help="Store candles in the local Postgres")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--save", help="Write results JSON here")
+    parser.add_argument("--compare", help="Results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed p50 slowdown")
+    args = parser.parse_args()
+
+    regressions = asyncio.run(run(args))
+    if regressions:
+        print(f"\nRegressed: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Position engine benchmark: tick batches per second while revaluing a book
+of open positions, plus the cost of a pre-trade risk check.
+
+Usage:
+    python -m benchmarks.bench_positions --positions 200 --instruments 1000 --batches 5000
+"""
+import argparse
+import time
+import numpy as np
+import app.services.positions as positions_module
+from app.services.positions import PositionBook
+
+
+def synthetic_feed(rng, symbols, batch_size):
+    picked = rng.choice(len(symbols), batch_size, replace=False)
+    return {
+        "feeds": {
+            symbols[i]: {
+                "fullFeed": {
+                    "marketFF": {
+                        "ltpc": {"ltp": float(100 + rng.standard_normal())},
+                        "optionGreeks": {"delta": 0.5, "gamma": 0.001, "vega": 5.0},
+                    }
+                }
+            }
+            for i in picked
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--positions", type=int, default=200)
+    parser.add_argument("--instruments", type=int, default=1000, help="Instruments in the feed")
+    parser.add_argument("--batch-size", type=int, default=50, help="Instruments per FeedResponse")
+    parser.add_argument("--batches", type=int, default=5000)
+    args = parser.parse_args()
+
+    # No Redis needed: contract metadata is synthetic
+    positions_module.get_instrument_meta = lambda keys: {
+        k: {"underlying": f"U{hash(k) % 5}", "lot_size": 75} for k in keys
+    }
+
+    rng = np.random.default_rng(3)
+    symbols = [f"NSE_FO|{50000 + i}" for i in range(args.instruments)]
+    book = PositionBook(max_loss=0, max_lots_per_underlying=0)
+    for symbol in symbols[:args.positions]:
+        book.apply_fill(symbol, "BUY", 75, 100.0)
+
+    feeds = [synthetic_feed(rng, symbols, args.batch_size) for _ in range(args.batches)]
+    start = time.perf_counter()
+    for data in feeds:
+        book.on_feed(data)
+    elapsed = time.perf_counter() - start
+    ticks = args.batches * args.batch_size
+    print(f"Mark-to-market: {args.batches:,} batches ({ticks:,} ticks) in {elapsed:.3f}s -> "
+          f"{ticks / elapsed:,.0f} ticks/s, {elapsed / args.batches * 1e6:.1f} us/batch "
+          f"({args.positions} positions)")
+
+    book.max_lots = 1000
+    order = {"symbol": symbols[0], "side": "BUY", "lots": 1}
+    runs = 10000
+    start = time.perf_counter()
+    for _ in range(runs):
+        book.check_order(order)
+    elapsed = time.perf_counter() - start
+    print(f"Risk check:     {elapsed / runs * 1e6:.1f} us/order")
+    print(f"Book:           {book.totals}")
+
+
+if __name__ == "__main__":
+    main()
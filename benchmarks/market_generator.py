@@ -0,0 +1,138 @@
+"""
+Synthetic Upstox v3 market for benchmarks: an index plus an option grid
+around it, emitted as serialized FeedResponse protobuf frames.
+
+Spot follows a random walk, option prices are Black-Scholes on a small
+smile (so the Greeks engine can solve them back), OI and volume drift, and
+each frame carries the instruments that ticked in its interval.
+
+    market = SyntheticMarket(instruments=500, tick_rate=2, depth=5)
+    market.seed_contract_cache(redis_client)
+    frames = market.frames(1000)  # [bytes]
+"""
+import json
+import time
+from datetime import date, timedelta
+import numpy as np
+import app.core.MarketDataFeedV3_pb2 as pb
+from app.core.greeks import SECONDS_PER_YEAR, bs_price, bs_greeks
+
+UNDERLYING = "NIFTY"
+UNDERLYING_KEY = "NSE_INDEX|Nifty 50"
+STRIKE_STEP = 50
+LOT_SIZE = 75
+TICK_SIZE = 0.05
+RATE = 0.065
+
+
+class SyntheticMarket:
+    def __init__(self, instruments=200, tick_rate=2.0, frame_ms=100, depth=5, greeks=True,
+                 spot=25000.0, expiry_days=7, seed=1, prefix=None):
+        """
+        instruments: underlying + options (CE/PE pairs around ATM)
+        tick_rate:   ticks per second per instrument
+        frame_ms:    interval covered by one FeedResponse
+        depth:       bid/ask levels per quote (5 = full_d5, 30 = full_d30)
+        greeks:      send broker Greeks (False leaves them to the local engine)
+        prefix:      instrument key prefix, e.g. "BENCH|" to keep rows apart from real ones
+        """
+        self.rng = np.random.default_rng(seed)
+        self.tick_rate = tick_rate
+        self.frame_ms = frame_ms
+        self.depth = depth
+        self.greeks = greeks
+        self.spot = spot
+        self.expiry = (date.today() + timedelta(days=expiry_days)).isoformat()
+        self.expiry_ts = time.time() + expiry_days * 86400
+        self.clock_ms = int(time.time() * 1000)
+
+        pairs = max((instruments - 1) // 2, 1)
+        atm = round(spot / STRIKE_STEP) * STRIKE_STEP
+        strikes = atm + (np.arange(pairs) - pairs // 2) * STRIKE_STEP
+        self.strike = np.repeat(strikes, 2).astype(float)
+        self.is_call = np.tile([True, False], pairs)
+        self.keys = [f"{prefix or 'NSE_FO|'}{60000 + i}" for i in range(len(self.strike))]
+        self.underlying_key = f"{prefix}{UNDERLYING}" if prefix else UNDERLYING_KEY
+        moneyness = np.log(self.strike / spot)
+        self.sigma = 0.13 + 0.8 * moneyness ** 2  # Smile
+        self.oi = self.rng.integers(50_000, 2_000_000, len(self.keys)).astype(float)
+        self.vtt = self.rng.integers(0, 100_000, len(self.keys))
+
+    @property
+    def instruments(self):
+        return len(self.keys) + 1
+
+    def contract_meta(self):
+        meta = {self.underlying_key: {"underlying": UNDERLYING}}
+        for key, strike, call in zip(self.keys, self.strike, self.is_call):
+            meta[key] = {
+                "underlying": UNDERLYING,
+                "expiry": self.expiry,
+                "strike": float(strike),
+                "option_type": "CE" if call else "PE",
+                "lot_size": LOT_SIZE,
+            }
+        return meta
+
+    def seed_contract_cache(self, client):
+        """Writes INSTRUMENT:* entries so the Greeks engine and option chain resolve the grid."""
+        client.mset({f"INSTRUMENT:{key}": json.dumps(value) for key, value in self.contract_meta().items()})
+
+    def step(self):
+        dt = self.frame_ms / 1000
+        self.clock_ms += self.frame_ms
+        # 15% annual vol over trading seconds (252 sessions of 6h15m)
+        self.spot *= float(np.exp(0.15 * np.sqrt(dt / (252 * 6.25 * 3600)) * self.rng.standard_normal()))
+        p = min(self.tick_rate * dt, 1.0)
+        ticked = np.flatnonzero(self.rng.random(len(self.keys)) < p)
+        return ticked, self.rng.random() < p
+
+    def frame(self):
+        """One serialized FeedResponse for the next `frame_ms` of market time."""
+        ticked, index_ticked = self.step()
+        response = pb.FeedResponse(type=pb.live_feed, currentTs=self.clock_ms)
+
+        if index_ticked:
+            index = response.feeds[self.underlying_key].fullFeed.indexFF
+            index.ltpc.ltp = round(self.spot, 2)
+            index.ltpc.ltt = self.clock_ms
+            index.ltpc.cp = 25000.0
+
+        if len(ticked):
+            t = np.full(len(ticked), max(self.expiry_ts - self.clock_ms / 1000, 3600) / SECONDS_PER_YEAR)
+            strike, call, sigma = self.strike[ticked], self.is_call[ticked], self.sigma[ticked]
+            price = np.maximum(bs_price(self.spot, strike, t, RATE, sigma, call), TICK_SIZE)
+            price = np.round(price / TICK_SIZE) * TICK_SIZE
+            delta, gamma, theta, vega = bs_greeks(self.spot, strike, t, RATE, sigma, call)
+            self.oi[ticked] *= 1 + self.rng.normal(0, 0.002, len(ticked))
+            self.vtt[ticked] += self.rng.integers(75, 7500, len(ticked))
+            sizes = self.rng.integers(1, 40, (len(ticked), self.depth)) * LOT_SIZE
+
+            for j, i in enumerate(ticked):
+                market = response.feeds[self.keys[i]].fullFeed.marketFF
+                ltp = float(price[j])
+                market.ltpc.ltp = ltp
+                market.ltpc.ltt = self.clock_ms
+                market.ltpc.ltq = LOT_SIZE
+                market.vtt = int(self.vtt[i])
+                market.oi = float(int(self.oi[i]))
+                market.atp = ltp
+                market.tbq = float(sizes[j].sum() * 3)
+                market.tsq = float(sizes[j].sum() * 2)
+                for level in range(self.depth):
+                    quote = market.marketLevel.bidAskQuote.add()
+                    quote.bidP = max(ltp - TICK_SIZE * (level + 1), TICK_SIZE)
+                    quote.bidQ = int(sizes[j, level])
+                    quote.askP = ltp + TICK_SIZE * (level + 1)
+                    quote.askQ = int(sizes[j, -level - 1])
+                if self.greeks:
+                    market.iv = float(sigma[j] * 100)
+                    market.optionGreeks.delta = float(delta[j])
+                    market.optionGreeks.gamma = float(gamma[j])
+                    market.optionGreeks.theta = float(theta[j])
+                    market.optionGreeks.vega = float(vega[j])
+
+        return response.SerializeToString()
+
+    def frames(self, count):
+        return [self.frame() for _ in range(count)]
@@ -0,0 +1,36 @@
+import fakeredis
+from app.core.bus import StreamBus
+
+# In-process Redis; reads don't block (block_ms=0)
+
+def test_tail_misses_nothing():
+    """
+    A tail consumer skips what was in the stream before it started, then
+    gets every entry added after, including those added between two reads.
+    """
+    bus = StreamBus(fakeredis.FakeRedis(decode_responses=True))
+    bus.publish("ticks", "old")
+    consumer = bus.consumer("ticks")
+    bus.publish_many("ticks", ["a", "b"])
+    assert [data for _, data in consumer.read(block_ms=0)] == ["a", "b"]
+
+    bus.publish("ticks", "c")
+    bus.publish("ticks", "d")
+    assert [data for _, data in consumer.read(block_ms=0)] == ["c", "d"]
+    assert consumer.read(block_ms=0) == []
+    print(f"Tail at {consumer.last_id}")
+
+def test_tail_before_stream_exists():
+    """
+    A tail started before the first publish gets the stream from its first entry.
+    """
+    bus = StreamBus(fakeredis.FakeRedis(decode_responses=True))
+    consumer = bus.consumer("signals")
+    assert consumer.last_id == "0-0"
+    bus.publish("signals", "first")
+    assert [data for _, data in consumer.read(block_ms=0)] == ["first"]
+
+if __name__ == "__main__":
+    test_tail_misses_nothing()
+    test_tail_before_stream_exists()
+    print("\nTest Complete.")
@@ -0,0 +1,82 @@
+import fakeredis
+import app.core.redis_client as redis_module
+
+# In-process Redis; must be set before the app modules are imported
+redis_module.redis_client = fakeredis.FakeRedis(decode_responses=True)
+
+from app.worker.resampler import Resampler
+
+SYMBOL = "NSE_FO|24200CE"
+BASE_TICK = {
+    "oi": 0, "total_buy_qty": 0, "total_sell_qty": 0, "iv": 0, "delta": 0, "theta": 0, "gamma": 0, "vega": 0,
+    "max_buy_wall_price": 0, "max_buy_wall_qty": 0, "max_sell_wall_price": 0, "max_sell_wall_qty": 0,
+}
+
+def tick(resampler, ts, ltp, vtt, bid, ask):
+    resampler.update_candle(SYMBOL, dict(BASE_TICK, timestamp=ts, ltp=ltp, vtt=vtt, best_bid=bid, best_ask=ask))
+
+def test_aggressor_and_profile():
+    """
+    Traded volume (VTT delta) is classified against the previous quote,
+    then by the tick rule, and lands in the volume-at-price profile.
+    """
+    resampler = Resampler()
+    tick(resampler, 600, 100.00, 1000, 99.95, 100.05)  # First tick: no previous VTT, no volume
+    tick(resampler, 601, 100.05, 1100, 100.00, 100.10)  # Lifted the ask: buy 100
+    tick(resampler, 602, 100.00, 1150, 99.95, 100.05)  # Hit the bid: sell 50
+    tick(resampler, 603, 100.02, 1175, 99.95, 100.05)  # Inside the spread, uptick: buy 25
+    tick(resampler, 604, 100.02, 1185, 99.95, 100.05)  # Unchanged price: keeps buy 10
+    tick(resampler, 605, 100.02, 1185, 99.95, 100.05)  # Quote update, nothing traded
+
+    candle = resampler.current_candles[SYMBOL]
+    print(f"ticks {candle['tick_count']}, buy {candle['buy_volume']}, sell {candle['sell_volume']}")
+    assert candle["tick_count"] == 6
+    assert (candle["buy_volume"], candle["sell_volume"]) == (135, 50)
+
+    prices, volumes = resampler.to_candle_record(candle)["profile"]
+    profile = dict(zip(prices, volumes))
+    print(f"Profile: {profile}")
+    assert sum(volumes) == 185
+    assert profile[100.05] == 100 and profile[100.0] == 85
+
+def test_new_minute_continues_flow():
+    """
+    The next minute's first trade is classified against the last quote of
+    the previous minute, and each candle keeps its own flow.
+    """
+    resampler = Resampler()
+    tick(resampler, 600, 100.00, 1000, 99.95, 100.05)
+    tick(resampler, 630, 99.95, 1040, 99.95, 100.05)  # Sell 40 at the bid
+    tick(resampler, 660, 100.10, 1100, 100.05, 100.15)  # Lifted the previous ask: buy 60
+
+    closed = resampler.closed_candles[0][1]
+    current = resampler.current_candles[SYMBOL]
+    assert (closed["buy_volume"], closed["sell_volume"]) == (0, 40)
+    assert (current["buy_volume"], current["sell_volume"], current["tick_count"]) == (60, 0, 1)
+
+def test_tick_timestamps():
+    """
+    Ticks are stamped with the exchange's last trade time; quote updates
+    carrying an old one, and feeds without it, get the receive time. A
+    trade late for a minute that was already swept counts in the next one.
+    """
+    resampler = Resampler()
+    received_ms = 660_300
+    full = {"fullFeed": {"marketFF": {"ltpc": {"ltp": 100.0, "ltt": "659900"}, "vtt": "1000"}}}
+    assert resampler.parse_tick(full, received_ms)["timestamp"] == 659
+
+    stale = {"fullFeed": {"marketFF": {"ltpc": {"ltp": 100.0, "ltt": "600000"}, "vtt": "1000"}}}
+    assert resampler.parse_tick(stale, received_ms)["timestamp"] == 660
+    light = {"ltpc": {"ltp": 100.0}}
+    assert resampler.parse_tick(light, received_ms)["timestamp"] == 660
+
+    resampler.last_sweep = 660
+    resampler.update_candle(SYMBOL, resampler.parse_tick(full, received_ms))
+    print(f"Late trade at 659 -> minute {resampler.current_candles[SYMBOL]['minute_ts']}")
+    assert resampler.current_candles[SYMBOL]["minute_ts"] == 660
+
+if __name__ == "__main__":
+    test_aggressor_and_profile()
+    test_new_minute_continues_flow()
+    test_tick_timestamps()
+    print("\nTest Complete.")
@@ -0,0 +1,100 @@
+import json
+import fakeredis
+from app.core import ticks as ticks_module
+from app.core.codec import decode_tick_snapshot
+from app.core.ticks import get_latest_ticks
+from app.worker import conflator as conflator_module
+from app.worker.conflator import Conflator
+
+# In-process Redis and bus; the consumer advances a fake clock instead of blocking
+NIFTY = "NSE_INDEX|Nifty 50"
+OPTION = "NSE_FO|24200CE"
+START = 1_792_400_000.0
+
+class FakeTime:
+    def __init__(self):
+        self.now = START
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+class Stop(Exception):
+    pass
+
+class FakeBus:
+    """Replays one batch per read, each read taking 100 ms; collects snapshots."""
+
+    def __init__(self, clock, batches):
+        self.clock = clock
+        self.batches = list(batches)
+        self.snapshots = []
+
+    def consumer(self, channel, group=None, consumer_name=None):
+        return self
+
+    def read(self, count=None, block_ms=None):
+        if not self.batches:
+            raise Stop
+        self.clock.now += 0.1
+        return [(None, json.dumps({"feeds": feeds})) for feeds in self.batches.pop(0)]
+
+    def publish(self, channel, message):
+        self.snapshots.append((round(self.clock.now - START, 3), decode_tick_snapshot(message)))
+
+def ltp(value):
+    return {"ltpc": {"ltp": value}}
+
+def run_conflator(batches):
+    clock = FakeTime()
+    bus = FakeBus(clock, batches)
+    client = fakeredis.FakeRedis(decode_responses=True)
+    originals = (conflator_module.time, conflator_module.bus, conflator_module.redis_client, ticks_module.redis_client)
+    conflator_module.time = clock
+    conflator_module.bus = bus
+    conflator_module.redis_client = ticks_module.redis_client = client
+    conflator = Conflator(interval_ms=250)
+    try:
+        try:
+            conflator.run()
+        except Stop:
+            pass
+        latest = get_latest_ticks([NIFTY, OPTION])
+    finally:
+        (conflator_module.time, conflator_module.bus,
+         conflator_module.redis_client, ticks_module.redis_client) = originals
+    return conflator, bus.snapshots, latest
+
+def test_last_value_wins():
+    """
+    Every 250 ms only the latest tick of each instrument that changed is
+    written to TICK:* and published; quiet instruments are not rewritten.
+    """
+    conflator, snapshots, latest = run_conflator([
+        [{OPTION: ltp(100.0)}],  # 0.1s
+        [{OPTION: ltp(101.0), NIFTY: ltp(24200.0)}, {OPTION: ltp(101.5)}],  # 0.2s
+        [{OPTION: ltp(102.0)}],  # 0.3s: flush
+        [{NIFTY: ltp(24210.0)}],  # 0.4s
+        [{NIFTY: ltp(24205.0)}],  # 0.5s
+        [],  # 0.6s: flush
+        [],  # 0.7s: nothing changed, nothing to flush at 0.85s
+        [],
+        [],
+    ])
+    print(f"Snapshots: {snapshots}")
+    assert [at for at, _ in snapshots] == [0.3, 0.6]
+    first, second = snapshots[0][1], snapshots[1][1]
+    assert (first[OPTION]["ltp"], first[NIFTY]["ltp"]) == (102.0, 24200.0)
+    assert list(second) == [NIFTY] and second[NIFTY]["ltp"] == 24205.0
+
+    assert latest[OPTION]["ltp"] == 102.0 and latest[NIFTY]["ltp"] == 24205.0
+    assert abs(latest[OPTION]["updated_ms"] - (START + 0.3) * 1000) <= 1
+    stats = conflator.stats
+    print(f"Stats: {stats}")
+    assert (stats["ticks"], stats["conflated"], stats["flushes"], stats["written"]) == (7, 4, 2, 3)
+
+if __name__ == "__main__":
+    test_last_value_wins()
+    print("\nTest Complete.")
@@ -0,0 +1,115 @@
+import app.core.MarketDataFeedV3_pb2 as pb
+from app.core.config import settings
+from app.services.feed_modes import ModeManager
+
+# Contract meta is passed in and the clock is injected: no Redis, no waiting
+INDEX = "NSE_INDEX|Nifty 50"
+EQUITY = "NSE_EQ|INE002A01018"
+STRIKES = [24000 + 50 * i for i in range(11)]  # 24000 .. 24500
+META = {
+    INDEX: {"underlying": "NIFTY"},
+    EQUITY: {"underlying": "RELIANCE"},
+    **{f"NSE_FO|{strike}CE": {"underlying": "NIFTY", "strike": strike, "option_type": "CE"} for strike in STRIKES},
+}
+DEMOTE = settings.FEED_MODE_DEMOTE_SECONDS
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def option(strike):
+    return f"NSE_FO|{strike}CE"
+
+def spot_tick(manager, ltp):
+    response = pb.FeedResponse()
+    response.feeds[INDEX].ltpc.ltp = ltp
+    manager.observe(response)
+
+def near(spot):
+    band = settings.FEED_NEAR_STRIKES * 50
+    return {option(strike) for strike in STRIKES if abs(strike - spot) <= band}
+
+def make_manager():
+    clock = Clock()
+    manager = ModeManager(clock=clock)
+    groups = manager.track(list(META), META)
+    return manager, clock, groups
+
+def test_starting_modes():
+    """
+    Underlyings get their segment's mode; options start near (spot unknown).
+    """
+    _, _, groups = make_manager()
+    print(f"Start: { {mode: len(keys) for mode, keys in groups.items()} }")
+    assert INDEX in groups[settings.FEED_INDEX_MODE]
+    assert EQUITY in groups[settings.FEED_EQUITY_MODE]
+    assert all(option(strike) in groups[settings.FEED_NEAR_MODE] for strike in STRIKES)
+
+def test_demotion_delay():
+    """
+    Far strikes are demoted only after wanting the cheaper mode for
+    FEED_MODE_DEMOTE_SECONDS; a strike that is near again in between
+    restarts its wait.
+    """
+    manager, clock, _ = make_manager()
+    spot_tick(manager, 24000)
+    far = set(map(option, STRIKES)) - near(24000)
+
+    clock.now = 1
+    assert manager.rebalance(signaled=[]) == {}
+    clock.now = DEMOTE
+    assert manager.rebalance(signaled=[]) == {}  # 1s short
+
+    # 24200 and 24250 come near for a moment: their wait restarts
+    spot_tick(manager, 24100)
+    clock.now = DEMOTE + 0.5
+    manager.rebalance(signaled=[])
+    spot_tick(manager, 24000)
+
+    clock.now = DEMOTE + 1
+    changes = manager.rebalance(signaled=[])
+    print(f"Demoted after {DEMOTE + 1}s: {len(changes[settings.FEED_FAR_MODE])}")
+    returned = {option(24200), option(24250)}
+    assert set(changes[settings.FEED_FAR_MODE]) == far - returned
+    assert manager.counters["demotions"] == len(far) - 2
+
+    clock.now = DEMOTE * 2 + 1
+    assert set(manager.rebalance(signaled=[])[settings.FEED_FAR_MODE]) == returned
+
+def test_promotion_is_immediate():
+    """
+    Strikes that come near the spot, or get a signal, are promoted at the
+    next rebalance; a signal's promotion lasts FEED_SIGNAL_HOLD_SECONDS.
+    """
+    manager, clock, _ = make_manager()
+    spot_tick(manager, 24000)
+    clock.now = 1
+    manager.rebalance(signaled=[])
+    clock.now = DEMOTE + 1
+    manager.rebalance(signaled=[])  # Far strikes demoted
+    signaled = option(24200)  # Far from both spots
+    assert manager.modes[signaled] == settings.FEED_FAR_MODE
+
+    spot_tick(manager, 24400)
+    clock.now += 1
+    changes = manager.rebalance(signaled=[signaled])
+    promoted = set(changes[settings.FEED_NEAR_MODE])
+    print(f"Promoted: {sorted(promoted)}")
+    assert promoted == (near(24400) - near(24000)) | {signaled}
+    assert manager.modes[signaled] == settings.FEED_SIGNAL_MODE
+
+    # Signal hold over, then the demotion delay
+    clock.now += settings.FEED_SIGNAL_HOLD_SECONDS + 1
+    changes = manager.rebalance(signaled=[])
+    assert signaled not in changes.get(settings.FEED_FAR_MODE, [])
+    clock.now += DEMOTE
+    assert signaled in manager.rebalance(signaled=[])[settings.FEED_FAR_MODE]
+
+if __name__ == "__main__":
+    test_starting_modes()
+    test_demotion_delay()
+    test_promotion_is_immediate()
+    print("\nTest Complete.")
@@ -0,0 +1,59 @@
+import time
+import numpy as np
+from app.core.greeks import bs_price, implied_vol, bs_greeks
+
+# Configuration
+SPOT = 25000.0
+RATE = 0.065
+DAYS_TO_EXPIRY = 5
+
+def test_iv_round_trip():
+    """
+    Prices a full strike grid at a known volatility and solves it back.
+    """
+    strikes = np.arange(23000, 27050, 50, dtype=float)
+    t = np.full(strikes.shape, DAYS_TO_EXPIRY / 365)
+    sigma = np.full(strikes.shape, 0.14)
+
+    for is_call in (True, False):
+        prices = bs_price(SPOT, strikes, t, RATE, sigma, is_call)
+        # Sub-tick time value carries no volatility information
+        intrinsic = np.maximum(SPOT - strikes * np.exp(-RATE * t), 0) if is_call else np.maximum(strikes * np.exp(-RATE * t) - SPOT, 0)
+        tradable = prices - intrinsic >= 0.05
+
+        start = time.perf_counter()
+        iv = implied_vol(prices, SPOT, strikes, t, RATE, is_call)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        error = np.abs(iv[tradable] - 0.14).max()
+        print(f"{'CE' if is_call else 'PE'}: {tradable.sum()} strikes solved in {elapsed:.2f} ms, max IV error {error:.2e}")
+        assert error < 1e-4
+
+def test_invalid_prices():
+    """
+    Prices below intrinsic or with no time left have no IV.
+    """
+    iv = implied_vol([0.0, 10.0, 100.0], SPOT, [25000, 24000, 25000], [1 / 365, 1 / 365, 0.0], RATE, True)
+    print(f"Invalid inputs -> {iv}")
+    assert np.isnan(iv).all()
+
+def test_greeks_sanity():
+    """
+    ATM call/put deltas straddle 0.5 / -0.5 and put-call parity holds.
+    """
+    t = DAYS_TO_EXPIRY / 365
+    call_delta, gamma, theta, vega = bs_greeks(SPOT, 25000.0, t, RATE, 0.14, True)
+    put_delta, _, _, _ = bs_greeks(SPOT, 25000.0, t, RATE, 0.14, False)
+    print(f"ATM: call delta {call_delta:.4f}, put delta {put_delta:.4f}, gamma {gamma:.5f}, theta {theta:.2f}/day, vega {vega:.2f}")
+    assert abs(call_delta - put_delta - 1.0) < 1e-9
+    assert theta < 0 and vega > 0
+
+    call = bs_price(SPOT, 25000.0, t, RATE, 0.14, True)
+    put = bs_price(SPOT, 25000.0, t, RATE, 0.14, False)
+    assert abs((call - put) - (SPOT - 25000.0 * np.exp(-RATE * t))) < 1e-6
+
+if __name__ == "__main__":
+    test_iv_round_trip()
+    test_invalid_prices()
+    test_greeks_sanity()
+    print("\nTest Complete.")
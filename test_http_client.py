@@ -0,0 +1,141 @@
+import asyncio
+import time
+import httpx
+from app.core.config import settings
+from app.core.http_client import UpstoxClient
+from app.services.brokers import HttpBroker
+from app.services import mock_broker
+
+# Runs against in-process mock servers; no network or Upstox account needed.
+settings.UPSTOX_BACKOFF_SECONDS = 0.01
+
+def flaky_transport(failures, status=503):
+    """
+    Answers `failures` requests with `status`, then 200s. Records the calls.
+    """
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) <= failures:
+            return httpx.Response(status, json={"status": "error"})
+        return httpx.Response(200, json={"status": "success", "data": {}})
+
+    return httpx.MockTransport(handler), calls
+
+def test_retry_idempotent():
+    """
+    GETs are retried through 5xx/429 and end up in the endpoint metrics.
+    """
+    transport, calls = flaky_transport(2)
+    client = UpstoxClient("http://mock", transport=transport)
+    response = asyncio.run(client.get("/v2/market-quote/ltp", token="abc"))
+    assert response.status_code == 200
+    assert len(calls) == 3
+    assert calls[0].headers["Authorization"] == "Bearer abc"
+
+    metric = client.stats()["endpoints"]["GET /v2/market-quote/ltp"]
+    assert metric["count"] == 3 and metric["retries"] == 2
+    print(f"GET retried through 2x 503: {metric}")
+
+def test_no_post_retry_on_5xx():
+    """
+    A POST that reached the server is never resent (it may have placed an order).
+    """
+    transport, calls = flaky_transport(1)
+    client = UpstoxClient("http://mock", transport=transport)
+    response = asyncio.run(client.post("/v2/order/place", json={}))
+    assert response.status_code == 503
+    assert len(calls) == 1
+
+    # ...but 429 means it was refused, so it is safe to send again
+    transport, calls = flaky_transport(1, status=429)
+    client = UpstoxClient("http://mock", transport=transport)
+    assert asyncio.run(client.post("/v2/order/place", json={})).status_code == 200
+    assert len(calls) == 2
+    print("POST: no retry on 503, retried on 429")
+
+def test_rate_limit():
+    """
+    Requests beyond the per-second quota wait for the window instead of failing.
+    """
+    transport, calls = flaky_transport(0)
+    client = UpstoxClient("http://mock", per_second=5, per_minute=0, transport=transport)
+
+    async def burst():
+        await asyncio.gather(*(client.get("/v2/user/profile") for _ in range(12)))
+
+    start = time.perf_counter()
+    asyncio.run(burst())
+    elapsed = time.perf_counter() - start
+    assert len(calls) == 12
+    assert elapsed >= 2.0, elapsed  # 5 now, 5 after 1s, 2 after 2s
+    print(f"12 requests at 5/s took {elapsed:.2f}s (waited {client.limiter.waited:.2f}s)")
+
+def test_broker_against_mock():
+    """
+    Order placement and polling through the shared client against the mock broker.
+    """
+    broker = HttpBroker("http://mock", "token", transport=httpx.ASGITransport(app=mock_broker.app))
+    order = {"order_id": "T-1", "symbol": "NSE_FO|1", "side": "BUY", "quantity": 75,
+             "filled_qty": 0, "avg_price": 0.0}
+
+    async def run():
+        await broker.start()
+        await broker.place(order)
+        await broker.refresh(order)
+        await broker.close()
+
+    asyncio.run(run())
+    assert order["status"] == "FILLED" and order["avg_price"] == mock_broker.MOCK_FILL_PRICE
+    print(f"Mock broker: {sorted(broker.client.stats()['endpoints'])}")
+
+def test_new_loop_closes_old_pool():
+    """
+    Starting on a new event loop closes the previous loop's pool before
+    replacing it.
+    """
+    transport, _ = flaky_transport(0)
+    client = UpstoxClient("http://mock", transport=transport)
+    asyncio.run(client.get("/v2/user/profile"))
+    first = client.client
+    asyncio.run(client.get("/v2/user/profile"))
+    assert first.is_closed and client.client is not first and not client.client.is_closed
+    asyncio.run(client.close())
+
+def test_broker_terminal_states():
+    """
+    Polling maps rejected, cancelled and short "complete" orders to terminal
+    states, keeping the quantity that did fill.
+    """
+    cases = [
+        ({"status": "rejected", "filled_quantity": 0, "status_message": "Insufficient margin"}, "REJECTED", 0),
+        ({"status": "cancelled", "filled_quantity": 25, "average_price": 101.0}, "CANCELLED", 25),
+        ({"status": "complete", "filled_quantity": 50, "average_price": 100.5}, "CANCELLED", 50),
+        ({"status": "complete", "filled_quantity": 75, "average_price": 100.0}, "FILLED", 75),
+        ({"status": "open", "filled_quantity": 25, "average_price": 101.0}, "OPEN", 25),
+    ]
+    for data, status, filled in cases:
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"status": "success", "data": data}))
+        broker = HttpBroker("http://mock", "token", transport=transport)
+        order = {"order_id": "T-1", "broker_order_id": "B-1", "symbol": "NSE_FO|1", "side": "BUY",
+                 "quantity": 75, "filled_qty": 0, "avg_price": 0.0, "status": "OPEN"}
+
+        async def run():
+            await broker.client.start()
+            changed = await broker.refresh(order)
+            await broker.close()
+            return changed
+
+        assert asyncio.run(run())
+        print(f"{data['status']} {data['filled_quantity']}/75 -> {order['status']} ({order.get('reason', '')})")
+        assert (order["status"], order["filled_qty"]) == (status, filled)
+
+if __name__ == "__main__":
+    test_retry_idempotent()
+    test_no_post_retry_on_5xx()
+    test_rate_limit()
+    test_broker_against_mock()
+    test_new_loop_closes_old_pool()
+    test_broker_terminal_states()
+    print("PASSED")
@@ -0,0 +1,72 @@
+import time
+import fakeredis
+from app.core.lease import RedisLease
+
+# In-process Redis; a short TTL stands in for a stalled or dead holder
+TTL_MS = 100
+
+def make_pair():
+    client = fakeredis.FakeRedis(decode_responses=True)
+    return (
+        RedisLease("test", ttl_ms=TTL_MS, owner="worker-a", client=client),
+        RedisLease("test", ttl_ms=TTL_MS, owner="worker-b", client=client),
+    )
+
+def test_single_owner():
+    """
+    Only one contender holds the lease; the holder renews it.
+    """
+    a, b = make_pair()
+    assert a.keep() and not b.keep()
+    assert a.keep() and a.holder() == "worker-a"
+    print(f"Holder {a.holder()}, epoch {a.epoch}")
+
+def test_takeover_and_fencing():
+    """
+    After the holder stalls past its TTL another worker takes over with a
+    higher epoch, and the stalled one can neither renew nor release it.
+    """
+    a, b = make_pair()
+    assert a.keep() and a.valid()
+    first_epoch = a.epoch
+    time.sleep(TTL_MS * 1.5 / 1000)
+    assert not a.valid()  # Past its TTL the holder fences itself, before any round trip
+
+    assert b.keep()
+    assert b.epoch == first_epoch + 1
+    # Leader-only writes of the stalled holder are refused
+    assert not a.if_owner(lambda pipe: pipe.set("FEED_STATUS", "stale"))
+    assert b.if_owner(lambda pipe: pipe.set("FEED_STATUS", "current"))
+    assert b.redis.get("FEED_STATUS") == "current"
+    assert not a.keep() and not a.held
+
+    a.release()
+    assert b.holder() == "worker-b" and b.keep()
+    print(f"Takeover: epoch {first_epoch} -> {b.epoch}, holder {b.holder()}")
+
+def test_epoch_fencing():
+    """
+    A write is refused when the epoch moved on, even if the owner id matches
+    (the same worker lost the lease and won it back in a new term).
+    """
+    a, _ = make_pair()
+    assert a.keep()
+    a.redis.incr(f"{a.key}:epoch")
+    assert not a.if_owner(lambda pipe: pipe.set("FEED_STATUS", "stale"))
+    assert a.redis.get("FEED_STATUS") is None
+
+def test_release_hands_over():
+    """
+    A clean release frees the lease immediately.
+    """
+    a, b = make_pair()
+    assert a.keep()
+    a.release()
+    assert b.keep() and b.epoch == a.epoch + 1
+
+if __name__ == "__main__":
+    test_single_owner()
+    test_takeover_and_fencing()
+    test_epoch_fencing()
+    test_release_hands_over()
+    print("\nTest Complete.")
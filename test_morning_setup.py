@@ -35,6 +35,8 @@ def setup_mock_redis():
                     "lot_size": 50
                 })
                 r.set(key, value)
+                # Grid index read by MorningSetup (one HMGET per underlying)
+                r.hset("CONTRACT_GRID:NIFTY", f"{strike}:{opt_type}", f"NSE_FO|{strike}{opt_type}")
                 count += 1
                 
         print(f"Set {count} mock contract keys.")
@@ -46,6 +48,9 @@ def setup_mock_redis():
 def publish_ticks(r):
     """
     Publishes mock spot price ticks to Redis.
+    MorningSetup reads the spot from the conflated TICK:* hash, so the
+    conflator must be running: python -m app.worker.conflator
+    (a live feed's own ticks are used too, but this script has none).
     """
     print(f"Publishing mock ticks for {SPOT_SYMBOL} at {SPOT_PRICE}...")
     tick = {
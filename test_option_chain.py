@@ -0,0 +1,113 @@
+import random
+import numpy as np
+from app.services.option_chain import (
+    OptionChain, classify_buildup, CALL, PUT,
+    LONG_BUILDUP, SHORT_BUILDUP, SHORT_COVERING, LONG_UNWINDING, NEUTRAL,
+)
+
+# Incremental chain aggregates are checked against a full recompute
+
+def brute_force(chain):
+    """(pain per strike, max pain, PCR by OI, PCR by volume) recomputed from scratch."""
+    strikes = list(chain.strikes)
+    pain = [
+        sum(chain.oi[CALL, i] * max(settle - strike, 0) + chain.oi[PUT, i] * max(strike - settle, 0)
+            for i, strike in enumerate(strikes))
+        for settle in strikes
+    ]
+    call_oi, put_oi = chain.oi[CALL].sum(), chain.oi[PUT].sum()
+    call_volume, put_volume = chain.volume[CALL].sum(), chain.volume[PUT].sum()
+    max_pain = strikes[int(np.argmin(pain))] if call_oi or put_oi else None
+    return (
+        pain,
+        max_pain,
+        put_oi / call_oi if call_oi else None,
+        put_volume / call_volume if call_volume else None,
+    )
+
+def assert_matches(chain):
+    pain, max_pain, pcr_oi, pcr_volume = brute_force(chain)
+    snapshot = chain.snapshot()
+    assert np.allclose(chain.pain, pain)
+    assert chain.max_pain() == snapshot["max_pain"] == max_pain
+    for value, expected in ((snapshot["pcr_oi"], pcr_oi), (snapshot["pcr_volume"], pcr_volume)):
+        assert (value is None) == (expected is None)
+        assert value is None or abs(value - expected) < 1e-9
+
+def random_updates(chain, rng, count):
+    strikes = list(chain.strikes)
+    for _ in range(count):
+        # OI/volume of 0 (ltpc-mode ticks) must keep the last known values
+        chain.update(
+            rng.choice(strikes), rng.choice((CALL, PUT)), rng.uniform(1, 300),
+            rng.choice((0, rng.randrange(75, 500_000, 75))), rng.choice((0, rng.randrange(0, 10**6))), 0.15
+        )
+
+def test_incremental_aggregates():
+    """
+    Pain vector, max pain and both PCRs follow a brute-force recompute
+    through random updates.
+    """
+    rng = random.Random(7)
+    chain = OptionChain("NSE_INDEX|Nifty 50", "2026-10-27", [24000 + 50 * i for i in range(11)])
+    assert chain.max_pain() is None and chain.snapshot()["pcr_oi"] is None
+    for _ in range(20):
+        random_updates(chain, rng, 25)
+        assert_matches(chain)
+    print(f"Max pain {chain.max_pain()}, PCR {chain.snapshot()['pcr_oi']:.3f}")
+
+def test_new_strikes():
+    """
+    set_strikes() keeps known values at their strikes, and the aggregates
+    stay exact for updates on old and new strikes alike.
+    """
+    rng = random.Random(11)
+    strikes = [24000 + 50 * i for i in range(5)]
+    chain = OptionChain("NSE_INDEX|Nifty 50", "2026-10-27", strikes)
+    random_updates(chain, rng, 40)
+    before = {strike: (chain.oi[CALL, i], chain.oi[PUT, i]) for i, strike in enumerate(strikes)}
+
+    chain.set_strikes(sorted(strikes + [23900, 23950, 24250]))
+    for strike, (call_oi, put_oi) in before.items():
+        i = chain.index[strike]
+        assert (chain.oi[CALL, i], chain.oi[PUT, i]) == (call_oi, put_oi)
+    assert_matches(chain)
+
+    random_updates(chain, rng, 60)
+    assert_matches(chain)
+    print(f"After new strikes: {len(chain.strikes)} strikes, max pain {chain.max_pain()}")
+
+def test_classify_buildup():
+    """
+    Price vs OI change since the reference, for every sign combination.
+    """
+    cases = [
+        (1, 100, LONG_BUILDUP),
+        (-1, 100, SHORT_BUILDUP),
+        (1, -100, SHORT_COVERING),
+        (-1, -100, LONG_UNWINDING),
+        (0, 100, NEUTRAL),
+        (0, -100, NEUTRAL),
+        (1, 0, NEUTRAL),
+        (-1, 0, NEUTRAL),
+    ]
+    for price_change, oi_change, expected in cases:
+        assert classify_buildup(price_change, oi_change) == expected, (price_change, oi_change)
+
+    # ...and in the snapshot, against the reference rolled at the last minute
+    chain = OptionChain("NSE_INDEX|Nifty 50", "2026-10-27", [24000, 24050])
+    chain.update(24000, CALL, 100.0, 1000, 10, 0)
+    chain.update(24000, PUT, 80.0, 1000, 10, 0)
+    chain.roll_reference()
+    chain.update(24000, CALL, 110.0, 1500, 20, 0)
+    chain.update(24000, PUT, 70.0, 600, 20, 0)
+    row = chain.snapshot()["strikes"][0]
+    print(f"Build-up: call {row['call_buildup']}, put {row['put_buildup']}")
+    assert (row["call_buildup"], row["put_buildup"]) == (LONG_BUILDUP, LONG_UNWINDING)
+    assert (row["call_oi_change"], row["put_oi_change"]) == (500, -400)
+
+if __name__ == "__main__":
+    test_incremental_aggregates()
+    test_new_strikes()
+    test_classify_buildup()
+    print("\nTest Complete.")
@@ -0,0 +1,117 @@
+import json
+import fakeredis
+import app.core.redis_client as redis_module
+
+# In-process Redis; must be set before the app modules are imported
+redis_module.redis_client = fakeredis.FakeRedis(decode_responses=True)
+
+from app.services import contract_manager
+from app.services.positions import PositionBook
+
+CALL = "NSE_FO|24200CE"
+PUT = "NSE_FO|24200PE"
+BANK_CALL = "NSE_FO|52000CE"
+
+def store_meta():
+    for key, underlying in ((CALL, "NIFTY"), (PUT, "NIFTY"), (BANK_CALL, "BANKNIFTY")):
+        contract_manager.redis_client.set(f"INSTRUMENT:{key}", json.dumps({"underlying": underlying, "lot_size": 75}))
+
+def position(book, symbol):
+    i = book.slots[symbol]
+    return int(book.qty[i]), float(book.avg_price[i]), float(book.realized[i])
+
+def order(symbol, lots, order_id="O-1", status="PENDING", filled_qty=0):
+    return {"order_id": order_id, "symbol": symbol, "side": "BUY", "lots": lots, "quantity": lots * 75,
+            "filled_qty": filled_qty, "status": status}
+
+def test_fills():
+    """
+    Average price on adds, realized P&L on partial and opposite-side fills,
+    flipping through zero and closing flat.
+    """
+    store_meta()
+    book = PositionBook(max_loss=0, max_lots_per_underlying=0)
+    steps = [
+        ("BUY", 75, 100.0, (75, 100.0, 0.0)),
+        ("BUY", 75, 110.0, (150, 105.0, 0.0)),  # Add: average moves
+        ("SELL", 50, 120.0, (100, 105.0, 750.0)),  # Partial close: realizes, average kept
+        ("SELL", 150, 90.0, (-50, 90.0, -750.0)),  # Closes 100 at a loss, opens 50 short at the fill
+        ("BUY", 50, 80.0, (0, 0.0, -250.0)),  # Short covered lower: flat
+    ]
+    for side, qty, price, expected in steps:
+        book.apply_fill(CALL, side, qty, price)
+        print(f"{side} {qty} @ {price} -> {position(book, CALL)}")
+        assert position(book, CALL) == expected
+
+def test_mark_to_market():
+    """
+    Ticks mark held instruments; fields a tick doesn't carry keep the last
+    mark, and the totals revalue with them.
+    """
+    store_meta()
+    book = PositionBook(max_loss=0, max_lots_per_underlying=0)
+    book.apply_fill(CALL, "BUY", 150, 100.0)
+    book.apply_fill(PUT, "SELL", 75, 80.0)
+
+    book.on_feed({"feeds": {
+        CALL: {"fullFeed": {"marketFF": {"ltpc": {"ltp": 104.0}, "optionGreeks": {"delta": 0.5, "gamma": 0.002}}}},
+        PUT: {"firstLevelWithGreeks": {"ltpc": {"ltp": 70.0}, "optionGreeks": {"delta": -0.4}}},
+        "NSE_FO|NOT_HELD": {"ltpc": {"ltp": 1.0}},
+    }})
+    totals = book.totals
+    print(f"Totals: {totals}")
+    assert totals["unrealized"] == 4.0 * 150 + 10.0 * 75
+    assert abs(totals["delta"] - (0.5 * 150 + 0.4 * 75)) < 1e-9
+    assert totals["open_positions"] == 2 and "NSE_FO|NOT_HELD" not in book.slots
+
+    # ltpc-only tick: new price, Greeks kept
+    book.on_feed({"feeds": {CALL: {"ltpc": {"ltp": 98.0}}}})
+    assert book.totals["unrealized"] == -2.0 * 150 + 10.0 * 75
+    assert abs(book.totals["delta"] - totals["delta"]) < 1e-9
+
+def test_max_loss():
+    """
+    New orders are refused once total P&L (realized + unrealized) reaches -max_loss.
+    """
+    store_meta()
+    book = PositionBook(max_loss=1000, max_lots_per_underlying=0)
+    book.apply_fill(CALL, "BUY", 75, 100.0)
+    book.on_feed({"feeds": {CALL: {"ltpc": {"ltp": 90.0}}}})
+    assert book.check_order(order(PUT, 1)) is None  # -750
+
+    book.on_feed({"feeds": {CALL: {"ltpc": {"ltp": 86.0}}}})
+    reason = book.check_order(order(PUT, 1))  # -1050
+    print(f"Rejected: {reason}")
+    assert reason and reason.startswith("Max loss")
+
+def test_max_lots():
+    """
+    Lots held plus lots in working BUY orders are capped per underlying;
+    other underlyings and SELL orders are not affected.
+    """
+    store_meta()
+    book = PositionBook(max_loss=0, max_lots_per_underlying=4)
+    book.apply_fill(CALL, "BUY", 150, 100.0)  # 2 lots of NIFTY held
+    book.track_order(order(PUT, 2, order_id="W-1"))  # 2 more working
+    assert book.working_lots(book.underlying_id[book.slots[PUT]]) == 2
+
+    reason = book.check_order(order(CALL, 1))
+    print(f"Rejected: {reason}")
+    assert reason and reason.startswith("Max lots")
+    assert book.check_order(order(BANK_CALL, 4)) is None
+    assert book.check_order(dict(order(CALL, 1), side="SELL")) is None
+
+    # Partly filled: only the unfilled lot still counts; done orders release theirs
+    book.track_order(order(PUT, 2, order_id="W-1", status="OPEN", filled_qty=75))
+    book.apply_fill(PUT, "BUY", 75, 80.0)
+    assert book.check_order(order(CALL, 1)) is not None  # 3 held + 1 working
+    book.track_order(order(PUT, 2, order_id="W-1", status="CANCELLED", filled_qty=75))
+    assert book.check_order(order(CALL, 1)) is None  # 3 held
+    assert book.check_order(order(CALL, 2)) is not None
+
+if __name__ == "__main__":
+    test_fills()
+    test_mark_to_market()
+    test_max_loss()
+    test_max_lots()
+    print("\nTest Complete.")
@@ -0,0 +1,73 @@
+import asyncio
+from app.worker import scheduler as scheduler_module
+from app.worker.scheduler import BoundaryScheduler
+
+# Fake clock: asyncio.sleep inside the scheduler advances it instead of waiting
+
+class FakeTime:
+    def __init__(self, now, early=0.0):
+        self.now = now
+        self.early = early  # Timers wake up this much too early, like real asyncio ones
+        self.asyncio = type("FakeAsyncio", (), {"sleep": staticmethod(self.sleep)})
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.now += max(delay - self.early, 0.001)
+
+def run_scheduler(clock, fires, on_fire=None):
+    """
+    Runs the scheduler until it has fired `fires` times. Returns
+    [(boundary, clock time of the call)].
+    """
+    calls = []
+
+    async def callback(boundary):
+        calls.append((boundary, clock.now))
+        if on_fire:
+            on_fire(len(calls))
+        if len(calls) == fires:
+            raise asyncio.CancelledError
+
+    original = scheduler_module.asyncio
+    scheduler_module.asyncio = clock.asyncio
+    try:
+        asyncio.run(BoundaryScheduler(callback, interval=60, grace_ms=200, clock=clock).run())
+    except asyncio.CancelledError:
+        pass
+    finally:
+        scheduler_module.asyncio = original
+    return calls
+
+def test_fires_after_grace():
+    """
+    One call per boundary, never before boundary + grace, even when the
+    timer wakes up early.
+    """
+    clock = FakeTime(1000.0, early=0.05)
+    calls = run_scheduler(clock, 3)
+    print(f"Calls: {calls}")
+    assert [boundary for boundary, _ in calls] == [1020, 1080, 1140]
+    for boundary, at in calls:
+        assert boundary + 0.2 <= at < boundary + 0.3
+
+def test_skips_stalled_boundaries():
+    """
+    A sweep that stalls past several boundaries is followed by one call
+    for the latest boundary only.
+    """
+    clock = FakeTime(1000.0)
+
+    def stall(count):
+        if count == 1:
+            clock.now += 150  # 1020.2 -> 1170.2: 1080 and 1140 have passed
+
+    calls = run_scheduler(clock, 3, on_fire=stall)
+    print(f"Calls after stall: {[boundary for boundary, _ in calls]}")
+    assert [boundary for boundary, _ in calls] == [1020, 1140, 1200]
+
+if __name__ == "__main__":
+    test_fires_after_grace()
+    test_skips_stalled_boundaries()
+    print("\nTest Complete.")
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+import fakeredis
+import app.core.redis_client as redis_module
+
+# In-process Redis; must be set before the app modules are imported
+redis_module.redis_client = fakeredis.FakeRedis(decode_responses=True)
+
+from app.core.config import settings
+from app.core import session as session_module
+from app.core.session import IST, MarketSession, PRE_OPEN, OPEN, CLOSING, CLOSED, MARKET_STATUS_KEY
+
+MONDAY = datetime(2026, 10, 19)
+SATURDAY = datetime(2026, 10, 24)
+
+def at(clock, day=MONDAY):
+    hours, minutes = clock.split(":")
+    return IST.localize(day.replace(hour=int(hours), minute=int(minutes))).timestamp()
+
+def phase(now, status=None, recorded=None, segment=None):
+    """
+    Phase at `now`, after the feed reported `status` at `recorded` (no
+    report if None). Each case starts from an empty Redis and cache.
+    """
+    session_module.redis_client.delete(MARKET_STATUS_KEY)
+    if status:
+        MarketSession(clock=lambda: recorded).record_feed_status({segment or settings.SESSION_SEGMENT: status})
+    return MarketSession(clock=lambda: now).phase()
+
+def test_calendar_boundaries():
+    """
+    Without a feed status the calendar decides, minute-exact at each boundary.
+    """
+    cases = [
+        ("08:59", CLOSED), ("09:00", PRE_OPEN), ("09:14", PRE_OPEN), ("09:15", OPEN),
+        ("15:29", OPEN), ("15:30", CLOSING), ("15:59", CLOSING), ("16:00", CLOSED), ("23:59", CLOSED),
+    ]
+    for clock, expected in cases:
+        assert phase(at(clock)) == expected, (clock, expected)
+    assert phase(at("10:00", SATURDAY)) == CLOSED
+    print(f"Calendar: {len(cases) + 1} cases")
+
+def test_feed_status_precedence():
+    """
+    Today's feed status overrides the calendar, except an active status
+    from before the closing end once the calendar says CLOSED (the feed
+    went away mid-session). Yesterday's status and other segments are ignored.
+    """
+    cases = [
+        # (now, feed status, recorded at, expected)
+        (at("10:00"), "NORMAL_OPEN", at("09:15"), OPEN),
+        (at("09:05"), "PRE_OPEN_START", at("09:00"), PRE_OPEN),
+        (at("09:16"), "PRE_OPEN_END", at("09:08"), PRE_OPEN),  # Open delayed by the exchange
+        (at("15:40"), "CLOSING_END", at("15:40"), CLOSED),  # Early close
+        (at("15:35"), "NORMAL_CLOSE", at("15:30"), CLOSING),
+        (at("17:00"), "NORMAL_OPEN", at("15:00"), CLOSED),  # Feed dropped mid-session
+        (at("17:00"), "NORMAL_OPEN", at("16:30"), OPEN),  # Special session after the close
+        (at("10:00"), "CLOSING_END", at("16:00", MONDAY - timedelta(days=3)), OPEN),  # Last trading day's status
+    ]
+    try:
+        for now, status, recorded, expected in cases:
+            result = phase(now, status, recorded)
+            assert result == expected, (datetime.fromtimestamp(now, IST), status, result)
+
+        assert phase(at("10:00"), "CLOSING_END", at("09:30"), segment="NSE_EQ") == OPEN
+    finally:
+        session_module.redis_client.delete(MARKET_STATUS_KEY)
+    print(f"Feed status: {len(cases) + 1} cases")
+
+if __name__ == "__main__":
+    test_calendar_boundaries()
+    test_feed_status_precedence()
+    print("\nTest Complete.")
@@ -0,0 +1,76 @@
+from app.services.signal_router import SignalRouter, CallbackSink
+
+# Sinks are not started: their queues are inspected directly
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def make_router(clock, maxsize=100):
+    sink = CallbackSink("test", lambda payload: None, maxsize=maxsize)
+    return SignalRouter([sink], cooldown_seconds=60, dedup_seconds=300, clock=clock), sink
+
+def signal(symbol, level):
+    return {"symbol": symbol, "signal": level}
+
+def queued(sink):
+    items = []
+    while not sink.queue.empty():
+        items.append(sink.queue.get_nowait()[2])
+    return items
+
+def test_dedup():
+    """
+    The same signal for the same symbol is dropped within the dedup window.
+    """
+    clock = Clock()
+    router, _ = make_router(clock)
+    assert router.submit(signal("A", "WATCHLIST"))
+    clock.now += 200
+    assert not router.submit(signal("A", "WATCHLIST"))
+    clock.now += 101
+    assert router.submit(signal("A", "WATCHLIST"))
+    print(f"Dedup: {router.stats()}")
+    assert router.counters["suppressed_duplicate"] == 1
+
+def test_cooldown():
+    """
+    A symbol stays quiet for the cooldown unless its signal is upgraded;
+    other symbols are not affected.
+    """
+    clock = Clock()
+    router, _ = make_router(clock)
+    assert router.submit(signal("A", "STRONG BUY"))
+    clock.now += 10
+    assert not router.submit(signal("A", "WATCHLIST"))
+    assert router.submit(signal("B", "WATCHLIST"))
+    clock.now += 5
+    assert router.submit(signal("B", "STRONG BUY"))
+    clock.now += 60
+    assert router.submit(signal("A", "WATCHLIST"))
+    print(f"Cooldown: {router.counters}")
+    assert router.counters["suppressed_cooldown"] == 1
+
+def test_priority_and_drops():
+    """
+    A full sink drops (and counts) instead of blocking; what it holds is
+    drained STRONG BUY first, FIFO within a level.
+    """
+    clock = Clock()
+    router, sink = make_router(clock, maxsize=3)
+    for symbol, level in [("A", "WATCHLIST"), ("B", "STRONG BUY"), ("C", "WATCHLIST"), ("D", "STRONG BUY")]:
+        router.submit(signal(symbol, level))
+
+    stats = router.stats()["sinks"]["test"]
+    print(f"Sink: {stats}")
+    assert stats["dropped"] == 1 and stats["queued"] == 3
+    assert [payload["symbol"] for payload in queued(sink)] == ["B", "A", "C"]
+
+if __name__ == "__main__":
+    test_dedup()
+    test_cooldown()
+    test_priority_and_drops()
+    print("\nTest Complete.")
@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+from app.core.snapshot import SnapshotStore
+
+# Each check works in its own temp dir; nothing touches SNAPSHOT_DIR
+
+def with_store(check):
+    directory = tempfile.mkdtemp(prefix="snapshot-test-")
+    try:
+        check(directory)
+    finally:
+        shutil.rmtree(directory)
+
+def test_journal_replay():
+    """
+    Deltas appended after a full snapshot are replayed in order; None deletes a key.
+    """
+    def check(directory):
+        store = SnapshotStore("test", directory)
+        store.save({"candles": {"A": 1, "B": 2}})
+        store.append({"candles": {"A": 10}})
+        store.append({"candles": {"B": None, "C": 3}})
+        store.close()
+
+        state, _ = SnapshotStore("test", directory).load(max_age=0)
+        print(f"Replayed state: {state}")
+        assert state == {"candles": {"A": 10, "C": 3}}
+    with_store(check)
+
+def test_torn_record():
+    """
+    A record cut short by a crash is not replayed, and the next append
+    continues right after the last good record.
+    """
+    def check(directory):
+        store = SnapshotStore("test", directory)
+        store.save({"candles": {"A": 1}})
+        store.append({"candles": {"A": 2}})
+        store.append({"candles": {"A": 3}})
+        store.close()
+        with open(store.journal_path, "r+b") as f:
+            f.truncate(os.path.getsize(store.journal_path) - 3)
+
+        reopened = SnapshotStore("test", directory)
+        state, _ = reopened.load(max_age=0)
+        assert state == {"candles": {"A": 2}}
+        reopened.append({"candles": {"B": 4}})
+        reopened.close()
+
+        state, _ = SnapshotStore("test", directory).load(max_age=0)
+        print(f"After torn tail and new append: {state}")
+        assert state == {"candles": {"A": 2, "B": 4}}
+    with_store(check)
+
+def test_generation_mismatch():
+    """
+    A journal from an older generation is ignored, including when the new
+    base was written by a store that never loaded the old one.
+    """
+    def check(directory):
+        old = SnapshotStore("test", directory)
+        old.save({"candles": {"A": 1}})
+        old.append({"candles": {"A": "stale"}})
+        journal = open(old.journal_path, "rb").read()
+        old.close()
+
+        # Fresh store (e.g. the old base was too old to load) writes a new base,
+        # then crashes before its journal is truncated: the old journal survives
+        fresh = SnapshotStore("test", directory)
+        fresh.save({"candles": {"A": 2}})
+        fresh.close()
+        with open(fresh.journal_path, "wb") as f:
+            f.write(journal)
+
+        state, _ = SnapshotStore("test", directory).load(max_age=0)
+        print(f"Generations {old.generation} -> {fresh.generation}, state {state}")
+        assert fresh.generation > old.generation
+        assert state == {"candles": {"A": 2}}
+    with_store(check)
+
+if __name__ == "__main__":
+    test_journal_replay()
+    test_torn_record()
+    test_generation_mismatch()
+    print("\nTest Complete.")
@@ -0,0 +1,97 @@
+import json
+from app.strategies import sniper as sniper_module
+from app.strategies.sniper import SniperStrategy
+
+SYMBOL = "NSE_FO|24200CE"
+TICK = {
+    "timestamp": 600, "ltp": 100.0, "vtt": 1000, "oi": 5000, "total_buy_qty": 2000, "total_sell_qty": 1000,
+    "delta": 0.5, "gamma": 0.002, "max_sell_wall_price": 0, "best_bid": 99.95, "best_ask": 100.05,
+}
+
+class FakeTime:
+    """Stands in for the time module in the strategy: a settable monotonic clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def thread_time(self):
+        return 0.0
+
+class FakeBus:
+    def __init__(self):
+        self.signals = []
+
+    def publish(self, channel, message):
+        self.signals.append(json.loads(message))
+
+def run_ticks(steps):
+    """
+    Feeds one tick per (seconds since start, score) step to an intrabar
+    sniper whose scoring returns `score`. Returns the published signal
+    levels as [(seconds, level)].
+    """
+    clock = FakeTime()
+    bus = FakeBus()
+    strategy = SniperStrategy(params={"intrabar": True, "hysteresis": 5, "debounce_ms": 2000}, bus=bus)
+    published = []
+    original = sniper_module.time
+    sniper_module.time = clock
+    try:
+        for seconds, score in steps:
+            clock.now = 1000.0 + seconds
+            strategy.calculate_trade_score = lambda candle, prev, score=score: (score, [])
+            count = len(bus.signals)
+            strategy.on_tick(SYMBOL, TICK)
+            published += [(seconds, signal["signal"]) for signal in bus.signals[count:]]
+    finally:
+        sniper_module.time = original
+    return published
+
+def test_hysteresis():
+    """
+    A score that crosses the WATCHLIST threshold and then wobbles within
+    the hysteresis band below it publishes one signal.
+    """
+    published = run_ticks([(0, 50), (3, 62), (6, 57), (9, 61), (12, 56), (15, 60)])
+    print(f"Published: {published}")
+    assert published == [(3, "WATCHLIST")]
+
+def test_debounce():
+    """
+    Level changes within debounce_ms of the last one are suppressed: a drop
+    and immediate re-cross does not publish again, nor does an upgrade
+    right after a signal; the next change after the window does.
+    """
+    published = run_ticks([
+        (0, 62),  # WATCHLIST
+        (0.5, 85),  # Upgrade within the window: suppressed
+        (3, 50),  # Dropped below the band: level falls silently
+        (4, 62),  # Re-cross 1s later: suppressed
+        (4.5, 85),  # Still within the window
+        (5.5, 85),  # Window over: STRONG BUY
+    ])
+    print(f"Published: {published}")
+    assert published == [(0, "WATCHLIST"), (5.5, "STRONG BUY")]
+
+def test_signal_state():
+    """
+    update_signal_state with an injected clock: entered at the threshold,
+    held within the band, left below it.
+    """
+    strategy = SniperStrategy(params={"hysteresis": 5, "debounce_ms": 2000})
+    assert strategy.update_signal_state(SYMBOL, 81, now=0) == "STRONG BUY"
+    assert strategy.update_signal_state(SYMBOL, 76, now=10) is None
+    assert strategy.signal_state[SYMBOL][0] == 2  # 76 + 5 >= 80: still STRONG BUY
+    assert strategy.update_signal_state(SYMBOL, 74, now=20) is None
+    assert strategy.signal_state[SYMBOL][0] == 1  # Down to WATCHLIST, not published
+    assert strategy.update_signal_state(SYMBOL, 80, now=21) is None  # Debounced
+    assert strategy.update_signal_state(SYMBOL, 80, now=22) == "STRONG BUY"
+
+if __name__ == "__main__":
+    test_hysteresis()
+    test_debounce()
+    test_signal_state()
+    print("\nTest Complete.")
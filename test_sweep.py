@@ -0,0 +1,157 @@
+import asyncio
+import json
+import time
+from datetime import datetime
+import fakeredis
+import app.core.redis_client as redis_module
+
+# In-process Redis; must be set before the app modules are imported
+redis_module.redis_client = fakeredis.FakeRedis(decode_responses=True)
+
+from app.core.config import settings
+from app.core.codec import decode_candle_batch
+from app.core.session import IST, market_session
+from app.core.startup import FEED_INSTRUMENTS_KEY
+from app.worker import resampler as resampler_module
+from app.worker.resampler import Resampler
+
+SYMBOL = "NSE_FO|24200CE"
+# A Monday 10:00 IST: the session is OPEN, so quiet minutes are still swept
+MARKET_OPEN_TS = IST.localize(datetime(2026, 10, 19, 10, 0)).timestamp()
+BASE_TICK = {
+    "total_buy_qty": 80, "total_sell_qty": 40, "iv": 0, "delta": 0.5, "theta": 0, "gamma": 0.002, "vega": 0,
+    "max_buy_wall_price": 0, "max_buy_wall_qty": 0, "max_sell_wall_price": 0, "max_sell_wall_qty": 0,
+}
+
+class CapturingBus:
+    def __init__(self):
+        self.published = []
+
+    def publish_many(self, channel, messages):
+        for message in messages:
+            candles = decode_candle_batch(message)
+            self.published.append((candles[0][1]["timeframe"] if candles else None, candles))
+
+def isolate(timeframes=None):
+    """
+    Points the resampler at a capturing bus, pins the session clock to
+    MARKET_OPEN_TS and optionally sets CANDLE_TIMEFRAMES. Returns
+    (published, restore): every candle_closed message as
+    [(timeframe, [(symbol, candle)])], and the undo for all of it.
+    """
+    original_bus, original_timeframes = resampler_module.bus, settings.CANDLE_TIMEFRAMES
+    bus = CapturingBus()
+    resampler_module.bus = bus
+    settings.CANDLE_TIMEFRAMES = timeframes or original_timeframes
+    market_session.clock = lambda: MARKET_OPEN_TS
+
+    def restore():
+        resampler_module.bus = original_bus
+        settings.CANDLE_TIMEFRAMES = original_timeframes
+        market_session.clock = time.time
+        market_session.cached_at = 0.0
+
+    return bus.published, restore
+
+def tick(resampler, ts, ltp, vtt, oi=5000):
+    resampler.update_candle(SYMBOL, dict(
+        BASE_TICK, timestamp=ts, ltp=ltp, vtt=vtt, oi=oi, best_bid=ltp - 0.05, best_ask=ltp + 0.05
+    ))
+
+def test_sweep_with_rollups():
+    """
+    1m candles are stored and published with features while a 5m roll-up
+    is built alongside; the 5m candle closes on its own boundary.
+    """
+    published, restore = isolate([60, 300])
+    resampler = Resampler()
+    try:
+        tick(resampler, 600, 100.0, 1000)
+        tick(resampler, 630, 101.0, 1100)
+        records = asyncio.run(resampler.sweep(660))
+        assert [symbol for symbol, _ in records] == [SYMBOL]
+        assert records[0][1]["features"] is not None
+
+        tick(resampler, 665, 100.0, 1200, oi=4800)
+        tick(resampler, 700, 103.0, 1300, oi=4800)
+        asyncio.run(resampler.sweep(720))
+        timeframe, candles = published[-1]
+        assert timeframe == 60
+        assert candles[0][1]["features"]["oi_delta"] == -200
+        assert 300 in resampler.rollup_candles and SYMBOL in resampler.rollup_candles[300]
+
+        tick(resampler, 905, 104.0, 1400)
+        asyncio.run(resampler.sweep(960))
+    finally:
+        restore()
+
+    five_minute = [candles for timeframe, candles in published if timeframe == 300]
+    assert five_minute, "5m candle was not published"
+    candle = five_minute[0][0][1]
+    print(f"5m candle: O {candle['open']} H {candle['high']} L {candle['low']} C {candle['close']}")
+    assert (candle["open"], candle["high"], candle["close"]) == (100.0, 103.0, 103.0)
+
+def test_carry_forward():
+    """
+    An instrument without trades gets a flat candle at its last close each
+    minute, with the same volume (VTT) and no flow.
+    """
+    published, restore = isolate()
+    resampler = Resampler()
+    try:
+        tick(resampler, 600, 100.0, 1000)
+        tick(resampler, 630, 101.5, 1100)
+        asyncio.run(resampler.sweep(660))
+        records = asyncio.run(resampler.sweep(720))
+        records += asyncio.run(resampler.sweep(780))
+    finally:
+        restore()
+
+    assert [record["timestamp"] for _, record in records] == [660, 720]
+    for _, record in records:
+        assert record["open"] == record["high"] == record["low"] == record["close"] == 101.5
+        assert record["volume"] == 1100 and record["tick_count"] == 0
+    print(f"Flat candles: {[(r['timestamp'], r['close']) for _, r in records]}")
+    assert len(published) == 3
+
+def test_carry_forward_pruning():
+    """
+    Unsubscribed and long idle instruments stop being carried forward, and
+    nothing is carried past the session close.
+    """
+    _, restore = isolate()
+    resampler = Resampler()
+    other = "NSE_FO|24300CE"
+    try:
+        tick(resampler, 600, 100.0, 1000)
+        resampler.update_candle(other, dict(
+            BASE_TICK, timestamp=610, ltp=50.0, vtt=10, oi=100, best_bid=49.95, best_ask=50.05
+        ))
+        asyncio.run(resampler.sweep(660))
+
+        resampler_module.redis_client.set(FEED_INSTRUMENTS_KEY, json.dumps([SYMBOL]))
+        records = asyncio.run(resampler.sweep(720))
+        assert [symbol for symbol, _ in records] == [SYMBOL]
+        assert other not in resampler.last_closed
+
+        # 30 idle minutes later the last trade at 600 is too old
+        idle_boundary = 600 + settings.CANDLE_CARRY_FORWARD_IDLE_MINUTES * 60 + 120
+        assert asyncio.run(resampler.sweep(idle_boundary)) == []
+        assert not resampler.last_closed
+
+        tick(resampler, 3000, 101.0, 1100)
+        asyncio.run(resampler.sweep(3060))
+        assert SYMBOL in resampler.last_closed
+        market_session.clock = lambda: MARKET_OPEN_TS + 12 * 3600  # 22:00 IST
+        assert asyncio.run(resampler.sweep(3120)) == []
+        assert not resampler.last_closed
+        print("Pruned: unsubscribed, idle and at the session close")
+    finally:
+        restore()
+        resampler_module.redis_client.delete(FEED_INSTRUMENTS_KEY)
+
+if __name__ == "__main__":
+    test_sweep_with_rollups()
+    test_carry_forward()
+    test_carry_forward_pruning()
+    print("\nTest Complete.")